@@ -15,14 +15,12 @@ from ..models.bazaar import (
     BazaarSearchResult, CardAvailability, UserCardForTrade,
     UserTradeRequests, CardInfo
 )
-from ..services.cards_service import card_system
+from ..services.cards_service import card_system, sacrificial_memo, bazaar_index
+from ..services.trade_requests import trade_requests
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Nom de la sheet pour les demandes d'echange
-TRADE_REQUESTS_SHEET = "TradeRequests"
-
 
 @router.get("/ping")
 async def ping_bazaar():
@@ -34,7 +32,7 @@ async def ping_bazaar():
 async def check_sheet_structure():
     """Debug: Check the structure of the TradeRequests sheet."""
     try:
-        sheet = await asyncio.to_thread(_get_or_create_trade_requests_sheet)
+        sheet = await asyncio.to_thread(lambda: trade_requests.sheet)
         headers = await asyncio.to_thread(sheet.row_values, 1)
         all_values = await asyncio.to_thread(sheet.get_all_values)
         
@@ -102,25 +100,6 @@ async def debug_bazaar_open() -> Dict[str, Any]:
         return {"error": str(e), "traceback": traceback.format_exc()}
 
 
-def _get_or_create_trade_requests_sheet():
-    """Recupere ou cree la sheet des demandes d'echange."""
-    try:
-        return card_system.storage.spreadsheet.worksheet(TRADE_REQUESTS_SHEET)
-    except Exception:
-        # Creer la sheet si elle n'existe pas
-        sheet = card_system.storage.spreadsheet.add_worksheet(
-            title=TRADE_REQUESTS_SHEET, rows="1000", cols="15"
-        )
-        # Ajouter l'en-tete (14 colonnes)
-        # Colonne 14 = notified_at pour le systeme de notifications Discord
-        sheet.append_row([
-            "id", "requester_id", "requester_name", "target_id", "target_name",
-            "offered_category", "offered_name", "requested_category", "requested_name",
-            "status", "created_at", "expires_at", "resolved_at", "notified_at"
-        ])
-        return sheet
-
-
 def _get_discovered_cards() -> set:
     """Retourne l'ensemble des cartes decouvertes (category, name)."""
     try:
@@ -275,6 +254,11 @@ def _transfer_card(from_user_id: int, to_user_id: int, category: str, name: str)
 
                     storage.sheet_cards.update(f"A{i+1}", [cleaned_row])
                     storage.refresh_cards_cache()
+                    bazaar_index.record(from_user_id, category, name, -1)
+                    bazaar_index.record(to_user_id, category, name, 1)
+                    if "(Full)" not in name:
+                        sacrificial_memo.invalidate(from_user_id)
+                        sacrificial_memo.invalidate(to_user_id)
                     return True
 
             return False
@@ -347,96 +331,38 @@ async def search_bazaar(
     try:
         current_user_id = current_user["user_id"]
 
-        # Recuperer les cartes decouvertes
-        discovered_cards = await asyncio.to_thread(_get_discovered_cards)
-        logger.info(f"[BAZAAR] Cartes decouvertes: {len(discovered_cards)}")
-
-        # Recuperer toutes les cartes possedees
-        all_owned = await asyncio.to_thread(_get_all_owned_cards)
-        logger.info(f"[BAZAAR] Cartes possedees: {len(all_owned)}")
-
-        # Filtrer et construire les resultats
-        results = []
-        skipped_not_discovered = 0
-        skipped_no_owners = 0
-        skipped_category = 0
-        skipped_query = 0
-
-        for (cat, name), owners in all_owned.items():
-            # Verifier si la carte est decouverte
-            if (cat, name) not in discovered_cards:
-                skipped_not_discovered += 1
-                continue
-
-            # Filtre par categorie
-            if category and cat != category:
-                skipped_category += 1
-                continue
-
-            # Filtre par recherche textuelle
-            if query:
-                query_lower = query.lower()
-                if query_lower not in name.lower() and query_lower not in cat.lower():
-                    skipped_query += 1
-                    continue
+        # Index maintenu par les mouvements d'inventaire (construit a la premiere requete)
+        await bazaar_index.ensure_fresh(card_system.rebuild_bazaar_index)
+        page_cards, total = bazaar_index.search(
+            current_user_id, query, category, include_non_duplicates, page, per_page
+        )
 
-            # Calculer la disponibilite
+        paginated_results = []
+        for (cat, name), owners, file_id in page_cards:
             available_owners = []
             total_available = 0
-
-            for owner in owners:
-                owner_id = owner["user_id"]
-                count = owner["count"]
-
-                # Ne pas afficher ses propres cartes
-                if int(owner_id) == current_user_id:
-                    continue
-
+            for owner_id, count in owners.items():
                 # Calculer combien sont disponibles a l'echange
-                if include_non_duplicates:
-                    available = count  # Toutes les cartes
-                else:
-                    available = count - 1  # Seulement les doublons
-
-                if available > 0:
-                    # Recuperer le username depuis le cache (si disponible)
-                    username = card_system.get_username(int(owner_id)) or f"User_{owner_id}"
-
-                    available_owners.append({
-                        "user_id": owner_id,
-                        "username": username,
-                        "count": count,
-                        "available": available
-                    })
-                    total_available += available
-
-            # Ajouter seulement si des cartes sont disponibles
-            if available_owners:
-                # Recuperer le file_id de la carte
-                file_id = None
-                for card in card_system.cards_by_category.get(cat, []):
-                    if card["name"] == name:
-                        file_id = card.get("file_id")
-                        break
-
-                results.append(CardAvailability(
-                    category=cat,
-                    name=name,
-                    file_id=file_id,
-                    owners=available_owners,
-                    total_available=total_available
-                ))
-            else:
-                skipped_no_owners += 1
+                available = count if include_non_duplicates else count - 1
+                # Recuperer le username depuis le cache (si disponible)
+                username = card_system.get_username(int(owner_id)) or f"User_{owner_id}"
+                available_owners.append({
+                    "user_id": owner_id,
+                    "username": username,
+                    "count": count,
+                    "available": available
+                })
+                total_available += available
+
+            paginated_results.append(CardAvailability(
+                category=cat,
+                name=name,
+                file_id=file_id,
+                owners=available_owners,
+                total_available=total_available
+            ))
 
-        logger.info(f"[BAZAAR] Resultats: {len(results)}, non-decouverts: {skipped_not_discovered}, sans proprio dispo: {skipped_no_owners}")
-
-        # Pagination
-        total = len(results)
         total_pages = (total + per_page - 1) // per_page
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_results = results[start:end]
 
         return BazaarSearchResult(
             cards=paginated_results,
@@ -532,25 +458,20 @@ async def propose_trade(
         )
 
         # Sauvegarder dans la sheet
-        sheet = await asyncio.to_thread(_get_or_create_trade_requests_sheet)
-        await asyncio.to_thread(
-            sheet.append_row,
-            [
-                trade_id,
-                requester_id_str,
-                requester_name,
-                target_id_str,
-                target_name,
-                request.offered_category,
-                request.offered_name,
-                request.requested_category,
-                request.requested_name,
-                TradeRequestStatus.PENDING.value,
-                now.isoformat(),
-                expires_at.isoformat(),
-                ""
-            ]
-        )
+        await asyncio.to_thread(trade_requests.add, {
+            "id": trade_id,
+            "requester_id": requester_id_str,
+            "requester_name": requester_name,
+            "target_id": target_id_str,
+            "target_name": target_name,
+            "offered_category": request.offered_category,
+            "offered_name": request.offered_name,
+            "requested_category": request.requested_category,
+            "requested_name": request.requested_name,
+            "status": TradeRequestStatus.PENDING.value,
+            "created_at": now.isoformat(),
+            "expires_at": expires_at.isoformat(),
+        })
 
         logger.info(f"Nouvelle demande d'echange creee: {trade_id}")
 
@@ -582,14 +503,15 @@ async def get_my_trade_requests(
     try:
         user_id_str = current_user["user_id_str"]
 
-        sheet = await asyncio.to_thread(_get_or_create_trade_requests_sheet)
-
-        # Gerer le cas ou la sheet est vide ou n'a que des en-tetes
+        # Seules les demandes en attente de l'utilisateur sont parcourues
         try:
-            records = await asyncio.to_thread(sheet.get_all_records)
+            received_records, sent_records = await asyncio.to_thread(
+                trade_requests.for_user, user_id_str, TradeRequestStatus.PENDING.value
+            )
         except Exception as e:
             logger.warning(f"Sheet TradeRequests vide ou erreur: {e}")
-            records = []
+            received_records, sent_records = [], []
+        records = received_records + sent_records
 
         received = []
         sent = []
@@ -672,22 +594,12 @@ async def accept_trade(
         user_id = current_user["user_id"]
         user_id_str = current_user["user_id_str"]
 
-        sheet = await asyncio.to_thread(_get_or_create_trade_requests_sheet)
-
+        # Trouver la demande
         try:
-            records = await asyncio.to_thread(sheet.get_all_records)
+            trade_record = await asyncio.to_thread(trade_requests.get, trade_id)
         except Exception as e:
             logger.warning(f"Erreur lecture TradeRequests: {e}")
-            records = []
-
-        # Trouver la demande
-        trade_record = None
-        row_index = None
-        for i, record in enumerate(records):
-            if record.get("id") == trade_id:
-                trade_record = record
-                row_index = i + 2  # +2 car en-tete + index 0-based
-                break
+            trade_record = None
 
         if not trade_record:
             raise HTTPException(
@@ -778,10 +690,7 @@ async def accept_trade(
         # Mettre a jour le statut
         now = datetime.utcnow()
         await asyncio.to_thread(
-            sheet.update_cell, row_index, 10, TradeRequestStatus.ACCEPTED.value
-        )
-        await asyncio.to_thread(
-            sheet.update_cell, row_index, 13, now.isoformat()
+            trade_requests.set_status, trade_id, TradeRequestStatus.ACCEPTED.value, now.isoformat()
         )
 
         logger.info(f"Echange {trade_id} accepte et complete")
@@ -815,44 +724,33 @@ async def decline_trade(
     try:
         user_id_str = current_user["user_id_str"]
 
-        sheet = await asyncio.to_thread(_get_or_create_trade_requests_sheet)
-
+        # Trouver la demande
         try:
-            records = await asyncio.to_thread(sheet.get_all_records)
+            record = await asyncio.to_thread(trade_requests.get, trade_id)
         except Exception as e:
             logger.warning(f"Erreur lecture TradeRequests: {e}")
-            records = []
+            record = None
 
-        # Trouver la demande
-        row_index = None
-        for i, record in enumerate(records):
-            if record.get("id") == trade_id:
-                if str(record.get("target_id")) != user_id_str:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Vous n'etes pas le destinataire de cette demande"
-                    )
-                if record.get("status") != TradeRequestStatus.PENDING.value:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Cette demande n'est plus en attente"
-                    )
-                row_index = i + 2
-                break
-
-        if not row_index:
+        if not record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Demande non trouvee"
             )
+        if str(record.get("target_id")) != user_id_str:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Vous n'etes pas le destinataire de cette demande"
+            )
+        if record.get("status") != TradeRequestStatus.PENDING.value:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cette demande n'est plus en attente"
+            )
 
         # Mettre a jour le statut
         now = datetime.utcnow()
         await asyncio.to_thread(
-            sheet.update_cell, row_index, 10, TradeRequestStatus.DECLINED.value
-        )
-        await asyncio.to_thread(
-            sheet.update_cell, row_index, 13, now.isoformat()
+            trade_requests.set_status, trade_id, TradeRequestStatus.DECLINED.value, now.isoformat()
         )
 
         logger.info(f"Echange {trade_id} refuse")
@@ -884,44 +782,33 @@ async def cancel_trade(
     try:
         user_id_str = current_user["user_id_str"]
 
-        sheet = await asyncio.to_thread(_get_or_create_trade_requests_sheet)
-
+        # Trouver la demande
         try:
-            records = await asyncio.to_thread(sheet.get_all_records)
+            record = await asyncio.to_thread(trade_requests.get, trade_id)
         except Exception as e:
             logger.warning(f"Erreur lecture TradeRequests: {e}")
-            records = []
+            record = None
 
-        # Trouver la demande
-        row_index = None
-        for i, record in enumerate(records):
-            if record.get("id") == trade_id:
-                if str(record.get("requester_id")) != user_id_str:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Vous n'etes pas l'initiateur de cette demande"
-                    )
-                if record.get("status") != TradeRequestStatus.PENDING.value:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Cette demande n'est plus en attente"
-                    )
-                row_index = i + 2
-                break
-
-        if not row_index:
+        if not record:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Demande non trouvee"
             )
+        if str(record.get("requester_id")) != user_id_str:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Vous n'etes pas l'initiateur de cette demande"
+            )
+        if record.get("status") != TradeRequestStatus.PENDING.value:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cette demande n'est plus en attente"
+            )
 
         # Mettre a jour le statut
         now = datetime.utcnow()
         await asyncio.to_thread(
-            sheet.update_cell, row_index, 10, TradeRequestStatus.CANCELLED.value
-        )
-        await asyncio.to_thread(
-            sheet.update_cell, row_index, 13, now.isoformat()
+            trade_requests.set_status, trade_id, TradeRequestStatus.CANCELLED.value, now.isoformat()
         )
 
         logger.info(f"Echange {trade_id} annule")
@@ -956,38 +843,11 @@ async def get_user_available_cards(
     try:
         target_user_id = int(user_id)
 
-        # Recuperer les cartes decouvertes
-        discovered_cards = await asyncio.to_thread(_get_discovered_cards)
-
-        # Recuperer toutes les cartes possedees
-        all_owned = await asyncio.to_thread(_get_all_owned_cards)
-
-        available_cards = []
-
-        for (cat, name), owners in all_owned.items():
-            # Verifier si la carte est decouverte
-            if (cat, name) not in discovered_cards:
-                continue
-
-            for owner in owners:
-                if int(owner["user_id"]) == target_user_id:
-                    count = owner["count"]
-                    available = count if include_non_duplicates else count - 1
-
-                    if available > 0:
-                        # Recuperer le file_id
-                        file_id = None
-                        for card in card_system.cards_by_category.get(cat, []):
-                            if card["name"] == name:
-                                file_id = card.get("file_id")
-                                break
-
-                        available_cards.append(CardInfo(
-                            category=cat,
-                            name=name,
-                            file_id=file_id
-                        ))
-                    break
+        await bazaar_index.ensure_fresh(card_system.rebuild_bazaar_index)
+        available_cards = [
+            CardInfo(category=cat, name=name, file_id=file_id)
+            for (cat, name), file_id in bazaar_index.user_cards(target_user_id, include_non_duplicates)
+        ]
 
         return available_cards
 
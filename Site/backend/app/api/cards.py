@@ -2,53 +2,22 @@
 Routes pour la gestion des cartes.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import Response
 from typing import List, Optional
 import logging
 import asyncio
+import hashlib
 
 from ..core.dependencies import get_current_user, get_optional_user
 from ..models.card import Card, RarityInfo, CardDiscovery
-from ..services.cards_service import card_system
+from ..services.cards_service import card_system, card_image_cache
+from ..services.image_derivatives import image_derivatives, negotiate_format, DERIVATIVE_SIZES, MEDIA_TYPES
+from ..services.drive_images import drive_images
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Cache LRU pour les images (max 500 images, ~250MB si 500KB par image)
-from collections import OrderedDict
-
-class LRUImageCache:
-    """Cache LRU pour les images avec limite de taille."""
-
-    def __init__(self, max_size: int = 500):
-        self.cache = OrderedDict()
-        self.max_size = max_size
-
-    def get(self, key: str) -> bytes | None:
-        if key in self.cache:
-            # Déplacer en fin (most recently used)
-            self.cache.move_to_end(key)
-            return self.cache[key]
-        return None
-
-    def set(self, key: str, value: bytes):
-        if key in self.cache:
-            self.cache.move_to_end(key)
-        else:
-            if len(self.cache) >= self.max_size:
-                # Supprimer le plus ancien (least recently used)
-                self.cache.popitem(last=False)
-            self.cache[key] = value
-
-    def __contains__(self, key: str) -> bool:
-        return key in self.cache
-
-    def __len__(self) -> int:
-        return len(self.cache)
-
-_image_cache = LRUImageCache(max_size=500)
-
 
 @router.get("/", response_model=List[Card])
 async def get_all_cards(
@@ -137,67 +106,48 @@ async def get_recent_discoveries(
 
 
 @router.get("/image/{file_id}")
-async def get_card_image(file_id: str):
+async def get_card_image(
+    file_id: str,
+    request: Request,
+    size: str = Query("full", description="Taille: thumb, small ou full"),
+    format: Optional[str] = Query(None, description="Format forcé: png ou webp (sinon négocié via Accept)")
+):
     """
-    Récupère l'image d'une carte depuis Google Drive avec cache LRU.
+    Récupère l'image d'une carte depuis Google Drive avec le cache d'images partagé.
+    Les miniatures et l'encodage WebP sont générés à la première demande.
 
     Args:
         file_id: ID du fichier Google Drive
+        size: Taille demandée (thumb, small, full)
+        format: Format de sortie forcé (png, webp)
 
     Returns:
-        Image au format PNG
+        Image au format PNG ou WebP
     """
-    try:
-        # Vérifier le cache LRU
-        cached_image = _image_cache.get(file_id)
-        if cached_image is not None:
-            logger.debug(f"📦 Image {file_id} depuis le cache ({len(_image_cache)} en cache)")
-            return Response(
-                content=cached_image,
-                media_type="image/png",
-                headers={
-                    "Cache-Control": "public, max-age=604800",  # 7 jours
-                    "Access-Control-Allow-Origin": "*"
-                }
-            )
+    if size not in DERIVATIVE_SIZES:
+        raise HTTPException(status_code=400, detail=f"Taille invalide: {size}")
 
-        logger.info(f"🖼️  Téléchargement de l'image {file_id}")
-
-        import httpx
-
-        # Essayer plusieurs URLs en fallback (URL la plus rapide en premier)
-        urls = [
-            f"https://lh3.googleusercontent.com/d/{file_id}",
-            f"https://drive.google.com/uc?export=view&id={file_id}",
-            f"https://drive.google.com/uc?export=download&id={file_id}",
-        ]
-
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            for i, url in enumerate(urls):
-                try:
-                    response = await client.get(url)
-
-                    if response.status_code == 200 and len(response.content) > 500:
-                        file_bytes = response.content
-
-                        # Mettre en cache LRU (gère automatiquement la limite)
-                        _image_cache.set(file_id, file_bytes)
-
-                        logger.info(f"✅ Image {file_id} téléchargée avec URL {i+1} ({len(file_bytes)} bytes, cache: {len(_image_cache)})")
-
-                        return Response(
-                            content=file_bytes,
-                            media_type="image/png",
-                            headers={
-                                "Cache-Control": "public, max-age=604800",  # 7 jours
-                                "Access-Control-Allow-Origin": "*"
-                            }
-                        )
-                except Exception as url_error:
-                    logger.warning(f"URL {i+1} échouée pour {file_id}: {url_error}")
-                    continue
-
-            raise Exception(f"Toutes les URLs ont échoué pour {file_id}")
+    try:
+        original = await drive_images.load(file_id)
+
+        fmt = negotiate_format(request.headers.get("accept"), format)
+        content = await image_derivatives.get(file_id, original, size, fmt)
+        if content is original:
+            fmt = "png"
+
+        headers = {
+            "Cache-Control": "public, max-age=604800",  # 7 jours
+            "Access-Control-Allow-Origin": "*",
+            "Vary": "Accept",
+            "ETag": f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"',
+        }
+
+        # Revalidation : le navigateur possède déjà cette version exacte
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=content, media_type=MEDIA_TYPES[fmt], headers=headers)
 
     except Exception as e:
         logger.error(f"❌ Erreur lors du téléchargement de l'image {file_id}: {e}")
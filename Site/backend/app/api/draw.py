@@ -251,7 +251,7 @@ async def perform_bonus_draw(current_user: dict = Depends(get_current_user)):
     try:
         # Verifier les bonus disponibles
         bonus_count = await asyncio.to_thread(
-            card_system.storage.get_user_bonus_count,
+            card_system.get_user_bonus_count,
             user_id
         )
 
@@ -262,11 +262,17 @@ async def perform_bonus_draw(current_user: dict = Depends(get_current_user)):
             )
 
         # Consommer un bonus
-        await asyncio.to_thread(
-            card_system.storage.consume_user_bonus,
+        consumed = await asyncio.to_thread(
+            card_system.consume_user_bonus,
             user_id
         )
 
+        if not consumed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Vous n'avez aucun tirage bonus disponible"
+            )
+
         # Tirer 3 cartes
         drawn_cards = await asyncio.to_thread(
             card_system.drawing_manager.draw_cards,
@@ -399,30 +405,16 @@ async def get_sacrificial_preview(current_user: dict = Depends(get_current_user)
     user_id = current_user["user_id"]
 
     try:
-        # Recuperer les cartes avec repetitions (comme le bot)
-        user_cards_tuples = await asyncio.to_thread(
-            card_system._get_user_cards_internal,
-            user_id
-        )
-
-        # Filtrer les cartes non-Full
-        eligible_tuples = [
-            (cat, name) for cat, name in user_cards_tuples
-            if "(Full)" not in name
-        ]
+        # Selection deterministe des 5 cartes (memorisee pour la journee)
+        selection = await asyncio.to_thread(card_system.get_sacrificial_selection, user_id)
 
-        if len(eligible_tuples) < 5:
+        if selection.eligible_count < 5:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Vous devez avoir au moins 5 cartes non-Full. Vous en avez {len(eligible_tuples)}."
+                detail=f"Vous devez avoir au moins 5 cartes non-Full. Vous en avez {selection.eligible_count}."
             )
 
-        # Selection deterministe des 5 cartes (avec doublons)
-        selected_cards = await asyncio.to_thread(
-            card_system.drawing_manager.select_daily_sacrificial_cards,
-            user_id,
-            eligible_tuples
-        )
+        selected_cards = selection.cards
 
         # Trouver le file_id pour chaque carte
         result = []
@@ -477,36 +469,20 @@ async def perform_sacrificial_draw(current_user: dict = Depends(get_current_user
                 detail="Vous avez deja effectue votre tirage sacrificiel aujourd'hui"
             )
 
-        # 2. Recuperer les cartes eligibles (non-Full) avec repetitions
-        # Le bot utilise une liste avec doublons (si on a 3x la meme carte, elle apparait 3 fois)
-        user_cards_tuples = await asyncio.to_thread(
-            card_system._get_user_cards_internal,
-            user_id
-        )
+        # 2. Obtenir les 5 cartes a sacrifier (selection deterministe memorisee)
+        selection = await asyncio.to_thread(card_system.get_sacrificial_selection, user_id)
 
-        # Filtrer les cartes non-Full
-        eligible_tuples = [
-            (cat, name) for cat, name in user_cards_tuples
-            if "(Full)" not in name
-        ]
-
-        if len(eligible_tuples) < 5:
+        if selection.eligible_count < 5:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Vous devez avoir au moins 5 cartes non-Full. Vous en avez {len(eligible_tuples)}."
+                detail=f"Vous devez avoir au moins 5 cartes non-Full. Vous en avez {selection.eligible_count}."
             )
 
-        # 3. Obtenir les 5 cartes a sacrifier (selection deterministe)
-        # Cette fonction attend une liste avec doublons
-        cards_to_sacrifice = await asyncio.to_thread(
-            card_system.drawing_manager.select_daily_sacrificial_cards,
-            user_id,
-            eligible_tuples
-        )
+        cards_to_sacrifice = selection.cards
 
         logger.info(f"Cartes a sacrifier pour {user_id}: {cards_to_sacrifice}")
 
-        # 4. Retirer les 5 cartes de la collection
+        # 3. Retirer les 5 cartes de la collection
         for category, name in cards_to_sacrifice:
             success = await asyncio.to_thread(
                 card_system._remove_card_from_user,
@@ -523,7 +499,7 @@ async def perform_sacrificial_draw(current_user: dict = Depends(get_current_user
 
         logger.info(f"Cartes sacrifiees retirees pour {user_id}")
 
-        # 5. Tirer 3 nouvelles cartes (pas 5!)
+        # 4. Tirer 3 nouvelles cartes (pas 5!)
         new_cards = await asyncio.to_thread(
             card_system.drawing_manager.draw_cards,
             3
@@ -538,13 +514,13 @@ async def perform_sacrificial_draw(current_user: dict = Depends(get_current_user
 
         logger.info(f"Nouvelles cartes tirees pour {user_id}: {new_cards}")
 
-        # 6. Enregistrer le tirage sacrificiel
+        # 5. Enregistrer le tirage sacrificiel
         await asyncio.to_thread(
             card_system.drawing_manager.record_sacrificial_draw,
             user_id
         )
 
-        # 7. Ajouter les 3 nouvelles cartes
+        # 6. Ajouter les 3 nouvelles cartes
         result_cards = []
         for category, name in new_cards:
             await asyncio.to_thread(
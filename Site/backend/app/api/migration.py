@@ -9,7 +9,7 @@ from typing import Dict, Any, List
 import logging
 import asyncio
 
-from ..services.cards_service import card_system
+from ..services.cards_service import card_system, sacrificial_memo
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -51,6 +51,8 @@ def _add_card_to_user_direct(user_id: int, category: str, name: str) -> bool:
                                 cleaned_row += [""] * pad
                                 storage.sheet_cards.update(f"A{i+1}", [cleaned_row])
                                 storage.refresh_cards_cache()
+                                if "(Full)" not in name:
+                                    sacrificial_memo.invalidate(user_id)
                                 return True
                         except (ValueError, IndexError):
                             continue
@@ -62,6 +64,8 @@ def _add_card_to_user_direct(user_id: int, category: str, name: str) -> bool:
                     cleaned_row += [""] * pad
                     storage.sheet_cards.update(f"A{i+1}", [cleaned_row])
                     storage.refresh_cards_cache()
+                    if "(Full)" not in name:
+                        sacrificial_memo.invalidate(user_id)
                     return True
 
             # Carte non trouvee
@@ -304,6 +308,7 @@ async def execute_migration() -> Dict[str, Any]:
                     weekly_sheet.delete_rows,
                     2, len(weekly_data)
                 )
+                card_system.trading_manager.weekly_exchanges.invalidate()
                 logger.info("Feuille 'Echanges Hebdomadaires' videe")
         except Exception as e:
             logger.warning(f"Erreur lors du nettoyage des echanges hebdomadaires: {e}")
@@ -269,8 +269,8 @@ async def get_weekly_trade_limit(current_user: dict = Depends(get_current_user))
     logger.info(f"Verification limite d'echanges pour {user_id}")
 
     try:
-        # Utiliser notre methode existante
-        exchanges_used = card_system._get_user_weekly_exchange_count(user_id)
+        # Compteur en memoire partage avec le bot
+        exchanges_used = await asyncio.to_thread(card_system.get_weekly_exchange_count, user_id)
 
         limit = 3  # WEEKLY_EXCHANGE_LIMIT du bot
         remaining = limit - exchanges_used
@@ -5,6 +5,7 @@ Point d'entrée principal de l'API FastAPI.
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import logging
 
 from .core.config import settings
@@ -47,6 +48,9 @@ app.include_router(migration.router, prefix="/api/migration", tags=["Migration"]
 app.include_router(bazaar.router, prefix="/api/bazaar", tags=["Bazaar"])
 
 
+_board_expiry_task = None
+
+
 @app.on_event("startup")
 async def startup_event():
     """Actions à effectuer au démarrage de l'application."""
@@ -62,11 +66,43 @@ async def startup_event():
         logger.info("✅ CardSystemService pre-initialized")
     except Exception as e:
         logger.error(f"❌ Failed to pre-initialize CardSystemService: {e}")
+        return
+
+    # Client HTTP partagé pour les images (connexions persistantes)
+    from .services.drive_images import drive_images
+    await drive_images.start()
+
+    # Préchauffer les miniatures de la galerie en arrière-plan (images déjà en cache uniquement)
+    from .services.image_derivatives import image_derivatives
+    file_ids = [
+        f["id"]
+        for files in list(card_system.cards_by_category.values()) + list(card_system.upgrade_cards_by_category.values())
+        for f in files
+    ]
+    asyncio.create_task(image_derivatives.prewarm(file_ids))
+
+    # Demandes d'echange signalees directement au bot (meme processus)
+    from .services.trade_requests import trade_events
+    trade_events.attach_producer()
+
+    # Construire l'index du Bazaar avant la premiere recherche
+    from .services.cards_service import bazaar_index
+    asyncio.create_task(bazaar_index.ensure_fresh(card_system.rebuild_bazaar_index))
+
+    # Minuteur des offres du tableau d'echanges (en reserve si celui du bot tourne deja)
+    global _board_expiry_task
+    _board_expiry_task = asyncio.create_task(card_system.trading_manager.run_board_expiry())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Actions à effectuer à l'arrêt de l'application."""
+    from .services.image_derivatives import image_derivatives
+    from .services.drive_images import drive_images
+    image_derivatives.shutdown()
+    await drive_images.close()
+    if _board_expiry_task:
+        _board_expiry_task.cancel()
     logger.info(f"🛑 {settings.APP_NAME} arrêté")
 
 
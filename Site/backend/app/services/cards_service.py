@@ -19,6 +19,10 @@ from cogs.cards.trading import TradingManager
 from cogs.cards.vault import VaultManager
 from cogs.cards.config import ALL_CATEGORIES, RARITY_WEIGHTS
 from cogs.cards.utils import normalize_name
+from cogs.cards.sacrificial_memo import sacrificial_memo, SacrificialSelection
+from cogs.cards.bonus_ledger import BonusLedger
+from cogs.cards.image_cache import card_image_cache
+from cogs.cards.bazaar_index import bazaar_index
 
 # Importer le Root Storage
 logger = logging.getLogger(__name__)
@@ -78,6 +82,8 @@ class CardSystemService:
             # Root storage charge les cartes à l'init
             self.cards_by_category = self.storage.get_all_cards()
             self.upgrade_cards_by_category = self.storage.get_all_full_cards()
+            for files in list(self.cards_by_category.values()) + list(self.upgrade_cards_by_category.values()):
+                card_image_cache.register_files(files)
 
             # 3. Initialiser les Managers (Logic Layer) en leur passant le Storage (Data Layer)
             # DrawingManager: besoin de storage (can_daily_draw, etc.) + cards data
@@ -129,11 +135,37 @@ class CardSystemService:
 
     def _add_card_to_user(self, user_id: int, category: str, name: str) -> bool:
         """Ajoute une carte à l'utilisateur."""
-        return self.storage.add_card_to_user(str(user_id), category, name)
+        success = self.storage.add_card_to_user(str(user_id), category, name)
+        if success:
+            bazaar_index.record(user_id, category, name, 1)
+        if success and "(Full)" not in name:
+            sacrificial_memo.invalidate(user_id)
+        return success
 
     def _remove_card_from_user(self, user_id: int, category: str, name: str) -> bool:
         """Retire une carte à l'utilisateur."""
-        return self.storage.remove_card_from_user(str(user_id), category, name)
+        success = self.storage.remove_card_from_user(str(user_id), category, name)
+        if success:
+            bazaar_index.record(user_id, category, name, -1)
+        if success and "(Full)" not in name:
+            sacrificial_memo.invalidate(user_id)
+        return success
+
+    def rebuild_bazaar_index(self):
+        """Reconstruit l'index du Bazaar depuis l'inventaire (cartes normales et Full)."""
+        files_by_category = {
+            category: self.cards_by_category.get(category, []) + self.upgrade_cards_by_category.get(category, [])
+            for category in set(self.cards_by_category) | set(self.upgrade_cards_by_category)
+        }
+        bazaar_index.rebuild(self.storage, files_by_category, ALL_CATEGORIES)
+
+    def get_sacrificial_selection(self, user_id: int) -> SacrificialSelection:
+        """Retourne la sélection sacrificielle du jour (mémorisée) d'un utilisateur."""
+        def load_card_counts(fresh_after: float) -> Dict[Tuple[str, str], int]:
+            cards = self.storage.get_user_cards(str(user_id), fresh_after)
+            return {(cat, name): count for cat, name, count in cards}
+
+        return self.drawing_manager.get_daily_sacrificial_selection(int(user_id), load_card_counts)
 
     # ----------------------------------------------------------------
     # Logique de Conversion (Upgrade)
@@ -305,7 +337,7 @@ class CardSystemService:
                 cards_by_rarity[cat] = count
 
             # Calculs dispos
-            bonus_count = self.storage.get_user_bonus_count(str(user_id))
+            bonus_count = self.get_user_bonus_count(user_id)
             
             # Utiliser DrawingManager pour la logique "check only" si possible, 
             # ou appeler storage directement. DrawingManager.can_perform_daily... appelle storage.
@@ -315,7 +347,7 @@ class CardSystemService:
             can_sacrificial = self.drawing_manager.can_perform_sacrificial_draw(user_id)
             
             # Weekly exchanges
-            weekly_used = self.storage.get_weekly_trades_count(str(user_id))
+            weekly_used = self.get_weekly_exchange_count(user_id)
             
             # Discoveries
             # count_user_discoveries n'existe pas dans Root storage ?
@@ -383,11 +415,20 @@ class CardSystemService:
         return infos
 
     def consume_user_bonus(self, user_id: int) -> bool:
-        return self.storage.use_bonus_draw(str(user_id))
+        """Consomme un tirage bonus via le registre partagé avec le bot."""
+        return BonusLedger.for_sheet(self.storage.sheet_bonus).consume(user_id) is not None
         
+    def get_weekly_exchange_count(self, user_id: int) -> int:
+        """Retourne le nombre d'échanges hebdomadaires (compteur partagé avec le bot)."""
+        return self.trading_manager.get_weekly_exchange_count(int(user_id))
+
     def get_user_bonus_count(self, user_id: int) -> int:
         """Retourne le nombre de bonus disponibles pour un utilisateur."""
-        return self.storage.get_user_bonus_count(str(user_id))
+        try:
+            return BonusLedger.for_sheet(self.storage.sheet_bonus).balance(user_id)
+        except Exception as e:
+            logger.error(f"Error getting bonus count: {e}")
+            return 0
 
     def get_username(self, user_id: int) -> Optional[str]:
         """
@@ -0,0 +1,132 @@
+"""
+Téléchargement des images de cartes depuis Google Drive pour le site.
+Un client HTTP unique (connexions persistantes, HTTP/2 si disponible) est
+partagé par toutes les requêtes ; les URLs de secours sont interrogées en
+parallèle décalé et un même fichier n'est téléchargé qu'une fois à la fois.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (requis par httpx pour HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from .cards_service import card_image_cache
+
+logger = logging.getLogger(__name__)
+
+# Délai avant de lancer la requête suivante si la précédente n'a pas répondu
+HEDGE_DELAY = 0.75
+REQUEST_TIMEOUT = 30.0
+# Taille minimale d'une réponse pour être considérée comme une image (pages d'erreur Drive exclues)
+MIN_IMAGE_SIZE = 500
+
+
+def drive_image_urls(file_id: str) -> List[str]:
+    """URLs de téléchargement d'une image Drive, de la plus rapide à la plus lente."""
+    return [
+        f"https://lh3.googleusercontent.com/d/{file_id}",
+        f"https://drive.google.com/uc?export=view&id={file_id}",
+        f"https://drive.google.com/uc?export=download&id={file_id}",
+    ]
+
+
+class DriveImageFetcher:
+    """Client partagé de téléchargement des images Drive."""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def start(self):
+        """Crée le client HTTP partagé (à appeler au démarrage de l'application)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=REQUEST_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+            logger.info(f"✅ Client HTTP des images démarré (HTTP/2: {HTTP2_AVAILABLE})")
+
+    async def close(self):
+        """Ferme le client HTTP partagé."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, index: int, url: str) -> bytes:
+        response = await self._client.get(url)
+        if response.status_code != 200 or len(response.content) <= MIN_IMAGE_SIZE:
+            raise Exception(f"URL {index + 1}: réponse invalide ({response.status_code}, {len(response.content)} bytes)")
+        return response.content
+
+    async def _download(self, file_id: str) -> bytes:
+        """
+        Télécharge une image en interrogeant les URLs de secours en parallèle décalé.
+        La première réponse valide est retenue, les autres requêtes sont annulées.
+        """
+        if self._client is None:
+            await self.start()
+
+        urls = drive_image_urls(file_id)
+        pending = set()
+        errors = []
+        try:
+            for i, url in enumerate(urls):
+                pending.add(asyncio.create_task(self._get(i, url)))
+                # Attendre la réponse ou le délai avant de lancer l'URL suivante
+                timeout = HEDGE_DELAY if i < len(urls) - 1 else None
+                while pending:
+                    done, pending = await asyncio.wait(pending, timeout=timeout,
+                                                       return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        break
+                    for task in done:
+                        if task.exception() is None:
+                            logger.info(f"✅ Image {file_id} téléchargée ({len(task.result())} bytes)")
+                            return task.result()
+                        errors.append(task.exception())
+                        logger.warning(f"Échec du téléchargement de {file_id}: {task.exception()}")
+                    if timeout is not None:
+                        # Une requête a échoué : passer tout de suite à l'URL suivante
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise Exception(f"Toutes les URLs ont échoué pour {file_id}: {errors}")
+
+    async def load(self, file_id: str) -> bytes:
+        """
+        Retourne l'image d'origine d'une carte (cache partagé, puis Google Drive).
+        Les requêtes simultanées pour un même fichier partagent le même téléchargement.
+
+        Raises:
+            Exception: Si toutes les URLs de téléchargement ont échoué
+        """
+        cached = await asyncio.to_thread(card_image_cache.get, file_id)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(file_id)
+        if future is None:
+            future = asyncio.ensure_future(self._download_and_cache(file_id))
+            self._inflight[file_id] = future
+            future.add_done_callback(lambda _: self._inflight.pop(file_id, None))
+        return await asyncio.shield(future)
+
+    async def _download_and_cache(self, file_id: str) -> bytes:
+        logger.info(f"🖼️  Téléchargement de l'image {file_id}")
+        data = await self._download(file_id)
+        await asyncio.to_thread(card_image_cache.put, file_id, data)
+        return data
+
+
+drive_images = DriveImageFetcher()
@@ -0,0 +1,208 @@
+"""
+Dérivés des images de cartes (miniatures et WebP) pour la galerie du site.
+Les dérivés sont calculés dans un pool de processus à la première demande
+(ou par préchauffage) et stockés à côté du cache d'images des cartes.
+"""
+
+import os
+import io
+import asyncio
+import tempfile
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow n'est requis que pour les dérivés
+    Image = None
+
+from .cards_service import card_image_cache
+
+logger = logging.getLogger(__name__)
+
+# Largeurs disponibles (en pixels) ; "full" conserve la taille d'origine
+DERIVATIVE_SIZES: Dict[str, Optional[int]] = {
+    "thumb": 200,
+    "small": 400,
+    "full": None,
+}
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "webp": "image/webp",
+}
+
+WEBP_QUALITY = 80
+
+
+def render_derivative(data: bytes, width: Optional[int], fmt: str) -> bytes:
+    """
+    Redimensionne et réencode une image (exécuté dans un processus du pool).
+
+    Args:
+        data: Image PNG d'origine
+        width: Largeur cible (None pour conserver la taille)
+        fmt: Format de sortie ("png" ou "webp")
+
+    Returns:
+        bytes: Image dérivée
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        if width and image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+
+        output = io.BytesIO()
+        if fmt == "webp":
+            image.save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+        else:
+            image.save(output, format="PNG", optimize=True)
+        return output.getvalue()
+
+
+class ImageDerivativeService:
+    """Génère et met en cache les dérivés des images de cartes."""
+
+    def __init__(self, cache=card_image_cache, max_workers: int = 2):
+        self.cache = cache
+        self.directory = os.path.join(cache.directory, "derivatives")
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @property
+    def available(self) -> bool:
+        """Indique si Pillow est installé."""
+        return Image is not None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn" : pas de fork d'un processus multi-threadé (uvicorn, bot, clients Google)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def shutdown(self):
+        """Arrête le pool de processus."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _path(self, file_id: str, size: str, fmt: str) -> str:
+        key = self.cache.key_for(file_id)
+        return os.path.join(self.directory, size, f"{key}.{fmt}")
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, path: str, data: bytes):
+        """Écrit un dérivé via un fichier temporaire renommé (lecture concurrente sûre)."""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Écriture impossible du dérivé {path}: {e}")
+
+    async def get(self, file_id: str, original: bytes, size: str, fmt: str) -> bytes:
+        """
+        Retourne un dérivé, en le calculant si nécessaire.
+
+        Args:
+            file_id: ID du fichier Drive
+            original: Image PNG d'origine
+            size: Taille demandée (clé de DERIVATIVE_SIZES)
+            fmt: Format demandé ("png" ou "webp")
+
+        Returns:
+            bytes: Image dérivée (l'original si Pillow est absent ou en cas d'erreur)
+        """
+        if not self.available or (size == "full" and fmt == "png"):
+            return original
+
+        path = self._path(file_id, size, fmt)
+        data = await asyncio.to_thread(self._read, path)
+        if data is not None:
+            return data
+
+        # Un seul calcul par dérivé même si plusieurs requêtes arrivent en même temps
+        pending = self._pending.get(path)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = loop.run_in_executor(
+                self._get_pool(), render_derivative, original, DERIVATIVE_SIZES[size], fmt
+            )
+            self._pending[path] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(path, None))
+
+        try:
+            data = await asyncio.shield(pending)
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul du dérivé {size}/{fmt} de {file_id}: {e}")
+            return original
+
+        await asyncio.to_thread(self._write, path, data)
+        return data
+
+    async def prewarm(self, file_ids: Iterable[str], sizes: Iterable[str] = ("small",),
+                      formats: Iterable[str] = ("webp",)):
+        """
+        Précalcule les dérivés des images déjà présentes dans le cache local.
+        Aucune image n'est téléchargée depuis Drive.
+
+        Args:
+            file_ids: Images à traiter
+            sizes: Tailles à générer
+            formats: Formats à générer
+        """
+        if not self.available:
+            logger.info("Pillow absent : préchauffage des miniatures ignoré")
+            return
+
+        count = 0
+        for file_id in file_ids:
+            original = await asyncio.to_thread(self.cache.get, file_id)
+            if original is None:
+                continue
+            for size in sizes:
+                for fmt in formats:
+                    if not os.path.exists(self._path(file_id, size, fmt)):
+                        await self.get(file_id, original, size, fmt)
+                        count += 1
+        logger.info(f"✅ Préchauffage des miniatures terminé ({count} dérivés générés)")
+
+
+def negotiate_format(accept: Optional[str], requested: Optional[str] = None) -> str:
+    """
+    Choisit le format de sortie : paramètre explicite, sinon WebP si le client l'accepte.
+
+    Args:
+        accept: En-tête Accept de la requête
+        requested: Format demandé explicitement (?format=)
+
+    Returns:
+        str: "webp" ou "png"
+    """
+    if requested in MEDIA_TYPES:
+        return requested
+    if accept and "image/webp" in accept:
+        return "webp"
+    return "png"
+
+
+image_derivatives = ImageDerivativeService()
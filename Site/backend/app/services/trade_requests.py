@@ -0,0 +1,203 @@
+"""
+Dépôt des demandes d'échange du Bazaar (feuille « TradeRequests »).
+La feuille est lue une fois puis indexée en mémoire par identifiant,
+initiateur, destinataire et statut ; un changement de statut n'écrit que
+les cellules de la ligne concernée. Chaque création ou résolution est
+publiée sur le canal d'événements du bot (cogs/cards/trade_events.py).
+"""
+
+import re
+import time
+import threading
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from cogs.cards.trade_events import trade_events, PROPOSED
+
+from .cards_service import card_system
+
+logger = logging.getLogger(__name__)
+
+TRADE_REQUESTS_SHEET = "TradeRequests"
+
+# En-tête de la feuille (14 colonnes)
+# Colonne 14 = notified_at pour le systeme de notifications Discord
+HEADERS = [
+    "id", "requester_id", "requester_name", "target_id", "target_name",
+    "offered_category", "offered_name", "requested_category", "requested_name",
+    "status", "created_at", "expires_at", "resolved_at", "notified_at"
+]
+STATUS_COLUMN = HEADERS.index("status") + 1
+RESOLVED_COLUMN = HEADERS.index("resolved_at") + 1
+
+# Âge maximal de l'index avant relecture de la feuille (modifications externes)
+TRADE_REQUESTS_MAX_AGE = 300
+# Délai minimal entre deux relectures provoquées par un identifiant inconnu
+MISS_RELOAD_INTERVAL = 5
+
+
+def _column_letter(column: int) -> str:
+    return chr(ord("A") + column - 1)
+
+
+class TradeRequestStore:
+    """
+    Demandes d'échange indexées en mémoire.
+
+    Les enregistrements sont des dictionnaires {colonne: valeur} comme ceux
+    de get_all_records(). Un identifiant inconnu provoque une relecture de la
+    feuille (demande créée par un autre processus), au plus une fois toutes
+    les MISS_RELOAD_INTERVAL secondes.
+    """
+
+    def __init__(self, spreadsheet_getter, max_age: float = TRADE_REQUESTS_MAX_AGE):
+        self._spreadsheet_getter = spreadsheet_getter
+        self.max_age = max_age
+        self._sheet = None
+        self._lock = threading.RLock()
+        self._loaded_at = 0.0
+        self._records: Dict[str, Dict[str, str]] = {}
+        self._rows: Dict[str, int] = {}
+        self._by_requester: Dict[str, Set[str]] = {}
+        self._by_target: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+
+    @property
+    def sheet(self):
+        """Feuille TradeRequests (récupérée ou créée une seule fois)."""
+        if self._sheet is None:
+            with self._lock:
+                if self._sheet is None:
+                    spreadsheet = self._spreadsheet_getter()
+                    try:
+                        self._sheet = spreadsheet.worksheet(TRADE_REQUESTS_SHEET)
+                    except Exception:
+                        # Creer la sheet si elle n'existe pas
+                        sheet = spreadsheet.add_worksheet(title=TRADE_REQUESTS_SHEET, rows="1000", cols="15")
+                        sheet.append_row(HEADERS)
+                        self._sheet = sheet
+        return self._sheet
+
+    # ------------------------------------------------------------------
+    # Chargement et index
+    # ------------------------------------------------------------------
+
+    def reload(self):
+        """Relit toute la feuille et reconstruit les index."""
+        with self._lock:
+            all_values = self.sheet.get_all_values()
+            header = all_values[0] if all_values else HEADERS
+            self._records.clear()
+            self._rows.clear()
+            self._by_requester.clear()
+            self._by_target.clear()
+            self._by_status.clear()
+            for i, row in enumerate(all_values[1:], start=2):
+                record = {column: (row[j] if j < len(row) else "") for j, column in enumerate(header)}
+                if record.get("id"):
+                    self._index(record, i)
+            self._loaded_at = time.monotonic()
+            logger.info(f"[BAZAAR] {len(self._records)} demandes d'echange indexees")
+
+    def _ensure_loaded(self):
+        if not self._loaded_at or time.monotonic() - self._loaded_at > self.max_age:
+            self.reload()
+
+    def _index(self, record: Dict[str, str], row: int):
+        trade_id = record["id"]
+        self._records[trade_id] = record
+        self._rows[trade_id] = row
+        self._by_requester.setdefault(str(record.get("requester_id", "")), set()).add(trade_id)
+        self._by_target.setdefault(str(record.get("target_id", "")), set()).add(trade_id)
+        self._by_status.setdefault(record.get("status", ""), set()).add(trade_id)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def get(self, trade_id: str) -> Optional[Dict[str, str]]:
+        """Retourne une demande par son identifiant (None si elle n'existe pas)."""
+        with self._lock:
+            self._ensure_loaded()
+            record = self._records.get(trade_id)
+            if record is None and time.monotonic() - self._loaded_at > MISS_RELOAD_INTERVAL:
+                self.reload()
+                record = self._records.get(trade_id)
+            return dict(record) if record else None
+
+    def for_user(self, user_id: str, status: Optional[str] = None) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        """
+        Retourne les demandes reçues et envoyées par un utilisateur.
+
+        Args:
+            user_id: ID Discord (string)
+            status: Ne garder que ce statut (toutes si None)
+
+        Returns:
+            Tuple: (demandes reçues, demandes envoyées)
+        """
+        with self._lock:
+            self._ensure_loaded()
+            wanted = self._by_status.get(status, set()) if status is not None else None
+
+            def select(ids: Set[str]) -> List[Dict[str, str]]:
+                if wanted is not None:
+                    ids = ids & wanted
+                return [dict(self._records[i]) for i in sorted(ids, key=self._rows.get)]
+
+            return select(self._by_target.get(user_id, set())), select(self._by_requester.get(user_id, set()))
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def add(self, record: Dict[str, str]) -> int:
+        """
+        Ajoute une demande (une ligne) à la feuille et à l'index, puis la signale au bot.
+
+        Returns:
+            int: Ligne de la demande dans la feuille (0 si inconnue)
+        """
+        row_values = [record.get(column, "") for column in HEADERS]
+        with self._lock:
+            self._ensure_loaded()
+            response = self.sheet.append_row(row_values)
+            updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+            match = re.search(r"![A-Z]+(\d+)", updated_range)
+            row = int(match.group(1)) if match else 0
+            stored = {column: row_values[j] for j, column in enumerate(HEADERS)}
+            if row:
+                self._index(stored, row)
+            else:
+                # Position inconnue : la prochaine lecture retrouvera la ligne
+                self._loaded_at = 0.0
+
+        trade_events.publish(PROPOSED, stored, row)
+        return row
+
+    def set_status(self, trade_id: str, status: str, resolved_at: str):
+        """
+        Change le statut d'une demande (cellules status et resolved_at, une seule
+        requête) puis signale le changement au bot.
+
+        Raises:
+            KeyError: Si la demande n'existe pas
+        """
+        with self._lock:
+            record = self._records[trade_id]
+            row = self._rows[trade_id]
+            self.sheet.batch_update([
+                {"range": f"{_column_letter(STATUS_COLUMN)}{row}", "values": [[status]]},
+                {"range": f"{_column_letter(RESOLVED_COLUMN)}{row}", "values": [[resolved_at]]},
+            ])
+
+            self._by_status.get(record.get("status", ""), set()).discard(trade_id)
+            record["status"] = status
+            record["resolved_at"] = resolved_at
+            self._by_status.setdefault(status, set()).add(trade_id)
+            stored = dict(record)
+
+        trade_events.publish(status, stored, row)
+
+
+trade_requests = TradeRequestStore(lambda: card_system.storage.spreadsheet)
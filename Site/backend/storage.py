@@ -3,6 +3,7 @@ Service de stockage - Réutilise les Google Sheets existants du bot Discord
 Ce module s'interface directement avec les mêmes données que le bot
 """
 
+import os
 import json
 import gspread
 from google.oauth2.service_account import Credentials
@@ -20,6 +21,24 @@ from config import get_settings, RARITY_CONFIG, RARITY_ORDER
 
 logger = logging.getLogger(__name__)
 
+# Catalogue incrémental partagé avec le bot (disponible quand la racine du dépôt est dans sys.path)
+try:
+    from cogs.cards.catalog import DriveCatalog
+except ImportError:
+    DriveCatalog = None
+
+# Verrou du tableau d'échanges partagé avec le bot (même processus)
+try:
+    from cogs.cards.storage import BOARD_LOCK
+except ImportError:
+    BOARD_LOCK = RLock()
+
+# Index du Bazaar partagé avec le bot (même processus)
+try:
+    from cogs.cards.bazaar_index import bazaar_index
+except ImportError:
+    bazaar_index = None
+
 # Scopes Google API
 SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
@@ -87,7 +106,7 @@ class CardsStorageService:
         self._cards_lock = RLock()
         self._vault_lock = RLock()
         self._cache_lock = RLock()
-        self._board_lock = RLock()
+        self._board_lock = BOARD_LOCK
 
     def _init_cache(self):
         """Initialise le cache"""
@@ -173,7 +192,7 @@ class CardsStorageService:
             "Secrète": self.settings.folder_secrete_full_id,
         }
 
-        for category, folder_id in folder_mapping.items():
+        for category, folder_id in list(folder_mapping.items()):
             # Fallback: check env var directly if setting is empty
             if not folder_id:
                 env_var_name = f"FOLDER_{category.upper()}_ID".replace("É", "E").replace("Ê", "E").replace("È", "E")
@@ -188,43 +207,66 @@ class CardsStorageService:
                 if folder_id:
                     logger.info(f"🔹 Resolved Folder ID for {category} from Env Var: {env_var_name}")
 
+                folder_mapping[category] = folder_id
+            if not folder_id:
+                logger.warning(f"⚠️ Missing Folder ID for category: {category}")
+
+        if DriveCatalog is not None:
+            # Dossiers listés en parallèle, puis mis à jour via l'API Drive Changes
+            try:
+                catalog = DriveCatalog(self.credentials, folder_mapping, full_folder_mapping)
+                self.cards_by_category, self.full_cards_by_category = catalog.load()
+                return
+            except Exception as e:
+                logger.error(f"Error loading card catalog, falling back to folder listing: {e}")
+
+        for category, folder_id in folder_mapping.items():
             if folder_id:
                 try:
-                    results = self.drive_service.files().list(
-                        q=f"'{folder_id}' in parents and mimeType contains 'image/'",
-                        fields="files(id, name, mimeType)"
-                    ).execute()
-                    self.cards_by_category[category] = results.get('files', [])
+                    self.cards_by_category[category] = self._list_folder_images(folder_id)
                     logger.info(f"Loaded {len(self.cards_by_category[category])} cards for {category}")
                 except Exception as e:
                     logger.error(f"Error loading cards for {category}: {e}")
                     self.cards_by_category[category] = []
-            else:
-                logger.warning(f"⚠️ Missing Folder ID for category: {category}")
 
         for category, folder_id in full_folder_mapping.items():
             if folder_id:
                 try:
-                    results = self.drive_service.files().list(
-                        q=f"'{folder_id}' in parents and mimeType contains 'image/'",
-                        fields="files(id, name, mimeType)"
-                    ).execute()
-                    self.full_cards_by_category[category] = results.get('files', [])
+                    self.full_cards_by_category[category] = self._list_folder_images(folder_id)
                 except Exception as e:
                     logger.error(f"Error loading full cards for {category}: {e}")
                     self.full_cards_by_category[category] = []
 
+    def _list_folder_images(self, folder_id: str) -> List[dict]:
+        """Liste toutes les images d'un dossier Drive (toutes les pages)"""
+        files = []
+        page_token = None
+        while True:
+            results = self.drive_service.files().list(
+                q=f"'{folder_id}' in parents and mimeType contains 'image/' and trashed = false",
+                fields="nextPageToken, files(id, name, mimeType, modifiedTime)",
+                pageSize=1000,
+                pageToken=page_token
+            ).execute()
+            files.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return files
+
     # ============== Gestion de l'inventaire ==============
 
-    def get_user_cards(self, user_id: str) -> List[Tuple[str, str, int]]:
+    def get_user_cards(self, user_id: str, fresh_after: float = 0.0) -> List[Tuple[str, str, int]]:
         """
         Récupère les cartes d'un utilisateur
+        fresh_after: horodatage (time.time) ; un cache rempli avant est relu
         Returns: Liste de (category, name, count)
         """
         cache_key = f"user_cards_{user_id}"
         cached = self._get_cached(cache_key)
         if cached is not None:
-            return cached
+            cached_at = self._cache_timestamps.get(cache_key)
+            if not fresh_after or (cached_at is not None and cached_at.timestamp() >= fresh_after):
+                return cached
 
         with self._cards_lock:
             try:
@@ -564,6 +606,8 @@ class CardsStorageService:
 
             # Invalider le cache
             self._cache.pop("discovered_cards", None)
+            if bazaar_index is not None:
+                bazaar_index.mark_discovered(category, name)
 
             return discovery_index
         except Exception as e:
@@ -815,6 +859,31 @@ class CardsStorageService:
             logger.error(f"Erreur lors de la suppression d'une entrée d'échange: {e}")
             return False
 
+    def delete_exchange_entries(self, entry_ids: List[int]) -> bool:
+        """
+        Supprime plusieurs entrées du tableau d'échanges en une seule requête.
+        Les lignes sont retrouvées par identifiant juste avant la suppression.
+        """
+        try:
+            with self._board_lock:
+                wanted = {str(entry_id) for entry_id in entry_ids}
+                ids = self.sheet_exchange.col_values(1)
+                rows = [i for i, value in enumerate(ids[1:], start=2) if value in wanted]
+                # Du bas vers le haut pour que les indices restent valides
+                requests = [
+                    {"deleteDimension": {"range": {
+                        "sheetId": self.sheet_exchange.id, "dimension": "ROWS",
+                        "startIndex": row - 1, "endIndex": row
+                    }}}
+                    for row in sorted(rows, reverse=True)
+                ]
+                if requests:
+                    self.spreadsheet.batch_update({"requests": requests})
+                return True
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression groupée d'entrées d'échange: {e}")
+            return False
+
     # ============== Échanges hebdomadaires ==============
 
     def get_weekly_trades_count(self, user_id: str) -> int:
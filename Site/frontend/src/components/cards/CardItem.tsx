@@ -98,7 +98,7 @@ export default function CardItem({ card, count, onClick }: CardItemProps) {
             {/* Image avec key pour forcer le rechargement */}
             <img
               key={imageKey}
-              src={`${API_URL}/api/cards/image/${card.file_id}`}
+              src={`${API_URL}/api/cards/image/${card.file_id}?size=small`}
               alt={card.name}
               className={`w-full h-full object-cover group-hover:scale-110 transition-all duration-300 ${
                 imageLoaded ? 'opacity-100' : 'opacity-0'
@@ -57,10 +57,10 @@ export default function Gallery() {
     }))
   }
 
-  // URL de l'image de carte
+  // URL de l'image de carte (miniature, WebP négocié par le backend)
   const getCardImageUrl = (fileId: string | null) => {
     if (!fileId) return null
-    return `${API_URL}/api/cards/image/${fileId}`
+    return `${API_URL}/api/cards/image/${fileId}?size=small`
   }
 
   // Non authentifié
@@ -11,10 +11,13 @@ import json
 import logging
 import io
 import asyncio
+import threading
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 import gspread
 
+from utils.discord_scheduler import outbound, Priority
+
 # Imports des modules du système de cartes
 from .cards.storage import CardsStorage
 from .cards.discovery import DiscoveryManager
@@ -22,7 +25,15 @@ from .cards.vault import VaultManager
 from .cards.drawing import DrawingManager
 from .cards.trading import TradingManager
 from .cards.forum import ForumManager
+from .cards.forum_queue import ForumQueue, ForumPostingWorker
 from .cards.bazaar_notifier import BazaarNotifier, TradeExpirationChecker
+from .cards.upgrades import UpgradeManager, UpgradePlan
+from .cards.sacrificial_memo import sacrificial_memo
+from .cards.bazaar_index import bazaar_index
+from .cards.bonus_ledger import BonusLedger
+from .cards.image_cache import card_image_cache
+from .cards.attachments import attachment_registry
+from .cards.catalog import DriveCatalog
 from .cards.config import *
 from .cards.utils import *
 from .cards.models import *
@@ -31,6 +42,24 @@ from .cards.views import *
 logger = logging.getLogger("cards")
 
 
+def oui_non(argument: str) -> bool:
+    """
+    Convertisseur d'argument booléen acceptant les réponses françaises.
+
+    Args:
+        argument: « oui »/« non » (ou yes/no, true/false, 1/0, on/off)
+
+    Returns:
+        bool: Valeur de l'argument
+    """
+    value = argument.strip().lower()
+    if value in ("oui", "o", "yes", "y", "true", "1", "on"):
+        return True
+    if value in ("non", "n", "no", "false", "0", "off"):
+        return False
+    raise commands.BadArgument(f"« {argument} » n'est pas une réponse valide (oui/non).")
+
+
 class Cards(commands.Cog):
     """Cog principal pour le système de cartes à collectionner."""
     
@@ -40,6 +69,7 @@ class Cards(commands.Cog):
         # Initialiser les variables par défaut
         self.gspread_client = None
         self.drive_service = None
+        self.google_credentials = None
         self.storage = None
 
         # Tenter d'initialiser les credentials Google
@@ -62,6 +92,8 @@ class Cards(commands.Cog):
                 'https://www.googleapis.com/auth/drive'
             ])
 
+            self.google_credentials = creds
+
             # Client Google Sheets
             self.gspread_client = gspread.authorize(creds)
             logger.info("[CARDS] ✅ Client Google Sheets initialisé")
@@ -99,6 +131,9 @@ class Cards(commands.Cog):
         # Pré-charger la liste des fichiers (cartes) dans chaque dossier de rareté
         self.cards_by_category = {}
         self.upgrade_cards_by_category = {}
+        self._board_expiry_task = None
+        # Protège les vérifications d'upgrade en attente (alimentées aussi depuis des threads)
+        self._pending_lock = threading.Lock()
 
         # Initialiser les gestionnaires seulement si le storage est disponible
         if self.storage is not None:
@@ -113,24 +148,33 @@ class Cards(commands.Cog):
                 self.vault_manager = VaultManager(self.storage)
                 self.drawing_manager = DrawingManager(self.storage, self.cards_by_category, self.upgrade_cards_by_category)
                 self.trading_manager = TradingManager(self.storage, self.vault_manager)
-                self.forum_manager = ForumManager(self.bot, self.discovery_manager)
+                self.forum_manager = ForumManager(self.bot, self.discovery_manager, self.google_credentials)
+                self.forum_worker = ForumPostingWorker(self, ForumQueue(self.storage.sheet_forum_queue))
+                self.upgrade_manager = UpgradeManager(self.storage, self.upgrade_cards_by_category)
 
                 # Connecter les méthodes manquantes du trading manager
                 self.trading_manager._user_has_card = self._user_has_card
                 self.trading_manager._add_card_to_user = self.add_card_to_user
                 self.trading_manager._remove_card_from_user = self.remove_card_from_user
 
+                # Les conversions groupées signalent leurs écritures comme les autres modifications d'inventaire
+                self.upgrade_manager.on_inventory_change = self._record_inventory_delta
+
                 # Ajouter une référence au cog dans le storage pour les vérifications d'upgrade
                 self.storage._cog_ref = self
 
                 # Initialiser le système de vérification automatique des upgrades
                 self._users_needing_upgrade_check = set()
+                self._pending_inventory_deltas = {}
 
                 # Initialiser le système de notifications Bazaar
                 self.bazaar_notifier = BazaarNotifier(self)
                 self.trade_expiration_checker = TradeExpirationChecker(self)
                 self.bazaar_notifier.start()
                 self.trade_expiration_checker.start()
+                self.forum_worker.start()
+                # Minuteur des offres du tableau (partagé avec le site dans le même processus)
+                self._board_expiry_task = asyncio.create_task(self.trading_manager.run_board_expiry())
 
                 logger.info("[CARDS] ✅ Tous les gestionnaires initialisés avec succès")
 
@@ -145,9 +189,12 @@ class Cards(commands.Cog):
                 self.drawing_manager = None
                 self.trading_manager = None
                 self.forum_manager = None
+                self.forum_worker = None
+                self.upgrade_manager = None
                 self.bazaar_notifier = None
                 self.trade_expiration_checker = None
                 self._users_needing_upgrade_check = set()
+                self._pending_inventory_deltas = {}
         else:
             logger.warning("[CARDS] ⚠️ Gestionnaires non initialisés (storage indisponible)")
             # Initialiser des gestionnaires par défaut ou None
@@ -156,9 +203,12 @@ class Cards(commands.Cog):
             self.drawing_manager = None
             self.trading_manager = None
             self.forum_manager = None
+            self.forum_worker = None
+            self.upgrade_manager = None
             self.bazaar_notifier = None
             self.trade_expiration_checker = None
             self._users_needing_upgrade_check = set()
+            self._pending_inventory_deltas = {}
 
     async def cog_unload(self):
         """Arrete proprement les taches de fond lors du dechargement du cog."""
@@ -167,6 +217,11 @@ class Cards(commands.Cog):
             self.bazaar_notifier.stop()
         if self.trade_expiration_checker:
             self.trade_expiration_checker.stop()
+        if self.forum_worker:
+            self.forum_worker.stop()
+        if self._board_expiry_task:
+            self._board_expiry_task.cancel()
+            self._board_expiry_task = None
         logger.info("[CARDS] Taches de fond arretees")
 
     def _normalize_category_for_env_var(self, category: str) -> str:
@@ -181,7 +236,7 @@ class Cards(commands.Cog):
         return normalized.upper().replace(' ', '_')
     
     def _load_card_files(self):
-        """Charge les fichiers de cartes depuis Google Drive."""
+        """Charge les fichiers de cartes depuis Google Drive (catalogue incrémental)."""
         if self.drive_service is None:
             logger.warning("[CARDS] ⚠️ Service Google Drive non disponible, impossible de charger les fichiers de cartes")
             return
@@ -189,46 +244,30 @@ class Cards(commands.Cog):
         try:
             logger.info("[CARDS] 🔄 Chargement des fichiers de cartes depuis Google Drive...")
 
-            for category, folder_id in self.FOLDER_IDS.items():
-                if folder_id:
-                    # Cartes normales
-                    results = self.drive_service.files().list(
-                        q=f"'{folder_id}' in parents",
-                        fields="files(id, name, mimeType)"
-                    ).execute()
-
-                    files = [
-                        f for f in results.get('files', [])
-                        if f.get('mimeType', '').startswith('image/')
-                        and f['name'].lower().endswith('.png')
-                    ]
-                    self.cards_by_category[category] = files
-                else:
-                    # Pas de dossier configuré pour cette catégorie
-                    self.cards_by_category[category] = []
-                
-                # Cartes Full (variantes)
-                normalized_category = self._normalize_category_for_env_var(category)
-                full_folder_var = f"FOLDER_{normalized_category}_FULL_ID"
-                full_folder_id = os.getenv(full_folder_var)
-
-                if full_folder_id:
-                    logger.info(f"[CARDS] Chargement des cartes Full pour {category} depuis le dossier {full_folder_id}")
-                    full_results = self.drive_service.files().list(
-                        q=f"'{full_folder_id}' in parents",
-                        fields="files(id, name, mimeType)"
-                    ).execute()
-
-                    full_files = [
-                        f for f in full_results.get('files', [])
-                        if f.get('mimeType', '').startswith('image/')
-                        and f['name'].lower().endswith('.png')
-                    ]
-                    self.upgrade_cards_by_category[category] = full_files
-                    logger.info(f"[CARDS] {len(full_files)} cartes Full chargées pour {category}")
-                else:
+            # Cartes Full (variantes) : un dossier optionnel par catégorie
+            full_folder_ids = {
+                category: os.getenv(f"FOLDER_{self._normalize_category_for_env_var(category)}_FULL_ID")
+                for category in self.FOLDER_IDS
+            }
+            for category, full_folder_id in full_folder_ids.items():
+                if not full_folder_id:
                     logger.info(f"[CARDS] Pas de dossier Full configuré pour {category} - cartes Full désactivées (normal si pas encore implémenté)")
-                    self.upgrade_cards_by_category[category] = []
+
+            catalog = DriveCatalog(self.google_credentials, self.FOLDER_IDS, full_folder_ids)
+            cards_by_category, upgrade_cards_by_category = catalog.load()
+
+            def is_card_png(f):
+                return f['name'].lower().endswith('.png')
+
+            for category in self.FOLDER_IDS:
+                self.cards_by_category[category] = [f for f in cards_by_category.get(category, []) if is_card_png(f)]
+                self.upgrade_cards_by_category[category] = [f for f in upgrade_cards_by_category.get(category, []) if is_card_png(f)]
+                if full_folder_ids[category]:
+                    logger.info(f"[CARDS] {len(self.upgrade_cards_by_category[category])} cartes Full chargées pour {category}")
+
+            # Versions des images pour le cache partagé
+            for files in list(self.cards_by_category.values()) + list(self.upgrade_cards_by_category.values()):
+                card_image_cache.register_files(files)
 
             logger.info("[CARDS] ✅ Chargement des fichiers de cartes terminé")
 
@@ -270,6 +309,39 @@ class Cards(commands.Cog):
                     continue
         return user_cards
     
+    def get_user_card_counts(self, user_id: int, fresh_after: float = 0.0) -> dict[tuple[str, str], int]:
+        """
+        Retourne l'inventaire d'un utilisateur sous la forme {(catégorie, nom): quantité}.
+
+        Args:
+            user_id: ID de l'utilisateur
+            fresh_after: Horodatage (time.time) ; un cache des cartes lu avant est relu
+        """
+        if not self.storage:
+            return {}
+
+        if fresh_after and self.storage.cards_cache_time < fresh_after:
+            self.storage.refresh_cards_cache()
+        cards_cache = self.storage.get_cards_cache()
+        if not cards_cache:
+            return {}
+
+        counts: dict[tuple[str, str], int] = {}
+        user_prefix = f"{user_id}:"
+        for row in cards_cache[1:]:  # Skip header
+            if len(row) < 3:
+                continue
+            for cell in row[2:]:
+                if not cell.strip().startswith(user_prefix):
+                    continue
+                try:
+                    count = int(cell.split(":", 1)[1])
+                    key = (row[0], row[1])
+                    counts[key] = counts.get(key, 0) + count
+                except (ValueError, IndexError) as e:
+                    logger.warning(f"[SECURITY] Données corrompues dans get_user_card_counts: {cell}, erreur: {e}")
+        return counts
+
     def add_card_to_user(self, user_id: int, category: str, name: str,
                         user_name: str = None, source: str = None) -> bool:
         """Ajoute une carte à l'inventaire d'un utilisateur."""
@@ -303,8 +375,8 @@ class Cards(commands.Cog):
                                     self.storage.sheet_cards.update(f"A{i+1}", [cleaned_row])
                                     self.storage.refresh_cards_cache()
 
-                                    # Marquer cet utilisateur pour vérification d'upgrade automatique
-                                    self._mark_user_for_upgrade_check(user_id)
+                                    # Signaler la nouvelle quantité pour la vérification d'upgrade
+                                    self._record_inventory_delta(user_id, category, name, new_count)
 
                                     # Logger l'ajout de carte
                                     if self.storage and self.storage.logging_manager:
@@ -329,8 +401,8 @@ class Cards(commands.Cog):
                         self.storage.sheet_cards.update(f"A{i+1}", [cleaned_row])
                         self.storage.refresh_cards_cache()
 
-                        # Marquer cet utilisateur pour vérification d'upgrade automatique
-                        self._mark_user_for_upgrade_check(user_id)
+                        # Signaler la nouvelle quantité pour la vérification d'upgrade
+                        self._record_inventory_delta(user_id, category, name, 1)
 
                         # Logger l'ajout de carte
                         if self.storage and self.storage.logging_manager:
@@ -350,8 +422,8 @@ class Cards(commands.Cog):
                 self.storage.sheet_cards.append_row(new_row)
                 self.storage.refresh_cards_cache()
 
-                # Marquer cet utilisateur pour vérification d'upgrade automatique
-                self._mark_user_for_upgrade_check(user_id)
+                # Signaler la nouvelle quantité pour la vérification d'upgrade
+                self._record_inventory_delta(user_id, category, name, 1)
 
                 # Logger l'ajout de carte
                 if self.storage and self.storage.logging_manager:
@@ -405,6 +477,7 @@ class Cards(commands.Cog):
                                     cleaned_row += [""] * pad
                                     self.storage.sheet_cards.update(f"A{i+1}", [cleaned_row])
                                     self.storage.refresh_cards_cache()
+                                    self._record_inventory_delta(user_id, category, name, count - 1)
 
                                     # Logger le retrait de carte
                                     if self.storage and self.storage.logging_manager:
@@ -465,6 +538,7 @@ class Cards(commands.Cog):
                     return False
 
                 updates_to_make = []  # Liste des mises à jour à effectuer
+                deltas = []  # Nouvelles quantités à signaler
 
                 for i, row in enumerate(cards_cache):
                     if len(row) < 2:
@@ -490,6 +564,7 @@ class Cards(commands.Cog):
                                     else:
                                         row[j] = ""
 
+                                    deltas.append((card_key, max(new_count, 0)))
                                     row_modified = True
                                     break
                                 except (ValueError, IndexError) as e:
@@ -508,6 +583,8 @@ class Cards(commands.Cog):
 
                 # Rafraîchir le cache une seule fois
                 self.storage.refresh_cards_cache()
+                for (cat, name), new_count in deltas:
+                    self._record_inventory_delta(user_id, cat, name, new_count)
                 logger.info(f"[BATCH] Suppression batch réussie: {len(cards_to_remove)} cartes pour l'utilisateur {user_id}")
                 return True
 
@@ -561,6 +638,7 @@ class Cards(commands.Cog):
 
                 updates_to_make = []  # Liste des mises à jour à effectuer
                 new_rows_to_add = []  # Liste des nouvelles lignes à ajouter
+                deltas = []  # Nouvelles quantités à signaler
 
                 for (cat, name), count_to_add in cards_counter.items():
                     card_found = False
@@ -581,6 +659,7 @@ class Cards(commands.Cog):
                                         new_count = int(current_count) + count_to_add
                                         row[j] = f"{uid}:{new_count}"
                                         user_found = True
+                                        deltas.append(((cat, name), new_count))
                                         break
                                     except (ValueError, IndexError) as e:
                                         logger.error(f"[SECURITY] Données corrompues dans batch_add_cards_to_user: {cell}, erreur: {e}")
@@ -589,6 +668,7 @@ class Cards(commands.Cog):
                             if not user_found:
                                 # Ajouter l'utilisateur à cette ligne
                                 row.append(f"{user_id}:{count_to_add}")
+                                deltas.append(((cat, name), count_to_add))
 
                             cleaned_row = merge_cells(row)
                             pad = max(original_len + (0 if user_found else 1), len(cleaned_row)) - len(cleaned_row)
@@ -599,6 +679,7 @@ class Cards(commands.Cog):
                     if not card_found:
                         # Créer une nouvelle ligne pour cette carte
                         new_rows_to_add.append([cat, name, f"{user_id}:{count_to_add}"])
+                        deltas.append(((cat, name), count_to_add))
 
                 # Effectuer toutes les mises à jour
                 for row_num, cleaned_row in updates_to_make:
@@ -610,6 +691,8 @@ class Cards(commands.Cog):
 
                 # Rafraîchir le cache une seule fois
                 self.storage.refresh_cards_cache()
+                for (cat, name), new_count in deltas:
+                    self._record_inventory_delta(user_id, cat, name, new_count)
                 logger.info(f"[BATCH] Ajout batch réussi: {len(cards_to_add)} cartes pour l'utilisateur {user_id}")
                 return True
 
@@ -617,23 +700,28 @@ class Cards(commands.Cog):
                 logger.error(f"[SECURITY] Erreur lors de l'ajout batch de cartes: {e}")
                 return False
 
-    def build_card_embed(self, cat: str, name: str, file_bytes: bytes, user: discord.User = None,
-                         show_inventory_info: bool = True) -> tuple[discord.Embed, discord.File]:
+    def build_card_embed(self, cat: str, name: str, file_bytes: bytes | None, user: discord.User = None,
+                         show_inventory_info: bool = True,
+                         filename: str = "card.png",
+                         image_url: str | None = None) -> tuple[discord.Embed, discord.File | None]:
         """Construit un embed et le fichier attaché pour une carte.
 
-        Le fichier utilise toujours le nom constant ``card.png`` afin que
-        l'URL ``attachment://card.png`` reste stable et ne dépende pas du nom
-        de la carte fourni par l'utilisateur.
+        Le fichier utilise un nom constant (``card.png`` par défaut) afin que
+        l'URL ``attachment://`` reste stable et ne dépende pas du nom de la
+        carte fourni par l'utilisateur. Si ``image_url`` est fourni (pièce
+        jointe déjà envoyée), aucun fichier n'est créé.
 
         Args:
             cat: Catégorie de la carte
             name: Nom de la carte
-            file_bytes: Données binaires de l'image
+            file_bytes: Données binaires de l'image (ignorées si image_url est fourni)
             user: Utilisateur qui a effectué le tirage (optionnel)
             show_inventory_info: Si True, affiche les informations d'inventaire (défaut: True)
+            filename: Nom du fichier attaché (doit être unique dans un même message)
+            image_url: URL d'une pièce jointe déjà envoyée pour cette image
         """
         import io
-        file = discord.File(io.BytesIO(file_bytes), filename="card.png")
+        file = None if image_url else discord.File(io.BytesIO(file_bytes), filename=filename)
 
         description = f"Catégorie : **{cat}**"
         if user:
@@ -668,92 +756,145 @@ class Cards(commands.Cog):
             description=description,
             color=0x4E5D94,
         )
-        embed.set_image(url="attachment://card.png")
+        embed.set_image(url=image_url or f"attachment://{filename}")
         return embed, file
 
-    async def _handle_announce_and_wall(self, interaction: discord.Interaction, drawn_cards: list[tuple[str, str]]):
-        """Gère les annonces publiques et le mur des cartes."""
-        # Le système forum est maintenant toujours activé
-        await self._handle_forum_posting(interaction, drawn_cards)
+    def get_card_file_id(self, cat: str, name: str) -> str | None:
+        """Retourne l'ID du fichier Drive d'une carte (cartes Full incluses)."""
+        return next(
+            (f["id"] for f in (self.cards_by_category.get(cat, []) + self.upgrade_cards_by_category.get(cat, []))
+             if f["name"].removesuffix(".png") == name),
+            None,
+        )
 
-    async def _handle_forum_posting(self, interaction: discord.Interaction, drawn_cards: list[tuple[str, str]]):
-        """Nouvelle méthode pour poster les cartes dans le système forum."""
-        try:
-            # 1) Charger toutes les cartes déjà découvertes
-            discovered_cards = self.discovery_manager.get_discovered_cards()
+    async def get_card_image(self, file_id: str) -> tuple[str | None, bytes | None]:
+        """
+        Retourne l'image d'une carte sous forme d'URL déjà envoyée ou d'octets.
 
-            # 2) Fusionner les fichiers "normaux" et "Full"
-            all_files = {}
-            for cat, files in self.cards_by_category.items():
-                all_files.setdefault(cat, []).extend(files)
-            for cat, files in self.upgrade_cards_by_category.items():
-                all_files.setdefault(cat, []).extend(files)
+        Si l'image n'a jamais été envoyée et qu'un salon des ressources est
+        configuré, elle y est envoyée une fois et son URL est réutilisée.
 
-            # 3) Identifier les nouvelles cartes (non découvertes)
-            new_draws = [card for card in drawn_cards if card not in discovered_cards]
-            if not new_draws:
-                return
+        Args:
+            file_id: ID du fichier Drive
 
-            # 4) Poster chaque nouvelle carte dans son thread de catégorie
-            for cat, name in new_draws:
-                file_id = next(
-                    (f['id'] for f in all_files.get(cat, [])
-                    if f['name'].removesuffix(".png") == name),
-                    None
-                )
-                if not file_id:
-                    continue
+        Returns:
+            tuple[str | None, bytes | None]: (URL de pièce jointe, octets à envoyer)
+        """
+        image_url = attachment_registry.get(file_id)
+        if image_url:
+            return image_url, None
+
+        file_bytes = await self.download_drive_file(file_id)
+        if file_bytes and CARD_ASSET_CHANNEL_ID:
+            channel = self.bot.get_channel(CARD_ASSET_CHANNEL_ID)
+            if channel:
+                image_url = await attachment_registry.upload(channel, file_id, file_bytes)
+                if image_url:
+                    return image_url, None
+        return None, file_bytes
+
+    async def prefetch_card_images(self, cards: list[tuple[str, str]]) -> list[tuple[str | None, str | None, bytes | None]]:
+        """
+        Récupère en parallèle les images de plusieurs cartes.
 
-                # Enregistrer la découverte et obtenir l'index
-                discovery_index = self.discovery_manager.log_discovery(cat, name, interaction.user.id, interaction.user.display_name)
+        Args:
+            cards: Cartes (catégorie, nom)
 
-                # Télécharger l'image
-                file_bytes = await self.download_drive_file(file_id)
-                if not file_bytes:
-                    logger.error(f"[FORUM] Impossible de télécharger l'image pour {name} ({cat})")
-                    continue
+        Returns:
+            list: (file_id, URL de pièce jointe, octets) dans l'ordre des cartes
+        """
+        async def fetch(cat: str, name: str) -> tuple[str | None, str | None, bytes | None]:
+            file_id = self.get_card_file_id(cat, name)
+            if not file_id:
+                logger.warning(f"[DRAWING] Image non trouvée pour {name} ({cat})")
+                return None, None, None
+            image_url, file_bytes = await self.get_card_image(file_id)
+            return file_id, image_url, file_bytes
+
+        return await asyncio.gather(*(fetch(cat, name) for cat, name in cards))
+
+    def build_card_embeds(self, cards: list[tuple[str, str]],
+                          images: list[tuple[str | None, str | None, bytes | None]],
+                          user: discord.User = None) -> list[tuple[discord.Embed, discord.File | None, str]]:
+        """
+        Construit les embeds d'un tirage (à appeler avant l'ajout à l'inventaire).
+
+        Args:
+            cards: Cartes (catégorie, nom)
+            images: Images correspondantes (voir ``prefetch_card_images``)
+            user: Utilisateur qui a effectué le tirage
+
+        Returns:
+            list: (embed, fichier à envoyer ou None, file_id), avec des noms de fichiers uniques
+        """
+        card_embeds = []
+        for i, ((cat, name), (file_id, image_url, file_bytes)) in enumerate(zip(cards, images)):
+            if not image_url and not file_bytes:
+                continue
+            embed, file = self.build_card_embed(cat, name, file_bytes, user,
+                                                filename=f"card_{i}.png", image_url=image_url)
+            card_embeds.append((embed, file, file_id))
+        return card_embeds
 
-                # Poster dans le forum (la méthode gère la création de thread si nécessaire)
-                success = await self.forum_manager.post_card_to_forum(
-                    cat, name, file_bytes,
-                    interaction.user.display_name, discovery_index
+    async def send_card_embeds(self, channel: discord.abc.Messageable,
+                               card_embeds: list[tuple[discord.Embed, discord.File | None, str]]):
+        """
+        Envoie les embeds de cartes en regroupant jusqu'à 10 cartes par message.
+        Les images envoyées sont enregistrées pour être réutilisées par URL.
+        """
+        for i in range(0, len(card_embeds), MAX_EMBEDS_PER_MESSAGE):
+            chunk = card_embeds[i:i + MAX_EMBEDS_PER_MESSAGE]
+            files = [file for _, file, _ in chunk if file]
+            message = await outbound.send(channel, priority=Priority.INTERACTION,
+                                          embeds=[embed for embed, _, _ in chunk], files=files or None)
+            if files:
+                attachment_registry.learn_from_message(
+                    message, {file.filename: file_id for _, file, file_id in chunk if file}
                 )
 
-                if not success:
-                    logger.error(f"[FORUM] Échec du post de la carte {name} ({cat}) dans le forum")
+    async def _handle_announce_and_wall(self, interaction: discord.Interaction, drawn_cards: list[tuple[str, str]]):
+        """Gère les annonces publiques et le mur des cartes."""
+        # Le système forum est maintenant toujours activé
+        await self._handle_forum_posting(interaction, drawn_cards)
 
-            # 5) Mettre à jour le message de progression dans le canal principal
-            await self._update_progress_message(discovered_cards, new_draws)
+    async def _handle_forum_posting(self, interaction: discord.Interaction, drawn_cards: list[tuple[str, str]]):
+        """
+        Place les nouvelles découvertes dans la file de publication du forum.
+        La publication (enregistrement, image, post, en-têtes) est faite par la
+        tâche de fond : l'interaction n'attend que l'écriture dans la file.
+        """
+        if self.forum_worker is None:
+            return
+        try:
+            discovered_cards = await asyncio.to_thread(self.discovery_manager.get_discovered_cards)
+            new_draws = list(dict.fromkeys(card for card in drawn_cards if card not in discovered_cards))
+            if not new_draws:
+                return
+
+            await self.forum_worker.submit(new_draws, interaction.user.id, interaction.user.display_name)
 
         except Exception as e:
-            logger.error(f"[FORUM] Erreur lors du posting forum: {e}")
+            logger.error(f"[FORUM] Erreur lors de la mise en file des publications forum: {e}")
 
-    async def _update_progress_message(self, discovered_cards: set, new_draws: list):
-        """Met à jour le message de progression des découvertes dans le forum."""
+    async def _update_progress_message(self, new_draws: list):
+        """
+        Met à jour le message de progression des découvertes dans le forum.
+        Les en-têtes des threads concernés sont mis à jour de façon groupée
+        (voir ForumManager.schedule_header_update).
+        """
         try:
-            # Pour le système forum, mettre à jour les headers des threads
-            forum_channel = self.bot.get_channel(CARD_FORUM_CHANNEL_ID)
-            if forum_channel and isinstance(forum_channel, discord.ForumChannel):
-                # Mettre à jour les headers des threads concernés par les nouvelles cartes
-                updated_categories = set()
-                for cat, name in new_draws:
-                    # Déterminer la catégorie du thread
-                    if name.removesuffix('.png').endswith(' (Full)'):
-                        updated_categories.add("Full")
-                    else:
-                        updated_categories.add(cat)
-
-                # Mettre à jour les headers des catégories concernées
-                for category in updated_categories:
-                    try:
-                        await self.forum_manager.update_category_thread_header(forum_channel, category)
-                    except Exception as e:
-                        logger.error(f"[FORUM] Erreur mise à jour header {category}: {e}")
+            # Les cartes Full sont publiées dans le thread de leur catégorie
+            for category in {cat for cat, name in new_draws}:
+                self.forum_manager.schedule_header_update(category)
         except Exception as e:
             logger.error(f"[PROGRESS] Erreur lors de la mise à jour du message de progression: {e}")
 
     async def download_drive_file(self, file_id: str) -> bytes | None:
-        """Télécharge un fichier depuis Google Drive de manière asynchrone."""
+        """Télécharge un fichier depuis Google Drive de manière asynchrone (via le cache d'images)."""
+        return await card_image_cache.get_or_fetch(file_id, lambda: self._fetch_drive_file(file_id))
+
+    async def _fetch_drive_file(self, file_id: str) -> bytes | None:
+        """Télécharge un fichier depuis Google Drive sans passer par le cache."""
         try:
             logger.debug(f"[DRIVE] Téléchargement du fichier {file_id}")
             request = self.drive_service.files().get_media(fileId=file_id)
@@ -774,14 +915,78 @@ class Cards(commands.Cog):
 
     def _mark_user_for_upgrade_check(self, user_id: int):
         """
-        Marque un utilisateur pour vérification d'upgrade automatique.
+        Marque un utilisateur pour une vérification complète de sa collection.
+
+        Les modifications d'inventaire passent par ``_record_inventory_delta`` ;
+        cette méthode reste réservée aux cas où la collection entière doit
+        être réexaminée.
 
         Args:
             user_id: ID de l'utilisateur
         """
-        self._users_needing_upgrade_check.add(user_id)
+        with self._pending_lock:
+            self._users_needing_upgrade_check.add(user_id)
         logger.debug(f"[AUTO_UPGRADE] Utilisateur {user_id} marqué pour vérification d'upgrade")
 
+    def _record_inventory_delta(self, user_id: int, category: str, name: str, new_count: int):
+        """
+        Enregistre la nouvelle quantité d'une carte après une modification d'inventaire
+        (vérification d'upgrade, mémo sacrificiel et index du Bazaar).
+
+        Seule la dernière quantité connue est conservée par (utilisateur, carte).
+        Peut être appelée depuis un thread (écritures déportées via asyncio.to_thread).
+
+        Args:
+            user_id: ID de l'utilisateur
+            category: Catégorie de la carte
+            name: Nom de la carte
+            new_count: Quantité possédée après la modification
+        """
+        with self._pending_lock:
+            self._pending_inventory_deltas.setdefault(user_id, {})[(category, name)] = new_count
+        bazaar_index.set_count(user_id, category, name, new_count)
+        if not is_full_card(name):
+            sacrificial_memo.invalidate(user_id)
+
+    def _get_upgrade_candidates(self, user_id: int, deltas: dict[tuple[str, str], int]) -> dict[tuple[str, str], int]:
+        """
+        Filtre les deltas d'un utilisateur pour ne garder que les cartes à convertir.
+
+        Une carte normale est candidate si sa quantité atteint le seuil et que
+        l'utilisateur ne possède pas déjà sa version Full : une fois le seuil
+        dépassé, chaque ajout reproduirait sinon la même candidate. La quantité
+        de la Full est prise dans les deltas si elle y figure, sinon lue sur la
+        seule ligne de la carte Full. Une carte Full retirée (quantité 0) rend
+        sa carte normale candidate, sa quantité étant alors relue dans
+        l'inventaire par l'appelant.
+
+        Args:
+            user_id: ID de l'utilisateur
+            deltas: {(catégorie, nom): nouvelle quantité}
+
+        Returns:
+            dict: {(catégorie, nom normal): quantité connue ou -1 si à relire}
+        """
+        candidates: dict[tuple[str, str], int] = {}
+        if not self.upgrade_manager:
+            return candidates
+        for (cat, name), new_count in deltas.items():
+            threshold = self.upgrade_manager.upgrade_thresholds.get(cat)
+            if threshold is None:
+                continue
+            if is_full_card(name):
+                if new_count == 0:
+                    candidates.setdefault((cat, name.replace(" (Full)", "")), -1)
+            elif new_count >= threshold:
+                full_count = deltas.get((cat, f"{name} (Full)"))
+                if full_count is None:
+                    owns_full = self.user_has_full_version(user_id, cat, name)
+                else:
+                    owns_full = full_count > 0
+                if not owns_full:
+                    candidates[(cat, name)] = new_count
+        return candidates
+
     async def auto_check_upgrades(self, interaction: discord.Interaction, user_id: int, notification_channel_id: int = None):
         """
         Vérification automatique des conversions vers les cartes Full.
@@ -802,15 +1007,22 @@ class Cards(commands.Cog):
         """
         Traite toutes les vérifications d'upgrade en attente.
 
+        Les utilisateurs marqués explicitement sont vérifiés en entier ; pour
+        les autres, seules les cartes dont la quantité a franchi le seuil
+        sont examinées.
+
         Args:
             interaction: L'interaction Discord
             notification_channel_id: ID du salon où envoyer les notifications (optionnel)
         """
-        if not self._users_needing_upgrade_check:
-            return
+        with self._pending_lock:
+            if not self._users_needing_upgrade_check and not self._pending_inventory_deltas:
+                return
 
-        users_to_check = self._users_needing_upgrade_check.copy()
-        self._users_needing_upgrade_check.clear()
+            users_to_check = self._users_needing_upgrade_check
+            self._users_needing_upgrade_check = set()
+            pending_deltas = self._pending_inventory_deltas
+            self._pending_inventory_deltas = {}
 
         for user_id in users_to_check:
             try:
@@ -818,6 +1030,20 @@ class Cards(commands.Cog):
             except Exception as e:
                 logger.error(f"[AUTO_UPGRADE] Erreur lors de la vérification des upgrades pour l'utilisateur {user_id}: {e}")
 
+        for user_id, deltas in pending_deltas.items():
+            if user_id in users_to_check:
+                continue
+            candidates = self._get_upgrade_candidates(user_id, deltas)
+            if not candidates:
+                continue
+            try:
+                for (cat, name), count in candidates.items():
+                    if count < 0:
+                        count = self.get_user_card_count(user_id, cat, name)
+                    await self._upgrade_card_if_eligible(interaction, user_id, cat, name, count, notification_channel_id)
+            except Exception as e:
+                logger.error(f"[AUTO_UPGRADE] Erreur lors de la vérification des upgrades pour l'utilisateur {user_id}: {e}")
+
     async def check_for_upgrades_with_channel(self, interaction: discord.Interaction, user_id: int, drawn_cards: list[tuple[str, str]], notification_channel_id: int = None):
         """
         Pour chaque carte normale où l'utilisateur a atteint le seuil de
@@ -831,20 +1057,6 @@ class Cards(commands.Cog):
             notification_channel_id: ID du salon où envoyer les notifications (optionnel)
         """
         try:
-            # Seuils de conversion (nombre de cartes normales pour obtenir une Full)
-            # Toutes les catégories peuvent être échangées avec un seuil de 5 cartes
-            upgrade_thresholds = {
-                "Secrète": 5,
-                "Fondateur": 5,
-                "Historique": 5,
-                "Maître": 5,
-                "Black Hole": 5,
-                "Architectes": 5,
-                "Professeurs": 5,
-                "Autre": 5,
-                "Élèves": 5
-            }
-
             # 1) Récupérer tous les doublons de l'utilisateur
             user_cards = self.get_user_cards(user_id)
             # Compter les occurrences par (catégorie, nom)
@@ -854,130 +1066,180 @@ class Cards(commands.Cog):
 
             # 2) Pour chaque carte où count >= seuil, effectuer l'upgrade
             for (cat, name), count in counts.items():
-                if cat not in upgrade_thresholds:
-                    continue
-                seuil = upgrade_thresholds[cat]
-                if count >= seuil:
-                    # VÉRIFICATION CRITIQUE: S'assurer que l'utilisateur ne possède pas déjà la carte Full
-                    if self.user_has_full_version(user_id, cat, name):
-                        logger.info(f"[UPGRADE] Utilisateur {user_id} possède déjà la carte Full de {name} dans {cat}. Upgrade ignoré, cartes normales conservées.")
-                        continue
+                await self._upgrade_card_if_eligible(interaction, user_id, cat, name, count, notification_channel_id)
 
-                    # NOUVELLE LOGIQUE: Vérifier d'abord si la carte Full existe avant de retirer les cartes
-                    full_name = f"{name} (Full)"
-
-                    # Chercher la carte Full correspondante dans toutes les catégories
-                    file_id = None
-
-                    # D'abord chercher dans la catégorie d'origine
-                    available_full_cards = self.upgrade_cards_by_category.get(cat, [])
-                    logger.info(f"[UPGRADE] Recherche de {full_name} dans {cat}. Cartes Full disponibles: {len(available_full_cards)}")
-
-                    if available_full_cards:
-                        for f in available_full_cards:
-                            card_file_name = f['name'].removesuffix(".png")
-                            logger.debug(f"[UPGRADE] Comparaison: '{normalize_name(card_file_name)}' vs '{normalize_name(full_name)}'")
-                            if normalize_name(card_file_name) == normalize_name(full_name):
-                                file_id = f['id']
-                                logger.info(f"[UPGRADE] Carte Full trouvée dans {cat}: {card_file_name} (ID: {file_id})")
-                                break
-
-                    # Si pas trouvée dans la catégorie d'origine, chercher dans toutes les autres catégories
-                    if not file_id:
-                        logger.info(f"[UPGRADE] Carte {full_name} non trouvée dans {cat}, recherche dans toutes les catégories...")
-                        for search_cat, full_cards in self.upgrade_cards_by_category.items():
-                            if search_cat == cat:  # Déjà cherché
-                                continue
-                            for f in full_cards:
-                                card_file_name = f['name'].removesuffix(".png")
-                                if normalize_name(card_file_name) == normalize_name(full_name):
-                                    file_id = f['id']
-                                    logger.info(f"[UPGRADE] Carte Full trouvée dans {search_cat}: {card_file_name} (ID: {file_id})")
-                                    break
-                            if file_id:  # Trouvée, sortir de la boucle externe
-                                break
+        except Exception as e:
+            logger.error(f"[UPGRADE] Erreur lors de la vérification des upgrades: {e}")
 
-                    # Si aucune carte Full n'existe, ne pas effectuer l'upgrade
-                    if not file_id:
-                        logger.info(f"[UPGRADE] Carte Full {full_name} non disponible dans les catégories configurées. Upgrade reporté.")
-                        continue
+    async def _upgrade_card_if_eligible(self, interaction: discord.Interaction, user_id: int, cat: str, name: str,
+                                        count: int, notification_channel_id: int = None):
+        """
+        Échange les doublons d'une carte contre sa version Full si le seuil est atteint.
 
-                    # Maintenant que nous savons que la carte Full existe, retirer les cartes normales
-                    removed = 0
-                    for _ in range(seuil):
-                        if self.remove_card_from_user(user_id, cat, name):
-                            removed += 1
-                        else:
-                            logger.error(
-                                f"[UPGRADE] Échec suppression {name} pour {user_id}. Rollback"
-                            )
-                            for _ in range(removed):
-                                self.add_card_to_user(user_id, cat, name)
-                            break
-                    else:
-                        # Toutes les cartes ont été retirées avec succès, procéder à l'ajout de la carte Full
-                        file_bytes = await self.download_drive_file(file_id)
-                        if not file_bytes:
-                            logger.error(f"[UPGRADE] Impossible de télécharger l'image pour {full_name}")
-                            # Rollback: remettre les cartes retirées
-                            for _ in range(removed):
-                                self.add_card_to_user(user_id, cat, name)
-                            continue
+        Args:
+            interaction: L'interaction Discord
+            user_id: ID de l'utilisateur
+            cat: Catégorie de la carte normale
+            name: Nom de la carte normale
+            count: Nombre d'exemplaires possédés
+            notification_channel_id: ID du salon où envoyer les notifications (optionnel)
+        """
+        # Seuils de conversion (nombre de cartes normales pour obtenir une Full)
+        upgrade_thresholds = self.upgrade_manager.upgrade_thresholds if self.upgrade_manager else {}
+        if cat not in upgrade_thresholds or is_full_card(name):
+            return
+        seuil = upgrade_thresholds[cat]
+        if count < seuil:
+            return
 
-                        # Désactiver les infos d'inventaire pour les notifications d'upgrade
-                        embed, image_file = self.build_card_embed(cat, full_name, file_bytes, show_inventory_info=False)
-                        embed.title = f"🎉 Carte Full obtenue : {full_name}"
-                        embed.description = (
-                            f"<@{user_id}> a échangé **{seuil}× {name}** "
-                            f"contre **{full_name}** !"
-                        )
-                        embed.color = discord.Color.gold()
-
-                        # Envoyer la notification dans le salon spécifié ou via followup
-                        if notification_channel_id:
-                            try:
-                                channel = self.bot.get_channel(notification_channel_id)
-                                if channel:
-                                    await channel.send(embed=embed, file=image_file)
-                                    logger.info(f"[UPGRADE] Notification envoyée dans le salon {notification_channel_id} pour {full_name}")
-                                else:
-                                    logger.error(f"[UPGRADE] Salon {notification_channel_id} introuvable")
-                                    # Fallback vers followup si le salon n'existe pas
-                                    embed.description = (
-                                        f"Vous avez échangé **{seuil}× {name}** "
-                                        f"contre **{full_name}** !"
-                                    )
-                                    await interaction.followup.send(embed=embed, file=image_file)
-                            except Exception as e:
-                                logger.error(f"[UPGRADE] Erreur envoi notification salon {notification_channel_id}: {e}")
-                                # Fallback vers followup en cas d'erreur
-                                embed.description = (
-                                    f"Vous avez échangé **{seuil}× {name}** "
-                                    f"contre **{full_name}** !"
-                                )
-                                await interaction.followup.send(embed=embed, file=image_file)
-                        else:
-                            embed.description = (
-                                f"Vous avez échangé **{seuil}× {name}** "
-                                f"contre **{full_name}** !"
-                            )
-                            await interaction.followup.send(embed=embed, file=image_file)
+        # VÉRIFICATION CRITIQUE: S'assurer que l'utilisateur ne possède pas déjà la carte Full
+        if self.user_has_full_version(user_id, cat, name):
+            logger.info(f"[UPGRADE] Utilisateur {user_id} possède déjà la carte Full de {name} dans {cat}. Upgrade ignoré, cartes normales conservées.")
+            return
 
-                        # Ajouter la carte Full à l'inventaire
-                        if not self.add_card_to_user(user_id, cat, full_name):
-                            logger.error(
-                                f"[UPGRADE] Échec ajout {full_name} pour {user_id}. Rollback"
-                            )
-                            for _ in range(seuil):
-                                self.add_card_to_user(user_id, cat, name)
-                        else:
-                            # Mettre à jour le mur des cartes avec la nouvelle carte Full
-                            await self._handle_announce_and_wall(interaction, [(cat, full_name)])
-                            logger.info(f"[UPGRADE] Upgrade réussi: {seuil}× {name} -> {full_name} pour utilisateur {user_id}")
+        # Vérifier d'abord si la carte Full existe avant de retirer les cartes
+        full_name = f"{name} (Full)"
+        file_id = self.upgrade_manager.find_full_card(cat, name)
+
+        # Si aucune carte Full n'existe, ne pas effectuer l'upgrade
+        if not file_id:
+            logger.info(f"[UPGRADE] Carte Full {full_name} non disponible dans les catégories configurées. Upgrade reporté.")
+            return
+
+        # Maintenant que nous savons que la carte Full existe, retirer les cartes normales
+        removed = 0
+        for _ in range(seuil):
+            if self.remove_card_from_user(user_id, cat, name):
+                removed += 1
+            else:
+                logger.error(
+                    f"[UPGRADE] Échec suppression {name} pour {user_id}. Rollback"
+                )
+                for _ in range(removed):
+                    self.add_card_to_user(user_id, cat, name)
+                return
+
+        # Toutes les cartes ont été retirées avec succès, procéder à l'ajout de la carte Full
+        image_url, file_bytes = await self.get_card_image(file_id)
+        if not image_url and not file_bytes:
+            logger.error(f"[UPGRADE] Impossible de télécharger l'image pour {full_name}")
+            # Rollback: remettre les cartes retirées
+            for _ in range(removed):
+                self.add_card_to_user(user_id, cat, name)
+            return
+
+        # Désactiver les infos d'inventaire pour les notifications d'upgrade
+        embed, image_file = self.build_card_embed(cat, full_name, file_bytes, show_inventory_info=False,
+                                                  image_url=image_url)
+        embed.title = f"🎉 Carte Full obtenue : {full_name}"
+        embed.description = (
+            f"<@{user_id}> a échangé **{seuil}× {name}** "
+            f"contre **{full_name}** !"
+        )
+        embed.color = discord.Color.gold()
+
+        # Envoyer la notification dans le salon spécifié ou via followup
+        if notification_channel_id:
+            try:
+                channel = self.bot.get_channel(notification_channel_id)
+                if channel:
+                    message = await channel.send(embed=embed, file=image_file)
+                    if image_file:
+                        attachment_registry.learn_from_message(message, {image_file.filename: file_id})
+                    logger.info(f"[UPGRADE] Notification envoyée dans le salon {notification_channel_id} pour {full_name}")
+                else:
+                    logger.error(f"[UPGRADE] Salon {notification_channel_id} introuvable")
+                    # Fallback vers followup si le salon n'existe pas
+                    embed.description = (
+                        f"Vous avez échangé **{seuil}× {name}** "
+                        f"contre **{full_name}** !"
+                    )
+                    await interaction.followup.send(embed=embed, file=image_file)
+            except Exception as e:
+                logger.error(f"[UPGRADE] Erreur envoi notification salon {notification_channel_id}: {e}")
+                # Fallback vers followup en cas d'erreur
+                embed.description = (
+                    f"Vous avez échangé **{seuil}× {name}** "
+                    f"contre **{full_name}** !"
+                )
+                await interaction.followup.send(embed=embed, file=image_file)
+        else:
+            embed.description = (
+                f"Vous avez échangé **{seuil}× {name}** "
+                f"contre **{full_name}** !"
+            )
+            await interaction.followup.send(embed=embed, file=image_file)
+
+        # Ajouter la carte Full à l'inventaire
+        if not self.add_card_to_user(user_id, cat, full_name):
+            logger.error(
+                f"[UPGRADE] Échec ajout {full_name} pour {user_id}. Rollback"
+            )
+            for _ in range(seuil):
+                self.add_card_to_user(user_id, cat, name)
+        else:
+            # Mettre à jour le mur des cartes avec la nouvelle carte Full
+            await self._handle_announce_and_wall(interaction, [(cat, full_name)])
+            logger.info(f"[UPGRADE] Upgrade réussi: {seuil}× {name} -> {full_name} pour utilisateur {user_id}")
+
+    async def _post_upgrade_notifications(self, channel: discord.abc.Messageable, plans: list[UpgradePlan]):
+        """
+        Publie les notifications d'un lot de conversions Full.
+
+        Chaque image Full n'est téléchargée et envoyée qu'une fois (elle est
+        ensuite réutilisée par URL), et les notifications passent par
+        l'ordonnanceur partagé en priorité basse pour ne pas saturer l'API Discord.
+
+        Args:
+            channel: Salon où publier les notifications
+            plans: Conversions appliquées
+        """
+        images: dict[str, tuple[str | None, bytes | None]] = {}
+        for plan in plans:
+            try:
+                if plan.file_id not in images:
+                    images[plan.file_id] = await self.get_card_image(plan.file_id)
+                image_url, file_bytes = images[plan.file_id]
+                # Une image déjà envoyée dans ce lot est réutilisée par URL
+                image_url = attachment_registry.get(plan.file_id) or image_url
+
+                if image_url or file_bytes:
+                    embed, image_file = self.build_card_embed(plan.category, plan.full_name, file_bytes,
+                                                              show_inventory_info=False, image_url=image_url)
+                else:
+                    embed, image_file = discord.Embed(), None
+                embed.title = f"🎉 Carte Full obtenue : {plan.full_name}"
+                embed.description = (
+                    f"<@{plan.user_id}> a échangé **{plan.threshold}× {plan.name}** "
+                    f"contre **{plan.full_name}** !"
+                )
+                embed.color = discord.Color.gold()
+
+                if image_file:
+                    message = await outbound.send(channel, priority=Priority.BULK, embed=embed, file=image_file)
+                    attachment_registry.learn_from_message(message, {image_file.filename: plan.file_id})
+                else:
+                    await outbound.send(channel, priority=Priority.BULK, embed=embed)
+            except Exception as e:
+                logger.error(f"[UPGRADE] Erreur envoi notification pour {plan}: {e}")
+
+        # Mettre à jour le mur avec les nouvelles cartes Full, au nom de chaque joueur
+        class UpgradeInteraction:
+            def __init__(self, user):
+                self.user = user
+
+        cards_by_user: dict[int, list[tuple[str, str]]] = {}
+        for plan in plans:
+            cards_by_user.setdefault(plan.user_id, []).append((plan.category, plan.full_name))
+
+        guild = getattr(channel, "guild", None)
+        for user_id, full_cards in cards_by_user.items():
+            user = (guild.get_member(user_id) if guild else None) or self.bot.get_user(user_id)
+            if user is None:
+                logger.warning(f"[UPGRADE] Utilisateur {user_id} introuvable, mur non mis à jour pour {full_cards}")
+                continue
+            await self._handle_announce_and_wall(UpgradeInteraction(user), full_cards)
 
-        except Exception as e:
-            logger.error(f"[UPGRADE] Erreur lors de la vérification des upgrades: {e}")
-    
     def _user_has_card(self, user_id: int, category: str, name: str) -> bool:
         """Vérifie si un utilisateur possède une carte spécifique."""
         user_cards = self.get_user_cards(user_id)
@@ -1003,9 +1265,14 @@ class Cards(commands.Cog):
     def user_has_full_version(self, user_id: int, category: str, name: str) -> bool:
         """Vérifie si l'utilisateur possède la version Full d'une carte."""
         try:
-            # Construire le nom de la carte Full
-            full_name = f"{name} (Full)"
-            return self._user_has_card(user_id, category, full_name)
+            # Seule la ligne de la carte Full est lue (index du cache)
+            row = self.storage.get_card_row(category, f"{name} (Full)") if self.storage else None
+            user_prefix = f"{user_id}:"
+            for cell in (row or [])[2:]:
+                cell = cell.strip()
+                if cell.startswith(user_prefix) and int(cell.split(":", 1)[1]) > 0:
+                    return True
+            return False
         except Exception as e:
             logger.error(f"[EMBED] Erreur dans user_has_full_version: {e}")
             return False
@@ -1756,9 +2023,15 @@ class Cards(commands.Cog):
 
 # Commande /decouvertes_recentes supprimée selon demande utilisateur
 
+    @property
+    def bonus_ledger(self) -> BonusLedger:
+        """Registre partagé des tirages bonus."""
+        return BonusLedger.for_sheet(self.storage.sheet_bonus)
+
     def get_user_unclaimed_bonus_count(self, user_id: int) -> int:
         """
         Vérifie et retourne le nombre total de tirages bonus non réclamés pour un utilisateur.
+        La lecture se fait en mémoire via le registre des bonus.
 
         Args:
             user_id: ID de l'utilisateur
@@ -1766,23 +2039,8 @@ class Cards(commands.Cog):
         Returns:
             int: Nombre total de tirages bonus disponibles
         """
-        user_id_str = str(user_id)
-
         try:
-            # Lecture des bonus
-            all_rows = self.storage.sheet_bonus.get_all_values()[1:]  # skip header
-
-            user_bonus = 0
-
-            for row in all_rows:
-                if len(row) >= 3 and row[0] == user_id_str:
-                    try:
-                        count = int(row[1])
-                        user_bonus += count
-                    except ValueError:
-                        continue
-
-            return user_bonus
+            return self.bonus_ledger.balance(user_id)
 
         except Exception as e:
             logger.error(f"[BONUS] Erreur lors de la vérification des bonus: {e}")
@@ -1791,7 +2049,7 @@ class Cards(commands.Cog):
     async def consume_single_bonus(self, user_id: int, user_name: str) -> bool:
         """
         Consomme un seul bonus pour un utilisateur.
-        Décrémente le premier bonus trouvé ou le supprime s'il n'en reste qu'un.
+        Décrémente la première attribution non épuisée (une seule cellule écrite).
 
         Args:
             user_id: ID de l'utilisateur
@@ -1800,57 +2058,23 @@ class Cards(commands.Cog):
         Returns:
             bool: True si un bonus a été consommé avec succès
         """
-        user_id_str = str(user_id)
-
         try:
-            # Lecture des bonus
-            all_data = self.storage.sheet_bonus.get_all_values()
-            if not all_data:
-                return False
-
-            header = all_data[0] if all_data else ["user_id", "count", "source"]
-            updated_data = [header]
-            bonus_consumed = False
-
-            for row in all_data[1:]:  # Skip header
-                if len(row) >= 3 and row[0] == user_id_str and not bonus_consumed:
-                    try:
-                        count = int(row[1])
-                        source = row[2] if len(row) > 2 else "Non spécifié"
-
-                        if count > 1:
-                            # Décrémenter le bonus
-                            updated_row = [row[0], str(count - 1), source]
-                            updated_data.append(updated_row)
-                        # Si count == 1, on ne rajoute pas la ligne (suppression)
-
-                        bonus_consumed = True
-
-                        # Logger la consommation du bonus (sans les cartes, elles sont loggées dans perform_bonus_draw)
-                        if self.storage and self.storage.logging_manager:
-                            self.storage.logging_manager._log_action(
-                                action=self.storage.logging_manager.ACTION_BONUS_USED,
-                                user_id=user_id,
-                                user_name=user_name,
-                                quantity=1,
-                                details="Utilisation d'un bonus individuel",
-                                source="tirage_bonus_individuel"
-                            )
-
-                    except ValueError:
-                        # Ligne invalide, la conserver
-                        updated_data.append(row)
-                else:
-                    # Conserver les autres lignes
-                    updated_data.append(row)
-
-            if not bonus_consumed:
+            # Écriture Sheets sous un verrou partagé avec les threads du site : hors de la boucle
+            entry = await asyncio.to_thread(self.bonus_ledger.consume, user_id)
+            if entry is None:
                 return False
 
-            # Réécrire la feuille avec les données mises à jour
-            self.storage.sheet_bonus.clear()
-            if updated_data:
-                self.storage.sheet_bonus.update('A1', updated_data)
+            # Logger la consommation du bonus (sans les cartes, elles sont loggées dans perform_bonus_draw)
+            if self.storage and self.storage.logging_manager:
+                await asyncio.to_thread(
+                    self.storage.logging_manager._log_action,
+                    action=self.storage.logging_manager.ACTION_BONUS_USED,
+                    user_id=user_id,
+                    user_name=user_name,
+                    quantity=1,
+                    details="Utilisation d'un bonus individuel",
+                    source="tirage_bonus_individuel"
+                )
 
             logger.info(f"[BONUS] Un bonus consommé pour l'utilisateur {user_name} ({user_id})")
             return True
@@ -1879,16 +2103,25 @@ class Cards(commands.Cog):
             await ctx.send(f"❌ Erreur lors de l'initialisation: {e}")
             logger.error(f"[FORUM_INIT] Erreur: {e}")
 
-    @commands.command(name="reconstruire_mur", help="Reconstruit complètement le mur de cartes du forum")
+    @commands.command(
+        name="reconstruire_mur",
+        help="Reconstruit complètement le mur de cartes du forum",
+        usage="[catégorie] [reprendre: oui|non]",
+    )
     @commands.has_permissions(administrator=True)
-    async def reconstruire_mur(self, ctx: commands.Context, category: str = None):
+    async def reconstruire_mur(self, ctx: commands.Context, category: str = None, reprendre: oui_non = False):
         """
         Commande pour reconstruire le mur de cartes du forum.
 
+        Exemple : !reconstruire_mur "Élèves" oui
+
         Args:
-            category: Catégorie spécifique à reconstruire (optionnel)
+            category: Catégorie spécifique à reconstruire (optionnel, entre guillemets si elle contient un espace)
+            reprendre: « oui » pour reprendre une reconstruction interrompue de la catégorie sans vider le thread
         """
-        if category:
+        if category and reprendre:
+            await ctx.send(f"🔧 Reprise de la reconstruction du thread **{category}**...")
+        elif category:
             await ctx.send(f"🔧 Reconstruction du thread **{category}** en cours...")
         else:
             await ctx.send("🔧 Reconstruction complète du mur de cartes en cours...")
@@ -1908,7 +2141,8 @@ class Cards(commands.Cog):
                     return
 
                 posted_count, error_count = await self.forum_manager.clear_and_rebuild_category_thread(
-                    category, all_files, self.drive_service, self.cards_by_category, self.upgrade_cards_by_category
+                    category, all_files, self.drive_service, self.cards_by_category, self.upgrade_cards_by_category,
+                    resume=reprendre
                 )
 
                 if posted_count > 0:
@@ -2037,7 +2271,9 @@ class Cards(commands.Cog):
         """
         try:
             # Ajouter le bonus à la feuille
-            self.storage.sheet_bonus.append_row([str(member.id), str(count), source])
+            if not self.bonus_ledger.grant(member.id, count, source):
+                await ctx.send("❌ Erreur lors de l'attribution du bonus.")
+                return
 
             # Logger l'attribution du bonus
             if self.storage and self.storage.logging_manager:
@@ -2215,87 +2451,46 @@ class Cards(commands.Cog):
         await ctx.send("🔄 Vérification et traitement des conversions Full automatiques en cours...")
 
         try:
-            # Récupérer tous les utilisateurs qui possèdent des cartes
-            unique_counts = self.get_unique_card_counts()
-            all_users = list(unique_counts.keys())
+            if not self.upgrade_manager:
+                await ctx.send("❌ Gestionnaire d'upgrades indisponible.")
+                return
+
+            # Une seule passe sur l'inventaire pour tous les utilisateurs
+            cards_cache = self.storage.get_cards_cache()
+            inventory, _ = self.upgrade_manager.build_inventory_index(cards_cache or [])
+            all_users = list(inventory.keys())
 
             if not all_users:
                 await ctx.send("❌ Aucun utilisateur avec des cartes trouvé.")
                 return
 
             total_users = len(all_users)
-            processed_users = 0
-            total_conversions = 0
             conversion_details = []
             errors = []
 
-            # Créer une interaction factice pour les conversions
-            # Utiliser le contexte comme base pour l'interaction
-            class FakeInteraction:
-                def __init__(self, ctx):
-                    self.channel = ctx.channel
-                    self.guild = ctx.guild
-                    self.user = ctx.author
-                    self.channel_id = ctx.channel.id
-
-            fake_interaction = FakeInteraction(ctx)
-
-            # Traiter chaque utilisateur
-            for user_id in all_users:
-                try:
-                    # Marquer l'utilisateur pour vérification d'upgrade
-                    self._mark_user_for_upgrade_check(user_id)
-                    processed_users += 1
-
-                    # Afficher le progrès tous les 10 utilisateurs
-                    if processed_users % 10 == 0:
-                        await ctx.send(f"📊 Progression: {processed_users}/{total_users} utilisateurs traités...")
-
-                except Exception as e:
-                    error_msg = f"Erreur pour l'utilisateur {user_id}: {e}"
-                    errors.append(error_msg)
-                    logger.error(f"[ADMIN_FULL_CHECK] {error_msg}")
-
-            # Traiter toutes les vérifications d'upgrade en attente
-            if self._users_needing_upgrade_check:
-                await ctx.send(f"🔄 Traitement des conversions pour {len(self._users_needing_upgrade_check)} utilisateurs...")
+            plans = self.upgrade_manager.plan_upgrades(cards_cache=cards_cache)
+            applied = []
+            if plans:
+                await ctx.send(f"🔄 Application de {len(plans)} conversions en une seule écriture...")
+                user_names = {}
+                for plan in plans:
+                    member = ctx.guild.get_member(plan.user_id) if ctx.guild else None
+                    user = member or self.bot.get_user(plan.user_id)
+                    if user:
+                        user_names[plan.user_id] = user.display_name
+                applied = await asyncio.to_thread(
+                    self.upgrade_manager.apply_upgrades, plans, "verifier_full_automatique", user_names
+                )
+                if len(applied) < len(plans):
+                    errors.append(f"{len(plans) - len(applied)} conversions n'ont pas pu être appliquées")
 
-                # Compter les conversions avant traitement
-                users_to_check = self._users_needing_upgrade_check.copy()
+            total_conversions = len(applied)
+            for plan in applied:
+                conversion_details.append(f"👤 <@{plan.user_id}>: {plan.name} ({plan.category}) → {plan.full_name}")
 
-                for user_id in users_to_check:
-                    try:
-                        # Vérifier les conversions possibles avant traitement
-                        user_cards = self.get_user_cards(user_id)
-                        counts = {}
-                        for cat, name in user_cards:
-                            counts[(cat, name)] = counts.get((cat, name), 0) + 1
-
-                        # Seuils de conversion
-                        upgrade_thresholds = {
-                            "Secrète": 5, "Fondateur": 5, "Historique": 5, "Maître": 5,
-                            "Black Hole": 5, "Architectes": 5, "Professeurs": 5, "Autre": 5, "Élèves": 5
-                        }
-
-                        user_conversions = 0
-                        for (cat, name), count in counts.items():
-                            if cat in upgrade_thresholds and count >= upgrade_thresholds[cat]:
-                                # Vérifier que l'utilisateur n'a pas déjà la carte Full
-                                if not self.user_has_full_version(user_id, cat, name):
-                                    # Vérifier que la carte Full existe
-                                    if self.can_have_full_version(cat, name):
-                                        user_conversions += 1
-                                        conversion_details.append(f"👤 <@{user_id}>: {name} ({cat}) → {name} (Full)")
-
-                        total_conversions += user_conversions
-
-                    except Exception as e:
-                        error_msg = f"Erreur lors du comptage pour l'utilisateur {user_id}: {e}"
-                        errors.append(error_msg)
-                        logger.error(f"[ADMIN_FULL_CHECK] {error_msg}")
-
-                # Effectuer les conversions
-                await self.process_all_pending_upgrade_checks(fake_interaction, ctx.channel.id)
+            # Les notifications sont publiées après l'écriture, à cadence limitée
+            if applied:
+                await self._post_upgrade_notifications(ctx.channel, applied)
 
             # Créer le rapport final
             embed = discord.Embed(
@@ -2305,7 +2500,7 @@ class Cards(commands.Cog):
 
             embed.add_field(
                 name="📈 Statistiques",
-                value=f"👥 Utilisateurs traités: {processed_users}/{total_users}\n"
+                value=f"👥 Utilisateurs vérifiés: {total_users}\n"
                       f"🔄 Conversions effectuées: {total_conversions}\n"
                       f"❌ Erreurs: {len(errors)}",
                 inline=False
@@ -5,6 +5,8 @@ import asyncio
 from typing import Dict, List, Optional
 import logging
 
+from utils.discord_scheduler import outbound, Priority
+
 logger = logging.getLogger(__name__)
 
 class InactiveUserTracker(commands.Cog):
@@ -298,7 +300,7 @@ class InactiveUserTracker(commands.Cog):
             color=color,
             timestamp=datetime.datetime.now()
         )
-        await message.edit(embed=embed)
+        await outbound.edit(message, priority=Priority.STATUS, embed=embed)
 
     async def _update_status_periodically(self, message):
         """Met à jour périodiquement le message de statut pour montrer que le bot est toujours actif."""
@@ -312,7 +314,8 @@ class InactiveUserTracker(commands.Cog):
                 else:
                     new_desc = embed.description.rstrip(".") + "." * dots
                     embed.description = new_desc
-                    await message.edit(embed=embed)
+                    # Éditions fusionnées si la précédente n'est pas encore partie
+                    await outbound.edit(message, priority=Priority.STATUS, embed=embed)
                 await asyncio.sleep(2)
         except asyncio.CancelledError:
             pass
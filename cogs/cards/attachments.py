@@ -0,0 +1,106 @@
+"""
+Registre des pièces jointes Discord déjà envoyées pour les images de cartes.
+Permet de référencer une image par son URL (``set_image(url=...)``) au lieu
+de renvoyer les octets à chaque affichage.
+"""
+
+import io
+import time
+import threading
+import logging
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import discord
+
+# Durée de validité supposée d'une URL sans paramètre d'expiration (en secondes)
+DEFAULT_URL_TTL = 12 * 3600
+# Marge avant expiration à partir de laquelle une URL n'est plus réutilisée
+EXPIRY_MARGIN = 3600
+
+
+class AttachmentRegistry:
+    """Registre file_id Drive -> URL de pièce jointe Discord (avec expiration)."""
+
+    def __init__(self):
+        self._urls: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _expires_at(url: str) -> float:
+        """Retourne l'expiration d'une URL du CDN Discord (paramètre ``ex`` en hexadécimal)."""
+        try:
+            ex = parse_qs(urlparse(url).query).get("ex")
+            if ex:
+                return float(int(ex[0], 16))
+        except ValueError:
+            pass
+        return time.time() + DEFAULT_URL_TTL
+
+    def get(self, file_id: str) -> Optional[str]:
+        """
+        Retourne l'URL d'une image déjà envoyée si elle est encore valide.
+
+        Args:
+            file_id: ID du fichier Drive
+
+        Returns:
+            Optional[str]: URL de la pièce jointe, None si inconnue ou bientôt expirée
+        """
+        with self._lock:
+            entry = self._urls.get(file_id)
+            if entry and entry[1] - EXPIRY_MARGIN > time.time():
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._urls[file_id]
+            self.misses += 1
+            return None
+
+    def remember(self, file_id: str, url: str):
+        """Enregistre l'URL d'une pièce jointe pour une image."""
+        with self._lock:
+            self._urls[file_id] = (url, self._expires_at(url))
+
+    def learn_from_message(self, message: discord.Message, file_ids_by_filename: Dict[str, str]):
+        """
+        Enregistre les URLs des pièces jointes d'un message envoyé.
+
+        Args:
+            message: Message envoyé
+            file_ids_by_filename: {nom du fichier attaché: file_id Drive}
+        """
+        if message is None:
+            return
+        for attachment in message.attachments:
+            file_id = file_ids_by_filename.get(attachment.filename)
+            if file_id:
+                self.remember(file_id, attachment.url)
+
+    async def upload(self, channel: discord.abc.Messageable, file_id: str, file_bytes: bytes) -> Optional[str]:
+        """
+        Envoie une image dans le salon des ressources et enregistre son URL.
+
+        Args:
+            channel: Salon privé servant à héberger les images
+            file_id: ID du fichier Drive
+            file_bytes: Contenu de l'image
+
+        Returns:
+            Optional[str]: URL de la pièce jointe, None en cas d'erreur
+        """
+        try:
+            filename = f"{file_id}.png"
+            message = await channel.send(file=discord.File(io.BytesIO(file_bytes), filename=filename))
+            self.learn_from_message(message, {filename: file_id})
+            return self.get(file_id)
+        except Exception as e:
+            logging.error(f"[CACHE] Erreur lors de l'envoi de l'image {file_id} dans le salon des ressources: {e}")
+            return None
+
+
+# Instance partagée par le cog et le forum
+attachment_registry = AttachmentRegistry()
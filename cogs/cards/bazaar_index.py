@@ -0,0 +1,409 @@
+"""
+Index des cartes disponibles à l'échange pour le Bazaar.
+L'inventaire est lu une fois, puis l'index est tenu à jour par les
+modifications d'inventaire et les découvertes du bot comme du site.
+Une instance unique est partagée par le bot et le site (même processus) ;
+la reconstruction périodique ne rattrape que les modifications faites
+directement dans la feuille.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import logging
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Âge maximal de l'index avant une reconstruction en arrière-plan (secondes)
+BAZAAR_INDEX_MAX_AGE = 120
+
+CardKey = Tuple[str, str]
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class BazaarIndex:
+    """
+    Index inversé de la disponibilité des cartes.
+
+    Pour chaque mode (doublons seulement ou toutes les cartes), l'index tient :
+    - les cartes listées par catégorie, triées par nom ;
+    - pour chaque joueur, les cartes dont il est le seul détenteur disponible
+      (elles sont masquées quand c'est lui qui cherche) ;
+    et, pour tous les modes, un index de trigrammes pour la recherche textuelle.
+    Une page sans recherche textuelle se calcule donc sans parcourir le catalogue.
+    """
+
+    def __init__(self, max_age: float = BAZAAR_INDEX_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._built_at = 0.0
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Modifications reçues pendant une reconstruction, rejouées avant la bascule
+        self._journal: Optional[List[tuple]] = None
+        self._reset()
+
+    def _reset(self):
+        self._holders: Dict[CardKey, Dict[str, int]] = {}
+        self._by_user: Dict[str, Dict[CardKey, int]] = {}
+        self._discovered: Set[CardKey] = set()
+        self._file_ids: Dict[CardKey, str] = {}
+        self._category_order: List[str] = []
+        self._trigram_index: Dict[str, Set[CardKey]] = {}
+        # Par mode (True = toutes les cartes, False = doublons seulement)
+        self._buckets: Dict[bool, Dict[str, List[str]]] = {True: {}, False: {}}
+        self._listed: Dict[bool, Set[CardKey]] = {True: set(), False: set()}
+        self._sole_owner: Dict[bool, Dict[CardKey, str]] = {True: {}, False: {}}
+        self._sole_by_user: Dict[bool, Dict[str, Set[CardKey]]] = {True: {}, False: {}}
+
+    @property
+    def built(self) -> bool:
+        return self._built_at > 0
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def rebuild(self, storage, cards_by_category: Dict[str, List[dict]],
+                category_order: Iterable[str] = ()):
+        """
+        Reconstruit l'index depuis la feuille d'inventaire et la feuille des découvertes.
+
+        Args:
+            storage: CardsStorageService
+            cards_by_category: Fichiers des cartes par catégorie (pour les file_id)
+            category_order: Ordre d'affichage des catégories
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._journal = []
+        try:
+            # Toute écriture antérieure au journal est dans la feuille relue ici
+            storage.refresh_cards_cache()
+            rows = storage.get_cards_cache() or []
+            discoveries = storage.get_discovered_cards()
+
+            fresh = BazaarIndex(self.max_age)
+            fresh._discovered = {
+                (category.strip(), name.strip())
+                for category, name in discoveries if category and name
+            }
+            for category, cards in cards_by_category.items():
+                for card in cards:
+                    # Les fichiers Drive portent l'extension, l'inventaire non
+                    file_id = card.get("file_id") or card.get("id")
+                    fresh._file_ids[(category, card["name"])] = file_id
+                    fresh._file_ids.setdefault((category, os.path.splitext(card["name"])[0]), file_id)
+            fresh._category_order = list(dict.fromkeys(list(category_order) + list(cards_by_category)))
+
+            for row in rows[1:]:  # Skip header
+                if len(row) < 3:
+                    continue
+                category = row[0].strip() if row[0] else ""
+                name = row[1].strip() if row[1] else ""
+                if not category or not name:
+                    continue
+
+                holders = {}
+                for cell in row[2:]:
+                    if not cell:
+                        continue
+                    try:
+                        uid, count = cell.split(":", 1)
+                        count = int(count)
+                    except (ValueError, IndexError):
+                        continue
+                    if count > 0:
+                        holders[uid.strip()] = count
+                if holders:
+                    fresh._set_holders((category, name), holders)
+
+            with self._lock:
+                # Une découverte est définitive : la feuille relue peut venir d'un cache plus ancien
+                for key in self._discovered - fresh._discovered:
+                    fresh._apply(("discovered", key))
+                # Rejouer les modifications arrivées après le début de la lecture
+                for entry in self._journal:
+                    fresh._apply(entry)
+                replayed = len(self._journal)
+                for attr in ("_holders", "_by_user", "_discovered", "_file_ids", "_category_order",
+                             "_trigram_index", "_buckets", "_listed", "_sole_owner", "_sole_by_user"):
+                    setattr(self, attr, getattr(fresh, attr))
+                self._built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._journal = None
+
+        logging.info(f"[BAZAAR] Index reconstruit: {len(self._holders)} cartes possédées, "
+                     f"{replayed} modifications rejouées en {time.monotonic() - start:.2f}s")
+
+    async def ensure_fresh(self, build):
+        """
+        Construit l'index s'il n'existe pas encore ; s'il est trop ancien, lance
+        une reconstruction en arrière-plan et continue de servir l'index actuel.
+
+        Args:
+            build: Fonction synchrone qui appelle rebuild() avec les bonnes données
+        """
+        if not self.built:
+            await asyncio.to_thread(build)
+            return
+
+        if time.monotonic() - self._built_at > self.max_age:
+            if self._rebuild_task is None or self._rebuild_task.done():
+                self._rebuild_task = asyncio.create_task(self._background_rebuild(build))
+
+    async def _background_rebuild(self, build):
+        try:
+            await asyncio.to_thread(build)
+        except Exception as e:
+            logging.error(f"[BAZAAR] Erreur lors de la reconstruction de l'index: {e}")
+
+    # ------------------------------------------------------------------
+    # Mises à jour incrémentales
+    # ------------------------------------------------------------------
+
+    def record(self, user_id, category: str, name: str, delta: int):
+        """
+        Applique une variation d'inventaire (ajout, retrait ou moitié d'un transfert).
+
+        Args:
+            user_id: ID du joueur
+            category: Catégorie de la carte
+            name: Nom de la carte
+            delta: Nombre d'exemplaires ajoutés (négatif pour un retrait)
+        """
+        with self._lock:
+            if not self.built:
+                return  # La première construction lira l'inventaire à jour
+            key = (category.strip(), name.strip())
+            count = self._holders.get(key, {}).get(str(user_id), 0) + delta
+            self._submit(("count", key, str(user_id), count))
+
+    def set_count(self, user_id, category: str, name: str, count: int):
+        """
+        Enregistre la quantité possédée d'une carte après une modification d'inventaire.
+
+        Args:
+            user_id: ID du joueur
+            category: Catégorie de la carte
+            name: Nom de la carte
+            count: Quantité possédée après la modification
+        """
+        with self._lock:
+            self._submit(("count", (category.strip(), name.strip()), str(user_id), count))
+
+    def mark_discovered(self, category: str, name: str):
+        """
+        Signale une nouvelle découverte : la carte peut désormais être listée.
+
+        Args:
+            category: Catégorie de la carte
+            name: Nom de la carte
+        """
+        with self._lock:
+            self._submit(("discovered", (category.strip(), name.strip())))
+
+    def _submit(self, entry: tuple):
+        """Applique une modification à l'index courant et la journalise si une reconstruction est en cours."""
+        if self._journal is not None:
+            self._journal.append(entry)
+        if self.built:
+            self._apply(entry)
+
+    def _apply(self, entry: tuple):
+        if entry[0] == "discovered":
+            key = entry[1]
+            if key not in self._discovered:
+                self._discovered.add(key)
+                self._set_holders(key, self._holders.get(key, {}))
+            return
+
+        _, key, uid, count = entry
+        holders = dict(self._holders.get(key, {}))
+        if count > 0:
+            holders[uid] = count
+            # Une carte possédée a forcément été tirée, donc découverte
+            self._discovered.add(key)
+        else:
+            holders.pop(uid, None)
+        self._set_holders(key, holders)
+
+    def _set_holders(self, key: CardKey, holders: Dict[str, int]):
+        """Remplace les détenteurs d'une carte et met à jour toutes les structures dérivées."""
+        previous = self._holders.get(key, {})
+        for uid in previous:
+            user_cards = self._by_user.get(uid)
+            if user_cards is not None:
+                user_cards.pop(key, None)
+                if not user_cards:
+                    del self._by_user[uid]
+        for uid, count in holders.items():
+            self._by_user.setdefault(uid, {})[key] = count
+
+        if holders:
+            if key not in self._holders:
+                for trigram in _trigrams(key[0]) | _trigrams(key[1]):
+                    self._trigram_index.setdefault(trigram, set()).add(key)
+            self._holders[key] = holders
+        else:
+            self._holders.pop(key, None)
+
+        for include_all in (True, False):
+            self._unlist(include_all, key)
+            if key in self._discovered:
+                minimum = 1 if include_all else 2
+                eligible = [uid for uid, count in holders.items() if count >= minimum]
+                if eligible:
+                    self._list(include_all, key, eligible)
+
+    def _list(self, include_all: bool, key: CardKey, eligible: List[str]):
+        insort(self._buckets[include_all].setdefault(key[0], []), key[1])
+        self._listed[include_all].add(key)
+        if len(eligible) == 1:
+            self._sole_owner[include_all][key] = eligible[0]
+            self._sole_by_user[include_all].setdefault(eligible[0], set()).add(key)
+
+    def _unlist(self, include_all: bool, key: CardKey):
+        if key not in self._listed[include_all]:
+            return
+        self._listed[include_all].discard(key)
+        bucket = self._buckets[include_all][key[0]]
+        bucket.pop(bisect_left(bucket, key[1]))
+        sole = self._sole_owner[include_all].pop(key, None)
+        if sole is not None:
+            sole_keys = self._sole_by_user[include_all][sole]
+            sole_keys.discard(key)
+            if not sole_keys:
+                del self._sole_by_user[include_all][sole]
+
+    # ------------------------------------------------------------------
+    # Requêtes
+    # ------------------------------------------------------------------
+
+    def _categories(self, category: Optional[str], include_all: bool) -> List[str]:
+        if category:
+            return [category]
+        buckets = self._buckets[include_all]
+        return [c for c in self._category_order if c in buckets] + \
+            sorted(c for c in buckets if c not in self._category_order)
+
+    def _sort_key(self, key: CardKey):
+        try:
+            position = self._category_order.index(key[0])
+        except ValueError:
+            position = len(self._category_order)
+        return position, key[0], key[1]
+
+    def search(self, viewer_id, query: Optional[str], category: Optional[str],
+               include_all: bool, page: int, per_page: int) -> Tuple[List[Tuple[CardKey, Dict[str, int], Optional[str]]], int]:
+        """
+        Retourne une page de cartes disponibles.
+
+        Args:
+            viewer_id: Joueur qui cherche (ses propres cartes ne comptent pas)
+            query: Recherche textuelle (nom ou catégorie)
+            category: Filtre de catégorie
+            include_all: Inclure les cartes non-doublons
+            page: Page demandée (à partir de 1)
+            per_page: Taille de page
+
+        Returns:
+            Tuple: ([(carte, détenteurs disponibles {user_id: count}, file_id)], total)
+        """
+        viewer = str(viewer_id)
+        offset = (page - 1) * per_page
+        with self._lock:
+            hidden = self._sole_by_user[include_all].get(viewer, set())
+            if query:
+                keys, total = self._search_text(query.lower(), category, include_all, hidden, offset, per_page)
+            else:
+                keys, total = self._search_buckets(category, include_all, hidden, offset, per_page)
+
+            minimum = 1 if include_all else 2
+            results = []
+            for key in keys:
+                owners = {uid: count for uid, count in self._holders[key].items()
+                          if uid != viewer and count >= minimum}
+                results.append((key, owners, self._file_ids.get(key)))
+            return results, total
+
+    def _search_buckets(self, category: Optional[str], include_all: bool, hidden: Set[CardKey],
+                        offset: int, per_page: int) -> Tuple[List[CardKey], int]:
+        """Pagination sur les catégories : seules les cartes de la page sont parcourues."""
+        hidden_by_category: Dict[str, List[str]] = {}
+        for cat, name in hidden:
+            hidden_by_category.setdefault(cat, []).append(name)
+
+        categories = self._categories(category, include_all)
+        buckets = self._buckets[include_all]
+        total = sum(len(buckets.get(cat, ())) - len(hidden_by_category.get(cat, ())) for cat in categories)
+
+        keys: List[CardKey] = []
+        for cat in categories:
+            bucket = buckets.get(cat, [])
+            hidden_names = sorted(hidden_by_category.get(cat, ()))
+            visible = len(bucket) - len(hidden_names)
+            if not keys and offset >= visible:
+                offset -= visible
+                continue
+
+            # Position réelle de la première carte visible de la page
+            start = offset if not keys else 0
+            for position in (bisect_left(bucket, name) for name in hidden_names):
+                if position <= start:
+                    start += 1
+                else:
+                    break
+            offset = 0
+
+            skip = set(hidden_names)
+            for name in bucket[start:]:
+                if len(keys) >= per_page:
+                    return keys, total
+                if name not in skip:
+                    keys.append((cat, name))
+        return keys, total
+
+    def _search_text(self, query: str, category: Optional[str], include_all: bool, hidden: Set[CardKey],
+                     offset: int, per_page: int) -> Tuple[List[CardKey], int]:
+        """Recherche textuelle : candidats par trigrammes, puis vérification de la sous-chaîne."""
+        trigrams = _trigrams(query)
+        if trigrams:
+            sets = sorted((self._trigram_index.get(t, set()) for t in trigrams), key=len)
+            candidates = set(sets[0]).intersection(*sets[1:])
+        else:
+            candidates = self._listed[include_all]
+
+        listed = self._listed[include_all]
+        matches = [
+            key for key in candidates
+            if key in listed and key not in hidden
+            and (not category or key[0] == category)
+            and (query in key[1].lower() or query in key[0].lower())
+        ]
+        matches.sort(key=self._sort_key)
+        return matches[offset:offset + per_page], len(matches)
+
+    def user_cards(self, user_id, include_all: bool) -> List[Tuple[CardKey, Optional[str]]]:
+        """
+        Cartes d'un joueur disponibles à l'échange.
+
+        Returns:
+            List: [(carte, file_id)]
+        """
+        minimum = 1 if include_all else 2
+        with self._lock:
+            keys = [
+                key for key, count in self._by_user.get(str(user_id), {}).items()
+                if count >= minimum and key in self._discovered
+            ]
+            keys.sort(key=self._sort_key)
+            return [(key, self._file_ids.get(key)) for key in keys]
+
+
+bazaar_index = BazaarIndex()
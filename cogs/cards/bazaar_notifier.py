@@ -6,9 +6,13 @@ Surveille les nouvelles demandes d'echange et envoie des DM Discord.
 import discord
 import logging
 import asyncio
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Optional, List, Dict, Any
 
+from .expiry import ExpiryHeap
+from .trade_events import trade_events, TradeEvent, PROPOSED, ACCEPTED, DECLINED, CANCELLED
+
 if TYPE_CHECKING:
     from ..Cards import Cards
 
@@ -24,6 +28,17 @@ FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
 BAZAAR_URL = f"{FRONTEND_URL}/trade"
 
 
+# Nombre maximal d'identifiants de demandes deja traitees gardes en memoire
+SEEN_TRADE_IDS_LIMIT = 1000
+# Derniere colonne lue dans la sheet TradeRequests
+LAST_COLUMN = "O"
+# Intervalle de lecture de la sheet (secondes) ; plus long quand le site publie
+# ses demandes directement au bot (meme processus), la lecture ne servant alors
+# que de filet de securite
+POLL_INTERVAL = 60
+PUSH_FALLBACK_POLL_INTERVAL = 600
+
+
 class BazaarNotifier:
     """
     Gere les notifications Discord pour les demandes d'echange du Bazaar.
@@ -32,6 +47,13 @@ class BazaarNotifier:
     - Verifie periodiquement la sheet TradeRequests pour les nouvelles demandes
     - Envoie un DM aux destinataires des nouvelles demandes
     - Marque les demandes comme notifiees pour eviter les doublons
+
+    Les demandes etant ajoutees en fin de sheet, seules les lignes apres la
+    derniere ligne lue sont relues a chaque verification ; les demandes dont
+    la notification a echoue sont relues individuellement.
+
+    Quand le site tourne dans le meme processus, ses demandes arrivent par le
+    canal trade_events et sont notifiees immediatement.
     """
 
     def __init__(self, cog: "Cards"):
@@ -39,20 +61,34 @@ class BazaarNotifier:
         self.bot = cog.bot
         self.storage = cog.storage
         self._last_check_time: Optional[datetime] = None
-        self._notified_trade_ids: set = set()
+        self._notified_trade_ids: "OrderedDict[str, None]" = OrderedDict()
+        self._sheet = None
+        self._headers: List[str] = []
+        self._last_row = 1  # Derniere ligne lue (1 = en-tete)
+        self._retry: Dict[str, Dict[str, Any]] = {}
         self._running = False
         self._task: Optional[asyncio.Task] = None
+        self._event_task: Optional[asyncio.Task] = None
 
     def _get_trade_requests_sheet(self):
-        """Recupere la sheet des demandes d'echange."""
-        try:
-            return self.storage.spreadsheet.worksheet("TradeRequests")
-        except Exception:
-            return None
+        """Recupere la sheet des demandes d'echange (une seule fois)."""
+        if self._sheet is None:
+            try:
+                self._sheet = self.storage.spreadsheet.worksheet("TradeRequests")
+            except Exception:
+                return None
+        return self._sheet
+
+    def _remember(self, trade_id: str):
+        """Ajoute un identifiant a l'ensemble borne des demandes deja traitees."""
+        self._notified_trade_ids[trade_id] = None
+        self._notified_trade_ids.move_to_end(trade_id)
+        while len(self._notified_trade_ids) > SEEN_TRADE_IDS_LIMIT:
+            self._notified_trade_ids.popitem(last=False)
 
     def _parse_trade_requests(self) -> List[Dict[str, Any]]:
         """
-        Lit les demandes d'echange depuis la sheet.
+        Lit les nouvelles lignes de la sheet (et celles a relire apres un echec).
         Retourne les demandes en attente qui n'ont pas ete notifiees.
         """
         sheet = self._get_trade_requests_sheet()
@@ -60,17 +96,36 @@ class BazaarNotifier:
             return []
 
         try:
-            records = sheet.get_all_records()
+            if not self._headers:
+                self._headers = sheet.row_values(1)
+            start_row = self._last_row + 1
+            new_rows = sheet.get(f"A{start_row}:{LAST_COLUMN}")
+            retry = list(self._retry.values())
+            retry_rows = [request["row_index"] for request in retry]
+            retried = sheet.batch_get([f"A{row}:{LAST_COLUMN}{row}" for row in retry_rows]) if retry_rows else []
         except Exception as e:
             logger.warning(f"Erreur lecture TradeRequests: {e}")
             return []
 
+        self._last_row += len(new_rows)
+        for request in retry:
+            self._retry.pop(request["id"], None)
+
+        rows = [(row_index, values[0] if values else []) for row_index, values in zip(retry_rows, retried)]
+        rows += [(start_row + i, row) for i, row in enumerate(new_rows)]
+
         pending_requests = []
         now = datetime.now(timezone.utc)
 
-        for i, record in enumerate(records):
-            # Ignorer les demandes deja traitees ou notifiees
+        for row_index, row in rows:
+            record = {column: (row[j] if j < len(row) else "") for j, column in enumerate(self._headers)}
+
+            # Planifier l'expiration de toute demande en attente lue (premiere lecture comprise)
             trade_id = record.get("id", "")
+            if record.get("status") == "pending":
+                self._track_expiry(trade_id, record.get("expires_at", ""), row_index)
+
+            # Ignorer les demandes deja traitees ou notifiees
             if not trade_id or trade_id in self._notified_trade_ids:
                 continue
 
@@ -81,7 +136,7 @@ class BazaarNotifier:
             # Verifier si deja notifie (colonne 14 = notified_at)
             notified_at = record.get("notified_at", "")
             if notified_at:
-                self._notified_trade_ids.add(trade_id)
+                self._remember(trade_id)
                 continue
 
             # Verifier l'expiration
@@ -96,22 +151,43 @@ class BazaarNotifier:
             except (ValueError, TypeError):
                 pass
 
-            pending_requests.append({
-                "row_index": i + 2,  # +2 pour header et index 0-based
-                "id": trade_id,
-                "requester_id": str(record.get("requester_id", "")),
-                "requester_name": record.get("requester_name", ""),
-                "target_id": str(record.get("target_id", "")),
-                "target_name": record.get("target_name", ""),
-                "offered_category": record.get("offered_category", ""),
-                "offered_name": record.get("offered_name", ""),
-                "requested_category": record.get("requested_category", ""),
-                "requested_name": record.get("requested_name", ""),
-                "created_at": record.get("created_at", ""),
-            })
+            pending_requests.append(self._request_from_record(record, row_index))
 
         return pending_requests
 
+    def _track_expiry(self, trade_id: str, expires_at: str, row_index: int):
+        checker = getattr(self.cog, "trade_expiration_checker", None)
+        if checker:
+            checker.track(trade_id, expires_at, row_index)
+
+    @staticmethod
+    def _request_from_record(record: Dict[str, Any], row_index: int) -> Dict[str, Any]:
+        """Construit une demande a notifier depuis une ligne de la sheet."""
+        return {
+            "row_index": row_index,
+            "id": record.get("id", ""),
+            "requester_id": str(record.get("requester_id", "")),
+            "requester_name": record.get("requester_name", ""),
+            "target_id": str(record.get("target_id", "")),
+            "target_name": record.get("target_name", ""),
+            "offered_category": record.get("offered_category", ""),
+            "offered_name": record.get("offered_name", ""),
+            "requested_category": record.get("requested_category", ""),
+            "requested_name": record.get("requested_name", ""),
+            "created_at": record.get("created_at", ""),
+        }
+
+    async def _fetch_user(self, user_id: int) -> Optional[discord.User]:
+        """Recupere un utilisateur Discord (cache puis API)."""
+        user = self.bot.get_user(user_id)
+        if not user:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except (discord.NotFound, discord.HTTPException):
+                logger.warning(f"Utilisateur {user_id} introuvable pour notification")
+                return None
+        return user
+
     async def _send_trade_notification(self, request: Dict[str, Any]) -> bool:
         """
         Envoie une notification DM au destinataire d'une demande d'echange.
@@ -121,14 +197,9 @@ class BazaarNotifier:
         """
         try:
             target_id = int(request["target_id"])
-            user = self.bot.get_user(target_id)
-
+            user = await self._fetch_user(target_id)
             if not user:
-                try:
-                    user = await self.bot.fetch_user(target_id)
-                except (discord.NotFound, discord.HTTPException):
-                    logger.warning(f"Utilisateur {target_id} introuvable pour notification")
-                    return False
+                return False
 
             # Creer l'embed de notification
             embed = discord.Embed(
@@ -176,19 +247,70 @@ class BazaarNotifier:
             logger.error(f"Erreur notification: {e}")
             return False
 
-    def _mark_as_notified(self, request: Dict[str, Any]) -> bool:
-        """Marque une demande comme notifiee dans la sheet."""
+    async def _send_trade_result(self, trade: Dict[str, Any], accepted: bool) -> bool:
+        """
+        Previent l'initiateur d'une demande qu'elle a ete acceptee ou refusee.
+
+        Returns:
+            True si la notification a ete envoyee (ou si les DM sont bloques)
+        """
+        try:
+            user = await self._fetch_user(int(trade.get("requester_id", 0)))
+            if not user:
+                return False
+
+            offered = f"{trade.get('offered_name', '').replace('.png', '')} ({trade.get('offered_category', '')})"
+            requested = f"{trade.get('requested_name', '').replace('.png', '')} ({trade.get('requested_category', '')})"
+            if accepted:
+                embed = discord.Embed(
+                    title="✅ Echange accepte !",
+                    description=(
+                        f"**{trade.get('target_name', '')}** a accepte votre echange.\n\n"
+                        f"🎴 Vous avez donne : {offered}\n"
+                        f"🎴 Vous avez recu : {requested}"
+                    ),
+                    color=0x22C55E,
+                    timestamp=datetime.now(timezone.utc)
+                )
+            else:
+                embed = discord.Embed(
+                    title="❌ Echange refuse",
+                    description=(
+                        f"**{trade.get('target_name', '')}** a refuse votre proposition :\n\n"
+                        f"🎴 {offered} contre {requested}"
+                    ),
+                    color=0xEF4444,
+                    timestamp=datetime.now(timezone.utc)
+                )
+            embed.set_footer(text="Systeme de cartes Citadelle")
+
+            try:
+                await user.send(embed=embed)
+                logger.info(f"Resultat de l'echange {trade.get('id')} envoye a {user.display_name}")
+            except discord.Forbidden:
+                logger.warning(f"DM bloques pour {user.display_name} ({user.id})")
+            return True
+
+        except Exception as e:
+            logger.error(f"Erreur notification resultat: {e}")
+            return False
+
+    def _mark_as_notified(self, requests: List[Dict[str, Any]]) -> bool:
+        """Marque des demandes comme notifiees dans la sheet (une seule ecriture)."""
         sheet = self._get_trade_requests_sheet()
-        if not sheet:
+        if not sheet or not requests:
             return False
 
         try:
-            row_index = request["row_index"]
             now = datetime.now(timezone.utc).isoformat()
 
             # Colonne 14 = notified_at
-            sheet.update_cell(row_index, 14, now)
-            self._notified_trade_ids.add(request["id"])
+            sheet.batch_update([
+                {"range": f"N{request['row_index']}", "values": [[now]]}
+                for request in requests
+            ])
+            for request in requests:
+                self._remember(request["id"])
             return True
         except Exception as e:
             logger.error(f"Erreur marquage notification: {e}")
@@ -208,17 +330,25 @@ class BazaarNotifier:
 
             logger.info(f"Trouvees {len(pending)} demandes a notifier")
 
+            notified = []
             for request in pending:
-                # Envoyer la notification
-                success = await self._send_trade_notification(request)
+                # Demande deja notifiee par le canal d'evenements entre-temps
+                if request["id"] in self._notified_trade_ids:
+                    continue
 
-                if success:
-                    # Marquer comme notifie
-                    await asyncio.to_thread(self._mark_as_notified, request)
+                # Envoyer la notification
+                if await self._send_trade_notification(request):
+                    notified.append(request)
+                else:
+                    # Ligne relue a la prochaine verification
+                    self._retry[request["id"]] = request
 
                 # Petit delai entre les notifications
                 await asyncio.sleep(1)
 
+            # Marquer comme notifie
+            await asyncio.to_thread(self._mark_as_notified, notified)
+
         except Exception as e:
             logger.error(f"Erreur check_and_notify: {e}")
 
@@ -233,8 +363,51 @@ class BazaarNotifier:
             except Exception as e:
                 logger.error(f"Erreur boucle notification: {e}")
 
-            # Verifier toutes les 60 secondes
-            await asyncio.sleep(60)
+            await asyncio.sleep(PUSH_FALLBACK_POLL_INTERVAL if trade_events.has_producer else POLL_INTERVAL)
+
+    async def _event_loop(self, events: asyncio.Queue):
+        """Traite les evenements publies par le site (meme processus)."""
+        await self.bot.wait_until_ready()
+
+        while self._running:
+            event = await events.get()
+            try:
+                await self._handle_event(event)
+            except Exception as e:
+                logger.error(f"Erreur traitement {event}: {e}")
+
+    async def _handle_event(self, event: TradeEvent):
+        """Notifie immediatement une demande creee ou resolue sur le site."""
+        trade_id = event.trade.get("id", "")
+        if not trade_id:
+            return
+
+        checker = getattr(self.cog, "trade_expiration_checker", None)
+        if event.kind == PROPOSED:
+            self._track_expiry(trade_id, event.trade.get("expires_at", ""), event.row_index)
+            if trade_id in self._notified_trade_ids:
+                return
+            # Reserve avant l'envoi pour que la lecture de la sheet ne la notifie pas une seconde fois
+            self._remember(trade_id)
+            request = self._request_from_record(event.trade, event.row_index)
+            if await self._send_trade_notification(request):
+                if event.row_index:
+                    await asyncio.to_thread(self._mark_as_notified, [request])
+            else:
+                self._notified_trade_ids.pop(trade_id, None)
+                if event.row_index:
+                    self._retry[trade_id] = request
+
+        elif event.kind in (ACCEPTED, DECLINED):
+            self._retry.pop(trade_id, None)
+            if checker:
+                checker.untrack(trade_id)
+            await self._send_trade_result(event.trade, accepted=event.kind == ACCEPTED)
+
+        elif event.kind == CANCELLED:
+            self._retry.pop(trade_id, None)
+            if checker:
+                checker.untrack(trade_id)
 
     def start(self):
         """Demarre la tache de fond de notification."""
@@ -243,98 +416,117 @@ class BazaarNotifier:
 
         self._running = True
         self._task = asyncio.create_task(self._notification_loop())
+        self._event_task = asyncio.create_task(self._event_loop(trade_events.attach_consumer()))
         logger.info("Tache BazaarNotifier lancee")
 
     def stop(self):
         """Arrete la tache de fond."""
         self._running = False
+        trade_events.detach_consumer()
         if self._task:
             self._task.cancel()
             self._task = None
+        if self._event_task:
+            self._event_task.cancel()
+            self._event_task = None
         logger.info("BazaarNotifier arrete")
 
 
 class TradeExpirationChecker:
     """
     Verifie les demandes d'echange expirees et les marque comme telles.
+
+    Les demandes en attente sont gardees dans un tas d'echeances, alimente par
+    le BazaarNotifier (lignes lues dans la sheet et evenements du site). Un
+    seul minuteur dort jusqu'a la prochaine expiration ; les demandes echues
+    sont verifiees puis marquees en une lecture et une ecriture groupees.
     """
 
     def __init__(self, cog: "Cards"):
         self.cog = cog
         self.storage = cog.storage
+        self.expiries = ExpiryHeap()
+        self._rows: Dict[str, int] = {}
+        self._sheet = None
         self._running = False
         self._task: Optional[asyncio.Task] = None
 
     def _get_trade_requests_sheet(self):
-        """Recupere la sheet des demandes d'echange."""
+        """Recupere la sheet des demandes d'echange (une seule fois)."""
+        if self._sheet is None:
+            try:
+                self._sheet = self.storage.spreadsheet.worksheet("TradeRequests")
+            except Exception:
+                return None
+        return self._sheet
+
+    def track(self, trade_id: str, expires_at_str: str, row_index: int):
+        """Planifie l'expiration d'une demande en attente."""
+        if not trade_id or not expires_at_str or not row_index:
+            return
         try:
-            return self.storage.spreadsheet.worksheet("TradeRequests")
-        except Exception:
-            return None
+            expires_at = datetime.fromisoformat(expires_at_str.replace('Z', '+00:00'))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Erreur parsing date expiration: {e}")
+            return
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        self._rows[trade_id] = row_index
+        self.expiries.push(trade_id, expires_at)
+
+    def untrack(self, trade_id: str):
+        """Oublie une demande resolue avant son expiration."""
+        self._rows.pop(trade_id, None)
+        self.expiries.discard(trade_id)
 
-    def _check_and_expire_requests(self) -> int:
+    def _expire_requests(self, trade_ids: List[str]) -> int:
         """
-        Verifie et marque les demandes expirees.
+        Marque les demandes echues comme expirees si elles sont toujours en attente.
 
         Returns:
             Nombre de demandes expirees
         """
+        # Les lignes ne sont oubliees qu'une fois traitees : en cas d'erreur, la
+        # demande est replanifiee par le minuteur et doit rester retrouvable
+        due = [(trade_id, self._rows[trade_id]) for trade_id in trade_ids if trade_id in self._rows]
+        if not due:
+            return 0
         sheet = self._get_trade_requests_sheet()
         if not sheet:
-            return 0
-
-        try:
-            records = sheet.get_all_records()
-        except Exception:
-            return 0
-
-        now = datetime.now(timezone.utc)
-        expired_count = 0
-
-        for i, record in enumerate(records):
-            # Ignorer les demandes non-pending
-            if record.get("status") != "pending":
+            raise RuntimeError("sheet TradeRequests indisponible")
+
+        # Verifier en une lecture que chaque ligne porte toujours la demande, en attente
+        current = sheet.batch_get([f"A{row}:J{row}" for _, row in due])
+        now = datetime.now(timezone.utc).isoformat()
+        updates = []
+        expired_ids = []
+        for (trade_id, row), values in zip(due, current):
+            row_values = values[0] if values else []
+            if len(row_values) < 10 or row_values[0] != trade_id or row_values[9] != "pending":
+                # Demande deplacee ou deja resolue : plus rien a faire
+                self._rows.pop(trade_id, None)
                 continue
-
-            # Verifier l'expiration
-            try:
-                expires_at_str = record.get("expires_at", "")
-                if not expires_at_str:
-                    continue
-
-                expires_at = datetime.fromisoformat(expires_at_str.replace('Z', '+00:00'))
-                if expires_at.tzinfo is None:
-                    expires_at = expires_at.replace(tzinfo=timezone.utc)
-
-                if expires_at < now:
-                    # Marquer comme expire
-                    row_index = i + 2  # +2 pour header et index 0-based
-                    sheet.update_cell(row_index, 10, "expired")  # Colonne status
-                    sheet.update_cell(row_index, 13, now.isoformat())  # Colonne resolved_at
-                    expired_count += 1
-                    logger.info(f"Demande {record.get('id')} marquee comme expiree")
-
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Erreur parsing date expiration: {e}")
-                continue
-
-        return expired_count
+            updates.append({"range": f"J{row}", "values": [["expired"]]})  # Colonne status
+            updates.append({"range": f"M{row}", "values": [[now]]})  # Colonne resolved_at
+            expired_ids.append(trade_id)
+
+        if updates:
+            sheet.batch_update(updates)
+            for trade_id in expired_ids:
+                self._rows.pop(trade_id, None)
+                logger.info(f"Demande {trade_id} marquee comme expiree")
+        return len(expired_ids)
+
+    def _expire_and_log(self, trade_ids: List[str]):
+        expired = self._expire_requests(trade_ids)
+        if expired > 0:
+            logger.info(f"{expired} demande(s) d'echange expiree(s)")
 
     async def _expiration_loop(self):
-        """Boucle de verification des expirations."""
+        """Minuteur des expirations (les demandes sont ajoutees par le BazaarNotifier)."""
         await self.cog.bot.wait_until_ready()
         logger.info("TradeExpirationChecker demarre")
-
-        while self._running:
-            try:
-                expired = await asyncio.to_thread(self._check_and_expire_requests)
-                if expired > 0:
-                    logger.info(f"{expired} demande(s) d'echange expiree(s)")
-            except Exception as e:
-                logger.error(f"Erreur verification expiration: {e}")
-
-            # Verifier toutes les 5 minutes
-            await asyncio.sleep(300)
+        await self.expiries.run(self._expire_and_log)
 
     def start(self):
         """Demarre la tache de verification."""
@@ -0,0 +1,254 @@
+"""
+Registre indexé des tirages bonus.
+Remplace la relecture et la réécriture complète de la feuille Bonus par
+des lectures en mémoire et des écritures d'une seule cellule.
+"""
+
+import re
+import time
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import gspread
+
+from .config import BONUS_COMPACTION_MIN_ZEROED_ROWS, BONUS_COMPACTION_INTERVAL
+
+
+class BonusEntry:
+    """Ligne de la feuille Bonus (une attribution)."""
+
+    def __init__(self, row: int, count: int, source: str):
+        self.row = row
+        self.count = count
+        self.source = source
+
+    def __repr__(self):
+        return f"BonusEntry(row={self.row}, count={self.count}, source='{self.source}')"
+
+
+class BonusLedger:
+    """
+    Registre user_id -> [(ligne, quantité)] pour la feuille Bonus (user_id, count, source).
+
+    La feuille est lue une seule fois ; les soldes sont tenus en mémoire.
+    Une consommation décrémente une seule cellule, une attribution ajoute
+    une ligne. Les lignes épuisées restent en place (les numéros de ligne
+    restent ainsi valides) jusqu'à la compaction périodique.
+    Une instance est partagée par feuille dans le processus (bot et site).
+    """
+
+    _shared: Dict[Tuple[str, int], "BonusLedger"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, sheet: gspread.Worksheet):
+        self.sheet = sheet
+
+        self._header: List[str] = ["user_id", "count", "source"]
+        self._entries: Dict[str, List[BonusEntry]] = {}
+        self._balances: Dict[str, int] = {}
+        self._zeroed_rows = 0
+        self._loaded = False
+        self._last_compaction = 0.0
+
+        self._lock = threading.RLock()
+
+    @classmethod
+    def for_sheet(cls, sheet: gspread.Worksheet) -> "BonusLedger":
+        """Retourne le registre partagé associé à une feuille."""
+        key = (sheet.spreadsheet.id, sheet.id)
+        with cls._shared_lock:
+            ledger = cls._shared.get(key)
+            if ledger is None:
+                ledger = cls(sheet)
+                cls._shared[key] = ledger
+            return ledger
+
+    # ------------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------------
+
+    def reload(self):
+        """Recharge le registre depuis la feuille."""
+        with self._lock:
+            all_rows = self.sheet.get_all_values()
+            entries: Dict[str, List[BonusEntry]] = {}
+            balances: Dict[str, int] = {}
+            zeroed = 0
+
+            for i, row in enumerate(all_rows, start=1):
+                if i == 1:
+                    if row:
+                        self._header = row
+                    continue
+                if len(row) < 2 or not row[0]:
+                    continue
+                try:
+                    count = int(row[1])
+                except ValueError:
+                    logging.warning(f"[BONUS] Ligne {i} invalide ignorée: {row}")
+                    continue
+                if count <= 0:
+                    zeroed += 1
+                    continue
+                source = row[2] if len(row) > 2 else "Non spécifié"
+                entries.setdefault(row[0], []).append(BonusEntry(i, count, source))
+                balances[row[0]] = balances.get(row[0], 0) + count
+
+            self._entries = entries
+            self._balances = balances
+            self._zeroed_rows = zeroed
+            self._loaded = True
+            logging.info(f"[BONUS] Registre chargé ({len(balances)} utilisateurs, {zeroed} lignes épuisées)")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.reload()
+
+    def invalidate(self):
+        """Force le rechargement depuis la feuille au prochain accès."""
+        with self._lock:
+            self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def balance(self, user_id: int) -> int:
+        """Retourne le nombre de tirages bonus disponibles (aucun appel réseau hors chargement)."""
+        self._ensure_loaded()
+        return self._balances.get(str(user_id), 0)
+
+    def grant(self, user_id: int, count: int, source: str) -> bool:
+        """
+        Attribue des bonus en ajoutant une ligne à la feuille.
+
+        Args:
+            user_id: ID de l'utilisateur
+            count: Nombre de tirages bonus
+            source: Raison du bonus
+
+        Returns:
+            bool: True si l'attribution a réussi
+        """
+        user_id_str = str(user_id)
+        with self._lock:
+            self._ensure_loaded()
+            try:
+                response = self.sheet.append_row([user_id_str, str(count), source])
+            except Exception as e:
+                logging.error(f"[BONUS] Erreur lors de l'attribution du bonus: {e}")
+                return False
+
+            updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+            match = re.search(r"![A-Z]+(\d+)", updated_range)
+            if not match:
+                # Position inconnue : relire la feuille au prochain accès
+                self._loaded = False
+                return True
+
+            row = int(match.group(1))
+            if count > 0:
+                self._entries.setdefault(user_id_str, []).append(BonusEntry(row, count, source))
+                self._balances[user_id_str] = self._balances.get(user_id_str, 0) + count
+            return True
+
+    def consume(self, user_id: int) -> Optional[BonusEntry]:
+        """
+        Consomme un tirage bonus (première attribution non épuisée).
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            Optional[BonusEntry]: Attribution décrémentée, None si aucun bonus ou en cas d'erreur
+        """
+        user_id_str = str(user_id)
+        with self._lock:
+            self._ensure_loaded()
+            entries = self._entries.get(user_id_str)
+            if not entries:
+                return None
+
+            entry = entries[0]
+            try:
+                self.sheet.update_cell(entry.row, 2, str(entry.count - 1))
+            except Exception as e:
+                logging.error(f"[BONUS] Erreur lors de la consommation du bonus: {e}")
+                return None
+
+            entry.count -= 1
+            self._balances[user_id_str] -= 1
+            if entry.count <= 0:
+                entries.pop(0)
+                self._zeroed_rows += 1
+            if not entries:
+                del self._entries[user_id_str]
+                del self._balances[user_id_str]
+
+        self.maybe_compact()
+        return entry
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def maybe_compact(self, force: bool = False) -> bool:
+        """
+        Supprime les lignes épuisées si elles sont assez nombreuses et que
+        la dernière compaction est assez ancienne.
+
+        Args:
+            force: Compacter sans tenir compte des seuils
+
+        Returns:
+            bool: True si une compaction a eu lieu
+        """
+        with self._lock:
+            if not force:
+                if self._zeroed_rows < BONUS_COMPACTION_MIN_ZEROED_ROWS:
+                    return False
+                if time.monotonic() - self._last_compaction < BONUS_COMPACTION_INTERVAL:
+                    return False
+            return self._compact()
+
+    def _compact(self) -> bool:
+        """Réécrit la feuille sans les lignes épuisées, en une seule écriture."""
+        try:
+            # Relire pour ne pas perdre d'éventuelles écritures extérieures
+            all_rows = self.sheet.get_all_values()
+            original_len = len(all_rows)
+
+            kept = [self._header]
+            for row in all_rows[1:]:
+                if len(row) < 2 or not row[0]:
+                    continue
+                try:
+                    if int(row[1]) <= 0:
+                        continue
+                except ValueError:
+                    pass  # Ligne invalide conservée telle quelle
+                kept.append(row)
+
+            removed = original_len - len(kept)
+            if removed <= 0:
+                self._last_compaction = time.monotonic()
+                return False
+
+            # Les lignes en trop sont remplacées par des lignes vides dans la même écriture :
+            # aucun solde n'apparaît jamais à zéro pendant la compaction
+            width = max(len(row) for row in all_rows)
+            padded = [row + [""] * (width - len(row)) for row in kept] + [[""] * width] * removed
+            self.sheet.update("A1", padded)
+
+            self._last_compaction = time.monotonic()
+            self.reload()
+            logging.info(f"[BONUS] Compaction de la feuille Bonus: {removed} lignes supprimées")
+            return True
+
+        except Exception as e:
+            logging.error(f"[BONUS] Erreur lors de la compaction de la feuille Bonus: {e}")
+            self._loaded = False
+            return False
@@ -0,0 +1,261 @@
+"""
+Catalogue des fichiers de cartes stockés sur Google Drive.
+Les dossiers sont listés en parallèle (avec pagination) puis le résultat est
+enregistré sur disque ; les démarrages suivants n'appliquent que les
+modifications signalées par l'API Drive Changes depuis le dernier jeton.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from googleapiclient.discovery import build
+
+from .config import CARD_CATALOG_PATH, CARD_CATALOG_WORKERS, CARD_CATALOG_MAX_AGE
+
+FILE_FIELDS = "id, name, mimeType, modifiedTime"
+PAGE_SIZE = 1000
+
+# Type d'un dossier dans le catalogue
+NORMAL = "normal"
+FULL = "full"
+
+
+class DriveCatalog:
+    """
+    Liste des images de cartes par catégorie (cartes normales et Full).
+
+    Le catalogue enregistré contient, en plus des listes de fichiers, la
+    correspondance dossier -> catégorie et le jeton de l'API Changes. Il est
+    relu entièrement si la configuration des dossiers a changé, s'il est trop
+    ancien ou si l'application des changements échoue.
+
+    Le nom du fichier contient une empreinte de la configuration des dossiers :
+    le bot et le site, qui lisent leurs dossiers depuis des variables
+    d'environnement différentes, ne s'écrasent pas mutuellement leur catalogue.
+    """
+
+    def __init__(self, credentials, folders: Dict[str, Optional[str]],
+                 full_folders: Dict[str, Optional[str]], path: str = CARD_CATALOG_PATH,
+                 max_workers: int = CARD_CATALOG_WORKERS):
+        self.credentials = credentials
+        self.max_workers = max_workers
+
+        # Catégories connues (même sans dossier configuré) et dossier -> (catégorie, type)
+        self.categories = list(dict.fromkeys(list(folders) + list(full_folders)))
+        self.folders: Dict[str, Tuple[str, str]] = {}
+        for category, folder_id in folders.items():
+            if folder_id:
+                self.folders[folder_id] = (category, NORMAL)
+        for category, folder_id in full_folders.items():
+            if folder_id:
+                self.folders[folder_id] = (category, FULL)
+        self.path = self._keyed_path(path)
+
+        self._local = threading.local()
+
+    def _keyed_path(self, path: str) -> str:
+        """Chemin de l'instantané propre à cette configuration de dossiers."""
+        config = json.dumps(sorted([folder_id, *entry] for folder_id, entry in self.folders.items()),
+                            ensure_ascii=False)
+        digest = hashlib.sha1(config.encode("utf-8")).hexdigest()[:12]
+        root, ext = os.path.splitext(path)
+        return f"{root}.{digest}{ext or '.json'}"
+
+    def _service(self):
+        """Client Drive propre au thread courant (les clients ne sont pas thread-safe)."""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = build("drive", "v3", credentials=self.credentials, cache_discovery=False)
+            self._local.service = service
+        return service
+
+    @staticmethod
+    def _is_card_image(f: Dict) -> bool:
+        return f.get("mimeType", "").startswith("image/")
+
+    # ------------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------------
+
+    def load(self) -> Tuple[Dict[str, List[Dict]], Dict[str, List[Dict]]]:
+        """
+        Retourne le catalogue à jour.
+
+        Returns:
+            Tuple: (cartes normales par catégorie, cartes Full par catégorie)
+        """
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            try:
+                self._apply_changes(snapshot)
+                self._write_snapshot(snapshot)
+                return self._split(snapshot)
+            except Exception as e:
+                logging.warning(f"[CATALOG] Changements Drive inapplicables, relecture complète: {e}")
+
+        snapshot, complete = self._full_scan()
+        if complete:
+            self._write_snapshot(snapshot)
+        return self._split(snapshot)
+
+    def _split(self, snapshot: Dict) -> Tuple[Dict[str, List[Dict]], Dict[str, List[Dict]]]:
+        """Répartit les fichiers du catalogue en cartes normales et Full par catégorie."""
+        cards = {category: [] for category in self.categories}
+        full_cards = {category: [] for category in self.categories}
+        for folder_id, files in snapshot["files"].items():
+            category, kind = self.folders[folder_id]
+            target = full_cards if kind == FULL else cards
+            target[category].extend(files)
+        return cards, full_cards
+
+    def _list_folder(self, folder_id: str) -> List[Dict]:
+        """Liste toutes les images d'un dossier (toutes les pages)."""
+        service = self._service()
+        files: List[Dict] = []
+        page_token = None
+        while True:
+            results = service.files().list(
+                q=f"'{folder_id}' in parents and trashed = false",
+                fields=f"nextPageToken, files({FILE_FIELDS})",
+                pageSize=PAGE_SIZE,
+                pageToken=page_token
+            ).execute()
+            files.extend(f for f in results.get("files", []) if self._is_card_image(f))
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                return files
+
+    def _full_scan(self) -> Tuple[Dict, bool]:
+        """
+        Relit tous les dossiers en parallèle.
+
+        Returns:
+            Tuple: (catalogue, True si tous les dossiers ont été lus)
+        """
+        start = time.monotonic()
+        logging.info(f"[CATALOG] Lecture complète de {len(self.folders)} dossiers Drive...")
+
+        # Jeton pris avant la lecture : les changements pendant la lecture seront rejoués
+        start_token = self._service().changes().getStartPageToken().execute().get("startPageToken")
+
+        files: Dict[str, List[Dict]] = {}
+        complete = True
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {folder_id: executor.submit(self._list_folder, folder_id) for folder_id in self.folders}
+            for folder_id, future in futures.items():
+                category, kind = self.folders[folder_id]
+                try:
+                    files[folder_id] = future.result()
+                    logging.info(f"[CATALOG] {len(files[folder_id])} cartes ({kind}) chargées pour {category}")
+                except Exception as e:
+                    logging.error(f"[CATALOG] Erreur lors de la lecture du dossier {category} ({kind}): {e}")
+                    files[folder_id] = []
+                    complete = False
+
+        logging.info(f"[CATALOG] ✅ Lecture complète terminée en {time.monotonic() - start:.1f}s")
+        return {
+            "folders": {folder_id: list(entry) for folder_id, entry in self.folders.items()},
+            "files": files,
+            "start_page_token": start_token,
+            "scanned_at": time.time(),
+        }, complete
+
+    def _apply_changes(self, snapshot: Dict) -> int:
+        """
+        Applique les changements Drive (ajouts, renommages, suppressions) depuis le jeton enregistré.
+
+        Returns:
+            int: Nombre de changements concernant des cartes
+        """
+        service = self._service()
+        page_token = snapshot["start_page_token"]
+        applied = 0
+        while page_token:
+            results = service.changes().list(
+                pageToken=page_token,
+                includeRemoved=True,
+                pageSize=PAGE_SIZE,
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}, parents, trashed))"
+            ).execute()
+            for change in results.get("changes", []):
+                if self._apply_change(snapshot["files"], change):
+                    applied += 1
+            page_token = results.get("nextPageToken")
+            if results.get("newStartPageToken"):
+                snapshot["start_page_token"] = results["newStartPageToken"]
+
+        logging.info(f"[CATALOG] ✅ Catalogue chargé depuis le disque ({applied} changements Drive appliqués)")
+        return applied
+
+    def _apply_change(self, files: Dict[str, List[Dict]], change: Dict) -> bool:
+        """Applique un changement Drive au catalogue ; retourne True s'il concerne une carte."""
+        file_id = change.get("fileId")
+        changed = False
+        for folder_files in files.values():
+            for i, f in enumerate(folder_files):
+                if f["id"] == file_id:
+                    del folder_files[i]
+                    changed = True
+                    break
+
+        drive_file = change.get("file") or {}
+        if change.get("removed") or drive_file.get("trashed") or not self._is_card_image(drive_file):
+            return changed
+
+        entry = {key: drive_file[key] for key in ("id", "name", "mimeType", "modifiedTime") if key in drive_file}
+        for parent in drive_file.get("parents", []):
+            if parent in files:
+                files[parent].append(entry)
+                changed = True
+        return changed
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def _read_snapshot(self) -> Optional[Dict]:
+        """Retourne le catalogue enregistré s'il est utilisable pour une mise à jour incrémentale."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"[CATALOG] Catalogue enregistré illisible: {e}")
+            return None
+
+        folders = {folder_id: tuple(entry) for folder_id, entry in snapshot.get("folders", {}).items()}
+        if folders != self.folders or set(snapshot.get("files", {})) != set(self.folders):
+            logging.info("[CATALOG] Configuration des dossiers modifiée, relecture complète")
+            return None
+        if not snapshot.get("start_page_token"):
+            return None
+        if time.time() - snapshot.get("scanned_at", 0) > CARD_CATALOG_MAX_AGE:
+            logging.info("[CATALOG] Catalogue enregistré trop ancien, relecture complète")
+            return None
+        return snapshot
+
+    def _write_snapshot(self, snapshot: Dict):
+        """Enregistre le catalogue (fichier temporaire renommé)."""
+        cards, full_cards = self._split(snapshot)
+        data = dict(snapshot, cards_by_category=cards, upgrade_cards_by_category=full_cards)
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logging.warning(f"[CATALOG] Écriture impossible du catalogue: {e}")
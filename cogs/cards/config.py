@@ -2,11 +2,31 @@
 Configuration et constantes pour le système de cartes.
 """
 
+import os
+
 # Configuration des rôles
 CARD_COLLECTOR_ROLE_ID = 1386125369295245388
 
 # Configuration du forum
 CARD_FORUM_CHANNEL_ID = 1386299170406531123
+# Nombre d'images téléchargées à l'avance pendant la reconstruction du forum
+FORUM_REBUILD_PREFETCH = 4
+# Délai minimal (en secondes) entre deux mises à jour groupées des en-têtes du forum
+FORUM_HEADER_UPDATE_INTERVAL = 10
+# Délai (en secondes) avant une nouvelle tentative de publication, doublé à chaque échec
+FORUM_PUBLISH_RETRY_DELAY = 30
+FORUM_PUBLISH_RETRY_MAX_DELAY = 1800
+# Fichier local des IDs de threads et de messages de statut du forum
+FORUM_STATE_PATH = os.getenv(
+    "FORUM_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache", "forum_state.json")
+)
+
+# Salon privé hébergeant les images de cartes déjà envoyées (optionnel, 0 = désactivé)
+CARD_ASSET_CHANNEL_ID = int(os.getenv("CARD_ASSET_CHANNEL_ID") or 0)
+
+# Limite Discord du nombre d'embeds (et de cartes affichées) par message
+MAX_EMBEDS_PER_MESSAGE = 10
 
 # Poids de rareté pour les tirages
 RARITY_WEIGHTS = {
@@ -32,4 +52,36 @@ CACHE_VALIDITY_DURATION = 5
 
 # Configuration des échanges
 WEEKLY_EXCHANGE_LIMIT = 3
+BOARD_OFFER_MAX_AGE_HOURS = 24  # Durée de vie d'une offre du tableau d'échanges
+BOARD_EXPIRY_RESYNC_INTERVAL = 3600  # Relecture du tableau (offres déposées par un autre processus)
 DAILY_SACRIFICIAL_CARDS_COUNT = 5
+
+# Configuration des conversions Full
+UPGRADE_THRESHOLD = 5
+
+# Configuration du registre des bonus
+# Nombre minimal de lignes épuisées avant compaction de la feuille Bonus
+BONUS_COMPACTION_MIN_ZEROED_ROWS = 20
+# Délai minimal (en secondes) entre deux compactions
+BONUS_COMPACTION_INTERVAL = 3600
+
+# Configuration du cache d'images des cartes
+# Répertoire du cache disque (partagé par le bot et le site)
+CARD_IMAGE_CACHE_DIR = os.getenv(
+    "CARD_IMAGE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache", "card_images")
+)
+# Taille maximale (en octets) du cache mémoire placé devant le cache disque
+CARD_IMAGE_MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+
+# Configuration du catalogue des cartes (liste des fichiers Drive)
+# Instantané du catalogue, mis à jour au démarrage via l'API Drive Changes
+# (le nom est suffixé par une empreinte de la configuration des dossiers)
+CARD_CATALOG_PATH = os.getenv(
+    "CARD_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "card_catalog.json")
+)
+# Nombre de dossiers Drive listés en parallèle
+CARD_CATALOG_WORKERS = 6
+# Âge maximal (en secondes) de l'instantané avant une relecture complète des dossiers
+CARD_CATALOG_MAX_AGE = 7 * 24 * 3600
@@ -10,6 +10,7 @@ import pytz
 from typing import Set, Tuple, Optional
 
 from .storage import CardsStorage
+from .bazaar_index import bazaar_index
 
 
 class DiscoveryManager:
@@ -70,6 +71,7 @@ class DiscoveryManager:
                 
                 self.storage.sheet_discoveries.append_row(new_row)
                 self.storage.refresh_discoveries_cache()
+                bazaar_index.mark_discovered(category, name)
                 
                 logging.info(f"[DISCOVERY] Nouvelle découverte enregistrée: {name} ({category}) par {discoverer_name} (index: {discovery_index})")
                 return discovery_index
@@ -0,0 +1,195 @@
+"""
+Registre en mémoire des tirages journaliers et sacrificiels.
+Évite de relire toute la feuille à chaque vérification d'éligibilité.
+"""
+
+import re
+import threading
+import logging
+from datetime import datetime
+import pytz
+from typing import Dict, Optional, Tuple
+
+import gspread
+
+
+class DrawLedger:
+    """
+    Registre user_id -> date du dernier tirage pour une feuille (user_id, date).
+
+    La feuille est lue une seule fois, puis une fois par jour au passage de
+    minuit (heure de Paris). Les réservations sont atomiques par utilisateur
+    et écrites immédiatement avec une seule cellule.
+    Une instance est partagée par feuille dans le processus, ce qui permet au
+    bot et au site de voir les mêmes réservations.
+    """
+
+    _shared: Dict[Tuple[str, int], "DrawLedger"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, sheet: gspread.Worksheet):
+        self.sheet = sheet
+        self.paris_tz = pytz.timezone("Europe/Paris")
+
+        self._dates: Dict[str, str] = {}
+        self._rows: Dict[str, int] = {}
+        self._loaded_day: Optional[str] = None
+        # Date précédente des réservations du jour (pour pouvoir les annuler)
+        self._reserved_from: Dict[str, Optional[str]] = {}
+
+        self._lock = threading.RLock()
+        self._user_locks: Dict[str, threading.Lock] = {}
+
+    @classmethod
+    def for_sheet(cls, sheet: gspread.Worksheet) -> "DrawLedger":
+        """Retourne le registre partagé associé à une feuille."""
+        key = (sheet.spreadsheet.id, sheet.id)
+        with cls._shared_lock:
+            ledger = cls._shared.get(key)
+            if ledger is None:
+                ledger = cls(sheet)
+                cls._shared[key] = ledger
+            return ledger
+
+    def _today(self) -> str:
+        return datetime.now(self.paris_tz).strftime("%Y-%m-%d")
+
+    def _user_lock(self, user_id: str) -> threading.Lock:
+        with self._lock:
+            lock = self._user_locks.get(user_id)
+            if lock is None:
+                lock = self._user_locks[user_id] = threading.Lock()
+            return lock
+
+    def reload(self):
+        """Recharge le registre depuis la feuille."""
+        with self._lock:
+            all_rows = self.sheet.get_all_values()
+            dates: Dict[str, str] = {}
+            rows: Dict[str, int] = {}
+            for i, row in enumerate(all_rows, start=1):
+                if not row or not row[0]:
+                    continue
+                # En cas de doublon, la première ligne est celle mise à jour
+                if row[0] not in rows:
+                    rows[row[0]] = i
+                    dates[row[0]] = row[1] if len(row) > 1 else ""
+            self._dates = dates
+            self._rows = rows
+            self._loaded_day = self._today()
+            logging.info(f"[DRAWING] Registre '{self.sheet.title}' chargé ({len(rows)} utilisateurs)")
+
+    def _ensure_loaded(self) -> str:
+        """Charge le registre au premier usage et au changement de jour ; retourne la date du jour."""
+        today = self._today()
+        if self._loaded_day != today:
+            with self._lock:
+                if self._loaded_day != today:
+                    self.reload()
+        return today
+
+    def has_drawn_today(self, user_id: int) -> bool:
+        """Indique si l'utilisateur a déjà tiré aujourd'hui (aucun appel réseau hors rechargement)."""
+        today = self._ensure_loaded()
+        return self._dates.get(str(user_id)) == today
+
+    def _write(self, user_id: str, today: str):
+        """Écrit la date du jour pour un utilisateur (une cellule, ou une ligne s'il est nouveau)."""
+        row = self._rows.get(user_id)
+        if row is not None:
+            self.sheet.update_cell(row, 2, today)
+            return
+
+        response = self.sheet.append_row([user_id, today])
+        updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+        match = re.search(r"![A-Z]+(\d+)", updated_range)
+        if match:
+            self._rows[user_id] = int(match.group(1))
+        else:
+            # Position inconnue : la prochaine écriture se fera après rechargement
+            self._loaded_day = None
+
+    def try_reserve(self, user_id: int) -> bool:
+        """
+        Réserve atomiquement le tirage du jour.
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            bool: True si la réservation a réussi, False si déjà tiré ou en cas d'erreur
+        """
+        user_id_str = str(user_id)
+        with self._user_lock(user_id_str):
+            today = self._ensure_loaded()
+            previous = self._dates.get(user_id_str)
+            if previous == today:
+                return False
+
+            self._dates[user_id_str] = today
+            try:
+                self._write(user_id_str, today)
+            except Exception as e:
+                # Annuler la réservation en mémoire si l'écriture échoue
+                if previous is None:
+                    self._dates.pop(user_id_str, None)
+                else:
+                    self._dates[user_id_str] = previous
+                logging.error(f"[DRAWING] Erreur lors de l'écriture du registre '{self.sheet.title}': {e}")
+                return False
+            self._reserved_from[user_id_str] = previous
+            return True
+
+    def release(self, user_id: int) -> bool:
+        """
+        Annule une réservation du jour faite par try_reserve (opération échouée).
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            bool: True si la réservation a été annulée
+        """
+        user_id_str = str(user_id)
+        with self._user_lock(user_id_str):
+            if user_id_str not in self._reserved_from or self._dates.get(user_id_str) != self._today():
+                return False
+            previous = self._reserved_from.pop(user_id_str)
+            try:
+                self._write(user_id_str, previous or "")
+            except Exception as e:
+                logging.error(f"[DRAWING] Erreur lors de l'annulation dans le registre '{self.sheet.title}': {e}")
+                return False
+            if previous is None:
+                self._dates.pop(user_id_str, None)
+            else:
+                self._dates[user_id_str] = previous
+            return True
+
+    def record(self, user_id: int) -> bool:
+        """
+        Enregistre un tirage pour aujourd'hui, même s'il est déjà noté.
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            bool: True si l'enregistrement a réussi
+        """
+        user_id_str = str(user_id)
+        with self._user_lock(user_id_str):
+            today = self._ensure_loaded()
+            if self._dates.get(user_id_str) == today and user_id_str in self._rows:
+                return True
+            try:
+                self._write(user_id_str, today)
+            except Exception as e:
+                logging.error(f"[DRAWING] Erreur lors de l'écriture du registre '{self.sheet.title}': {e}")
+                return False
+            self._dates[user_id_str] = today
+            return True
+
+    def invalidate(self):
+        """Force le rechargement depuis la feuille au prochain accès."""
+        with self._lock:
+            self._loaded_day = None
@@ -8,10 +8,40 @@ import hashlib
 import logging
 from datetime import datetime
 import pytz
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional, Union, Callable
+import heapq
 
 from .config import RARITY_WEIGHTS, ALL_CATEGORIES, DAILY_SACRIFICIAL_CARDS_COUNT
 from .storage import CardsStorage
+from .sampler import CardSampler
+from .draw_ledger import DrawLedger
+from .sacrificial_memo import sacrificial_memo, SacrificialSelection
+
+
+def weighted_sample_without_replacement(weights: Dict[Any, int], k: int, rng: random.Random) -> List[Any]:
+    """
+    Tirage pondéré sans remise (Efraimidis–Spirakis).
+
+    Chaque élément reçoit la clé ``u ** (1 / poids)`` avec ``u`` uniforme ; les
+    ``k`` plus grandes clés donnent la même loi que des tirages successifs
+    proportionnels au poids en écartant les éléments déjà choisis. Le résultat
+    est trié par clé décroissante (ordre de sélection) et ne dépend que de
+    ``rng`` et de l'ordre d'itération de ``weights``.
+
+    Args:
+        weights: {élément: poids entier positif}
+        k: Nombre d'éléments à sélectionner
+        rng: Générateur aléatoire (seedé pour un résultat reproductible)
+
+    Returns:
+        List: Éléments sélectionnés, au plus ``k``
+    """
+    keyed = []
+    for item, weight in weights.items():
+        if weight <= 0:
+            continue
+        keyed.append((rng.random() ** (1.0 / weight), item))
+    return [item for _, item in heapq.nlargest(k, keyed, key=lambda pair: pair[0])]
 
 
 class DrawingManager:
@@ -22,6 +52,16 @@ class DrawingManager:
         self.storage = storage
         self.cards_by_category = cards_by_category
         self.upgrade_cards_by_category = upgrade_cards_by_category
+        self.sampler = CardSampler(cards_by_category, RARITY_WEIGHTS, ALL_CATEGORIES)
+
+    def set_seed(self, seed: Optional[int]):
+        """
+        Fixe la graine des tirages pour pouvoir les rejouer.
+
+        Args:
+            seed: Graine (None pour revenir à une graine aléatoire)
+        """
+        self.sampler.seed(seed)
     
     def draw_cards(self, number: int) -> List[Tuple[str, str]]:
         """
@@ -35,39 +75,34 @@ class DrawingManager:
         Returns:
             List[Tuple[str, str]]: Liste des cartes tirées (category, name)
         """
-        drawn = []
-
-        # Définir les catégories disponibles
-        available_categories = ALL_CATEGORIES
-        category_weights = [RARITY_WEIGHTS[cat] for cat in available_categories]
-
-        for _ in range(number):
-            # Sélection de la catégorie selon les poids de rareté
-            category = random.choices(available_categories, weights=category_weights)[0]
+        return self.sampler.draw(number)
 
-            # Sélection aléatoire d'une carte dans la catégorie
-            available_cards = self.cards_by_category.get(category, [])
-            if not available_cards:
-                continue
-
-            selected_card = random.choice(available_cards)
-            card_name = selected_card['name'].removesuffix('.png')
+    def draw_many(self, number: int) -> List[Tuple[str, str]]:
+        """
+        Tire un grand nombre de cartes en une fois (vectorisé avec numpy).
+        Même distribution que draw_cards, destiné aux simulations et tirages multiples.
 
-            # Ajouter uniquement la carte normale (pas de variante Full)
-            drawn.append((category, card_name))
+        Args:
+            number: Nombre de cartes à tirer
 
-        return drawn
+        Returns:
+            List[Tuple[str, str]]: Liste des cartes tirées (category, name)
+        """
+        return self.sampler.draw_many(number)
 
     
-    def select_daily_sacrificial_cards(self, user_id: int, eligible_cards: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    def select_daily_sacrificial_cards(self, user_id: int,
+                                       eligible_cards: Union[List[Tuple[str, str]], Dict[Tuple[str, str], int]]) -> List[Tuple[str, str]]:
         """
         Sélectionne 5 cartes de manière déterministe basée sur le jour actuel et l'ID utilisateur.
         La sélection reste la même pour un utilisateur donné pendant toute la journée.
-        Gère intelligemment les doublons pour éviter de sélectionner plus de cartes d'un type que l'utilisateur n'en possède.
+        Chaque carte a une probabilité proportionnelle à son nombre d'exemplaires et
+        n'est sélectionnée qu'une fois (tirage pondéré sans remise).
         
         Args:
             user_id: ID de l'utilisateur
-            eligible_cards: Liste des cartes éligibles (category, name)
+            eligible_cards: Liste des cartes éligibles (category, name), un exemplaire par
+                élément, ou directement {(category, name): nombre d'exemplaires}
         
         Returns:
             List[Tuple[str, str]]: Liste des cartes sélectionnées
@@ -84,38 +119,60 @@ class DrawingManager:
         rng = random.Random(seed)
         
         # Compter les occurrences de chaque carte unique
-        card_counts = {}
-        for card in eligible_cards:
-            card_counts[card] = card_counts.get(card, 0) + 1
-        
-        # Créer une liste pondérée où chaque carte apparaît selon son nombre d'exemplaires
-        weighted_cards = []
-        for card, count in card_counts.items():
-            weighted_cards.extend([card] * count)
-        
-        # Sélectionner jusqu'à 5 cartes uniques
-        selected = []
-        selected_set = set()
-        attempts = 0
-        max_attempts = len(weighted_cards) * 2  # Éviter les boucles infinies
-        
-        while len(selected) < DAILY_SACRIFICIAL_CARDS_COUNT and attempts < max_attempts:
-            if not weighted_cards:
-                break
-            
-            card = rng.choice(weighted_cards)
-            if card not in selected_set:
-                selected.append(card)
-                selected_set.add(card)
-            
-            attempts += 1
+        if isinstance(eligible_cards, dict):
+            card_counts = eligible_cards
+        else:
+            card_counts = {}
+            for card in eligible_cards:
+                card_counts[card] = card_counts.get(card, 0) + 1
         
-        return selected
+        return weighted_sample_without_replacement(card_counts, DAILY_SACRIFICIAL_CARDS_COUNT, rng)
     
+    def get_daily_sacrificial_selection(self, user_id: int,
+                                        load_card_counts: Callable[[float], Dict[Tuple[str, str], int]]) -> SacrificialSelection:
+        """
+        Retourne la sélection sacrificielle du jour, mémorisée jusqu'à minuit
+        ou jusqu'à un changement des cartes éligibles de l'utilisateur.
+
+        Args:
+            user_id: ID de l'utilisateur
+            load_card_counts: Lecture de l'inventaire {(category, name): quantité},
+                appelée seulement si la sélection n'est pas mémorisée, avec l'horodatage
+                de la dernière invalidation : un cache des cartes plus ancien doit être relu
+
+        Returns:
+            SacrificialSelection: Nombre de cartes éligibles, cartes sélectionnées et
+            quantités possédées de ces cartes
+        """
+        today = datetime.now(pytz.timezone("Europe/Paris")).strftime("%Y-%m-%d")
+
+        def compute() -> SacrificialSelection:
+            fresh_after = sacrificial_memo.invalidated_at(user_id)
+            eligible = {card: count for card, count in load_card_counts(fresh_after).items()
+                        if count > 0 and "(Full)" not in card[1]}
+            eligible_count = sum(eligible.values())
+            selected = []
+            if eligible_count >= DAILY_SACRIFICIAL_CARDS_COUNT:
+                selected = self.select_daily_sacrificial_cards(user_id, eligible)
+            return SacrificialSelection(eligible_count, selected, {card: eligible[card] for card in selected})
+
+        return sacrificial_memo.get_or_compute(user_id, today, compute)
+
+    @property
+    def daily_ledger(self) -> DrawLedger:
+        """Registre partagé des tirages journaliers."""
+        return DrawLedger.for_sheet(self.storage.sheet_daily_draw)
+
+    @property
+    def sacrificial_ledger(self) -> DrawLedger:
+        """Registre partagé des tirages sacrificiels."""
+        return DrawLedger.for_sheet(self.storage.sheet_sacrificial_draw)
+
     def can_perform_daily_draw(self, user_id: int, check_only: bool = True) -> bool:
         """
         Vérifie si un utilisateur peut effectuer son tirage journalier.
         Version unifiée qui peut aussi réserver le tirage si check_only=False.
+        La vérification se fait en mémoire via le registre des tirages.
 
         Args:
             user_id: ID de l'utilisateur
@@ -125,37 +182,15 @@ class DrawingManager:
             bool: True si le tirage est autorisé (et réservé si check_only=False)
         """
         try:
-            paris_tz = pytz.timezone("Europe/Paris")
-            now_paris = datetime.now(paris_tz)
-            today = now_paris.strftime("%Y-%m-%d")
-            user_id_str = str(user_id)
-
-            # Vérifier dans la feuille des tirages journaliers (pas de cache pour éviter l'incohérence)
-            all_rows = self.storage.sheet_daily_draw.get_all_values()
-            row_idx = next((i for i, r in enumerate(all_rows) if r and r[0] == user_id_str), None)
-
-            # Si l'utilisateur a déjà tiré aujourd'hui, refuser
-            if row_idx is not None and len(all_rows[row_idx]) > 1 and all_rows[row_idx][1] == today:
-                logging.debug(f"[DRAWING] Utilisateur {user_id} a déjà tiré aujourd'hui ({today})")
-                return False
-
-            logging.debug(f"[DRAWING] Utilisateur {user_id} peut tirer aujourd'hui ({today})")
-
-            # Si c'est juste une vérification, retourner True
             if check_only:
-                return True
+                can_draw = not self.daily_ledger.has_drawn_today(user_id)
+                logging.debug(f"[DRAWING] Utilisateur {user_id} peut tirer aujourd'hui: {can_draw}")
+                return can_draw
 
-            # Sinon, RÉSERVER immédiatement le tirage en l'enregistrant
-            if row_idx is not None:
-                # Mettre à jour la ligne existante (syntaxe correcte gspread)
-                self.storage.sheet_daily_draw.update_cell(row_idx + 1, 2, today)
-            else:
-                # Ajouter une nouvelle ligne
-                self.storage.sheet_daily_draw.append_row([user_id_str, today])
-
-            # Marquer que cet utilisateur a besoin d'une vérification d'upgrade via le cog principal
-            if hasattr(self.storage, '_cog_ref'):
-                self.storage._cog_ref._mark_user_for_upgrade_check(user_id)
+            # Sinon, RÉSERVER immédiatement le tirage (vérification et écriture atomiques)
+            if not self.daily_ledger.try_reserve(user_id):
+                logging.debug(f"[DRAWING] Utilisateur {user_id} a déjà tiré aujourd'hui")
+                return False
 
             logging.info(f"[DRAWING] Tirage journalier RÉSERVÉ avec succès pour l'utilisateur {user_id}")
             return True
@@ -181,7 +216,6 @@ class DrawingManager:
         """
         DEPRECATED: Utilisez reserve_daily_draw() à la place.
         Enregistre qu'un utilisateur a effectué son tirage journalier.
-        Optimisé avec invalidation du cache.
 
         Args:
             user_id: ID de l'utilisateur
@@ -190,34 +224,8 @@ class DrawingManager:
             bool: True si l'enregistrement a réussi
         """
         try:
-            paris_tz = pytz.timezone("Europe/Paris")
-            today = datetime.now(paris_tz).strftime("%Y-%m-%d")
-            user_id_str = str(user_id)
-
-            # Mettre à jour ou ajouter l'entrée
-            all_rows = self.storage.sheet_daily_draw.get_all_values()
-            row_idx = next((i for i, r in enumerate(all_rows) if r and r[0] == user_id_str), None)
-
-            if row_idx is not None:
-                # Mettre à jour la ligne existante
-                self.storage.sheet_daily_draw.update(f"B{row_idx + 1}", today)
-            else:
-                # Ajouter une nouvelle ligne
-                self.storage.sheet_daily_draw.append_row([user_id_str, today])
-
-            # Invalider le cache pour cet utilisateur APRÈS l'enregistrement
-            if hasattr(self, '_daily_draw_cache'):
-                cache_key = f"daily_draw_{user_id}_{today}"
-                self._daily_draw_cache[cache_key] = False
-                # Aussi invalider toutes les entrées de cache pour cet utilisateur
-                keys_to_remove = [k for k in self._daily_draw_cache.keys() if k.startswith(f"daily_draw_{user_id}_")]
-                for k in keys_to_remove:
-                    del self._daily_draw_cache[k]
-
-            # Marquer que cet utilisateur a besoin d'une vérification d'upgrade via le cog principal
-            if hasattr(self.storage, '_cog_ref'):
-                self.storage._cog_ref._mark_user_for_upgrade_check(user_id)
-
+            if not self.daily_ledger.record(user_id):
+                return False
             logging.info(f"[DRAWING] Tirage journalier enregistré pour l'utilisateur {user_id}")
             return True
 
@@ -228,7 +236,7 @@ class DrawingManager:
     def can_perform_sacrificial_draw(self, user_id: int) -> bool:
         """
         Vérifie si un utilisateur peut effectuer son tirage sacrificiel.
-        Optimisé avec cache pour réduire les appels Google Sheets.
+        La vérification se fait en mémoire via le registre des tirages.
 
         Args:
             user_id: ID de l'utilisateur
@@ -237,38 +245,56 @@ class DrawingManager:
             bool: True si le tirage est autorisé
         """
         try:
-            paris_tz = pytz.timezone("Europe/Paris")
-            today = datetime.now(paris_tz).strftime("%Y-%m-%d")
-            user_id_str = str(user_id)
-
-            # Utiliser le cache pour éviter les appels répétés
-            cache_key = f"sacrificial_draw_{user_id}_{today}"
-            if hasattr(self, '_sacrificial_draw_cache'):
-                if cache_key in self._sacrificial_draw_cache:
-                    return self._sacrificial_draw_cache[cache_key]
-            else:
-                self._sacrificial_draw_cache = {}
-
-            # Vérifier dans la feuille des tirages sacrificiels
-            all_rows = self.storage.sheet_sacrificial_draw.get_all_values()
-            row_idx = next((i for i, r in enumerate(all_rows) if r and r[0] == user_id_str), None)
-
-            can_draw = True
-            if row_idx is not None and len(all_rows[row_idx]) > 1 and all_rows[row_idx][1] == today:
-                can_draw = False  # Déjà tiré aujourd'hui
-
-            # Mettre en cache le résultat
-            self._sacrificial_draw_cache[cache_key] = can_draw
-            return can_draw
+            return not self.sacrificial_ledger.has_drawn_today(user_id)
 
         except Exception as e:
             logging.error(f"[DRAWING] Erreur lors de la vérification du tirage sacrificiel: {e}")
             return False
 
+    def reserve_sacrificial_draw(self, user_id: int) -> bool:
+        """
+        Réserve atomiquement le tirage sacrificiel d'un utilisateur.
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            bool: True si la réservation a réussi (utilisateur peut tirer)
+        """
+        try:
+            if not self.sacrificial_ledger.try_reserve(user_id):
+                logging.debug(f"[DRAWING] Utilisateur {user_id} a déjà fait son tirage sacrificiel aujourd'hui")
+                return False
+            logging.info(f"[DRAWING] Tirage sacrificiel RÉSERVÉ pour l'utilisateur {user_id}")
+            return True
+
+        except Exception as e:
+            logging.error(f"[DRAWING] Erreur lors de la réservation du tirage sacrificiel: {e}")
+            return False
+
+    def release_sacrificial_draw(self, user_id: int) -> bool:
+        """
+        Annule la réservation du tirage sacrificiel (sacrifice non abouti).
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            bool: True si la réservation a été annulée
+        """
+        try:
+            if not self.sacrificial_ledger.release(user_id):
+                return False
+            logging.info(f"[DRAWING] Réservation du tirage sacrificiel annulée pour l'utilisateur {user_id}")
+            return True
+
+        except Exception as e:
+            logging.error(f"[DRAWING] Erreur lors de l'annulation du tirage sacrificiel: {e}")
+            return False
+
     def record_sacrificial_draw(self, user_id: int) -> bool:
         """
         Enregistre qu'un utilisateur a effectué son tirage sacrificiel.
-        Optimisé avec invalidation du cache.
 
         Args:
             user_id: ID de l'utilisateur
@@ -277,34 +303,8 @@ class DrawingManager:
             bool: True si l'enregistrement a réussi
         """
         try:
-            paris_tz = pytz.timezone("Europe/Paris")
-            today = datetime.now(paris_tz).strftime("%Y-%m-%d")
-            user_id_str = str(user_id)
-
-            # Mettre à jour ou ajouter l'entrée
-            all_rows = self.storage.sheet_sacrificial_draw.get_all_values()
-            row_idx = next((i for i, r in enumerate(all_rows) if r and r[0] == user_id_str), None)
-
-            if row_idx is not None:
-                # Mettre à jour la ligne existante
-                self.storage.sheet_sacrificial_draw.update(f"B{row_idx + 1}", today)
-            else:
-                # Ajouter une nouvelle ligne
-                self.storage.sheet_sacrificial_draw.append_row([user_id_str, today])
-
-            # Invalider le cache pour cet utilisateur APRÈS l'enregistrement
-            if hasattr(self, '_sacrificial_draw_cache'):
-                cache_key = f"sacrificial_draw_{user_id}_{today}"
-                self._sacrificial_draw_cache[cache_key] = False
-                # Aussi invalider toutes les entrées de cache pour cet utilisateur
-                keys_to_remove = [k for k in self._sacrificial_draw_cache.keys() if k.startswith(f"sacrificial_draw_{user_id}_")]
-                for k in keys_to_remove:
-                    del self._sacrificial_draw_cache[k]
-
-            # Marquer que cet utilisateur a besoin d'une vérification d'upgrade via le cog principal
-            if hasattr(self.storage, '_cog_ref'):
-                self.storage._cog_ref._mark_user_for_upgrade_check(user_id)
-
+            if not self.sacrificial_ledger.record(user_id):
+                return False
             logging.info(f"[DRAWING] Tirage sacrificiel enregistré pour l'utilisateur {user_id}")
             return True
 
@@ -315,25 +315,14 @@ class DrawingManager:
 
     def clear_sacrificial_cache(self, user_id: int = None):
         """
-        Nettoie le cache du tirage sacrificiel.
+        Force le rechargement du registre des tirages sacrificiels depuis la feuille
+        (utile après une modification manuelle de la feuille).
 
         Args:
-            user_id: Si spécifié, nettoie seulement le cache de cet utilisateur.
-                    Sinon, nettoie tout le cache.
+            user_id: Conservé pour compatibilité ; le registre est rechargé en entier.
         """
-        if not hasattr(self, '_sacrificial_draw_cache'):
-            return
-
+        self.sacrificial_ledger.invalidate()
         if user_id is not None:
-            # Nettoyer seulement pour cet utilisateur
-            keys_to_remove = [k for k in self._sacrificial_draw_cache.keys()
-                             if k.startswith(f"sacrificial_draw_{user_id}_")]
-            for k in keys_to_remove:
-                del self._sacrificial_draw_cache[k]
-            logging.info(f"[DRAWING] Cache sacrificiel nettoyé pour l'utilisateur {user_id}")
+            logging.info(f"[DRAWING] Registre sacrificiel invalidé (demande pour l'utilisateur {user_id})")
         else:
-            # Nettoyer tout le cache
-            self._sacrificial_draw_cache.clear()
-            logging.info("[DRAWING] Cache sacrificiel entièrement nettoyé")
-
-
+            logging.info("[DRAWING] Registre sacrificiel invalidé")
@@ -0,0 +1,151 @@
+"""
+Tas d'échéances pour les éléments qui expirent (demandes d'échange, offres du tableau).
+Un seul minuteur dort jusqu'à la prochaine échéance et ne traite que les
+éléments arrivés à expiration ; un ajout plus proche réveille le minuteur.
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional
+
+# Délai avant un nouvel essai quand le traitement des éléments échus a échoué
+RETRY_DELAY = 60
+
+
+class ExpiryHeap:
+    """
+    Tas min de (échéance, clé), utilisable depuis n'importe quel thread.
+
+    Une clé réinsérée remplace son échéance précédente ; une clé retirée est
+    ignorée quand son entrée arrive en tête du tas (suppression paresseuse).
+    """
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._deadlines: Dict[Hashable, float] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def push(self, key: Hashable, expires_at: datetime):
+        """Ajoute (ou replanifie) une clé."""
+        deadline = expires_at.timestamp()
+        with self._lock:
+            if self._deadlines.get(key) == deadline:
+                return  # Déjà planifiée (resynchronisation)
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, next(self._seq), key))
+            earliest = self._heap[0][2] == key
+        if earliest:
+            self._notify()
+
+    def discard(self, key: Hashable):
+        """Retire une clé (traitée ou annulée avant son échéance)."""
+        with self._lock:
+            self._deadlines.pop(key, None)
+
+    def _drop_stale(self):
+        while self._heap:
+            deadline, _, key = self._heap[0]
+            if self._deadlines.get(key) == deadline:
+                return
+            heapq.heappop(self._heap)
+
+    def next_deadline(self) -> Optional[float]:
+        """Timestamp de la prochaine échéance (None si le tas est vide)."""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Hashable]:
+        """Retire et retourne les clés dont l'échéance est passée."""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, key = heapq.heappop(self._heap)
+                del self._deadlines[key]
+                due.append(key)
+                self._drop_stale()
+        return due
+
+    def _notify(self):
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # Boucle arrêtée
+
+    @property
+    def running(self) -> bool:
+        """True si un minuteur tourne déjà sur ce tas."""
+        return self._loop is not None
+
+    async def run(self, handler: Callable[[List[Hashable]], None],
+                  resync: Optional[Callable[[], None]] = None,
+                  resync_interval: Optional[float] = None):
+        """
+        Minuteur : attend la prochaine échéance puis appelle handler(clés échues)
+        dans un thread. En cas d'erreur, les clés sont replanifiées après RETRY_DELAY.
+
+        Un seul minuteur tourne par tas : un second appel attend en réserve et
+        prend le relais si le premier s'arrête.
+
+        Args:
+            handler: Fonction synchrone qui traite les clés échues
+            resync: Fonction synchrone qui recharge les échéances depuis la source
+                (éléments ajoutés par un autre processus)
+            resync_interval: Délai maximal entre deux appels à resync
+        """
+        while self._loop is not None:
+            await asyncio.sleep(resync_interval or RETRY_DELAY)
+
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        next_resync = time.time() + resync_interval if resync and resync_interval else None
+        try:
+            while True:
+                self._wake.clear()
+                if next_resync is not None and time.time() >= next_resync:
+                    try:
+                        await asyncio.to_thread(resync)
+                    except Exception as e:
+                        logging.error(f"[EXPIRY] Erreur lors de la resynchronisation des échéances: {e}")
+                    next_resync = time.time() + resync_interval
+
+                deadline = self.next_deadline()
+                delay = None if deadline is None else deadline - time.time()
+                if next_resync is not None:
+                    until_resync = next_resync - time.time()
+                    delay = until_resync if delay is None else min(delay, until_resync)
+                if delay is None or delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                due = self.pop_due()
+                if not due:
+                    continue
+                try:
+                    await asyncio.to_thread(handler, due)
+                except Exception as e:
+                    logging.error(f"[EXPIRY] Erreur lors du traitement de {len(due)} éléments échus: {e}")
+                    retry_at = datetime.fromtimestamp(time.time() + RETRY_DELAY)
+                    for key in due:
+                        self.push(key, retry_at)
+        finally:
+            self._loop = None
+            self._wake = None
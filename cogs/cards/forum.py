@@ -3,24 +3,52 @@ Gestion du forum des cartes.
 Gère la création de threads, le posting des cartes découvertes, etc.
 """
 
+import os
+import json
+import time
+import hashlib
 import asyncio
+import tempfile
+import threading
 import logging
 import discord
 import io
-from typing import Dict, Optional, List, Tuple
+import re
+from typing import Awaitable, Callable, Dict, Optional, List, Tuple
+from googleapiclient.discovery import build
+
+from .config import (
+    CARD_FORUM_CHANNEL_ID, ALL_CATEGORIES, FORUM_REBUILD_PREFETCH, FORUM_STATE_PATH,
+    FORUM_HEADER_UPDATE_INTERVAL,
+)
+from utils.discord_scheduler import outbound, Priority
 
-from .config import CARD_FORUM_CHANNEL_ID, ALL_CATEGORIES
 from .discovery import DiscoveryManager
+from .image_cache import card_image_cache
+from .attachments import attachment_registry
 
 
 class ForumManager:
     """Gestionnaire du forum des cartes."""
 
-    def __init__(self, bot, discovery_manager: DiscoveryManager):
+    def __init__(self, bot, discovery_manager: DiscoveryManager, credentials=None):
         self.bot = bot
         self.discovery_manager = discovery_manager
+        # Identifiants Google pour créer un client Drive par thread de téléchargement
+        self.credentials = credentials
+        self._local = threading.local()
+        self._shared_drive_lock = threading.Lock()
         self.category_threads = {}  # Cache for category thread IDs
         self.thread_cache_time = 0
+        # ID du message de statut par catégorie (0 = aucun message de statut)
+        self.status_messages: Dict[str, int] = {}
+        # Empreinte du dernier en-tête envoyé pour chaque thread
+        self._header_hashes: Dict[str, str] = {}
+        # Catégories dont l'en-tête doit être mis à jour lors du prochain regroupement
+        self._dirty_headers: set = set()
+        self._header_flush_task: Optional[asyncio.Task] = None
+        self._last_header_flush = 0.0
+        self._load_state()
 
         # Couleurs par catégorie pour les embeds
         self.category_colors = {
@@ -36,6 +64,59 @@ class ForumManager:
             "Full": 0xfd79a8          # Rose
         }
     
+    def _load_state(self):
+        """Charge les IDs de threads et de messages de statut enregistrés localement."""
+        try:
+            with open(FORUM_STATE_PATH, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"[FORUM] État du forum illisible, il sera reconstruit: {e}")
+            return
+
+        for category, ids in state.items():
+            if ids.get("thread_id"):
+                self.category_threads[category] = int(ids["thread_id"])
+            if ids.get("status_message_id") is not None:
+                self.status_messages[category] = int(ids["status_message_id"])
+
+    def _save_state(self):
+        """Enregistre les IDs de threads et de messages de statut (fichier temporaire renommé)."""
+        state = {
+            category: {
+                "thread_id": self.category_threads.get(category),
+                "status_message_id": self.status_messages.get(category),
+            }
+            for category in set(self.category_threads) | set(self.status_messages)
+        }
+        directory = os.path.dirname(FORUM_STATE_PATH)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False)
+                os.replace(tmp_path, FORUM_STATE_PATH)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logging.warning(f"[FORUM] Écriture impossible de l'état du forum: {e}")
+
+    def _remember_thread(self, category: str, thread_id: int):
+        """Enregistre le thread d'une catégorie."""
+        if self.category_threads.get(category) != thread_id:
+            self.category_threads[category] = thread_id
+            self.status_messages.pop(category, None)
+            self._save_state()
+
+    def _remember_status_message(self, category: str, message_id: int):
+        """Enregistre le message de statut d'une catégorie (0 si le thread n'en a pas)."""
+        if self.status_messages.get(category) != message_id:
+            self.status_messages[category] = message_id
+            self._save_state()
+
     def get_all_card_categories(self) -> List[str]:
         """Retourne la liste complète des catégories de cartes."""
         return ALL_CATEGORIES.copy()
@@ -106,27 +187,29 @@ class ForumManager:
                 try:
                     # Utiliser bot.get_channel pour récupérer le thread par son ID
                     thread = self.bot.get_channel(thread_id)
-                    if thread and isinstance(thread, discord.Thread) and not thread.archived:
-                        return thread
                     # Si pas dans le cache, essayer de le fetch
                     if not thread:
                         thread = await self.bot.fetch_channel(thread_id)
-                        if thread and isinstance(thread, discord.Thread) and not thread.archived:
-                            return thread
+                    if thread and isinstance(thread, discord.Thread):
+                        if thread.archived:
+                            await thread.edit(archived=False)
+                        return thread
                 except (discord.NotFound, discord.Forbidden):
                     # Thread supprimé ou inaccessible, retirer du cache
                     del self.category_threads[category]
+                    self.status_messages.pop(category, None)
+                    self._save_state()
             
             # Chercher le thread existant dans les threads actifs
             for thread in forum_channel.threads:
                 if thread.name == category:
-                    self.category_threads[category] = thread.id
+                    self._remember_thread(category, thread.id)
                     return thread
 
             # Chercher dans les threads archivés
             async for thread in forum_channel.archived_threads(limit=None):
                 if thread.name == category:
-                    self.category_threads[category] = thread.id
+                    self._remember_thread(category, thread.id)
                     if thread.archived:
                         await thread.edit(archived=False)
                     return thread
@@ -135,7 +218,7 @@ class ForumManager:
             # (au cas où un thread aurait été créé entre-temps)
             for thread in forum_channel.threads:
                 if thread.name == category:
-                    self.category_threads[category] = thread.id
+                    self._remember_thread(category, thread.id)
                     logging.info(f"[FORUM] Thread {category} trouvé lors de la vérification finale")
                     return thread
 
@@ -148,7 +231,7 @@ class ForumManager:
                 content=initial_message
             )
 
-            self.category_threads[category] = thread.id
+            self._remember_thread(category, thread.id)
             logging.info(f"[FORUM] Thread créé pour la catégorie: {category}")
             return thread
             
@@ -247,6 +330,27 @@ class ForumManager:
 
         return embed
 
+    async def _find_status_message(self, thread: discord.Thread, category: str) -> Optional[discord.PartialMessage]:
+        """
+        Retourne le message de statut d'une catégorie, None s'il n'existe pas.
+        L'ID enregistré est utilisé directement ; l'historique du thread n'est
+        parcouru que si l'ID est inconnu.
+        """
+        message_id = self.status_messages.get(category)
+        if message_id is not None:
+            return thread.get_partial_message(message_id) if message_id else None
+
+        async for message in thread.history(limit=50):
+            if (message.author == self.bot.user and
+                message.embeds and
+                len(message.embeds) > 0 and
+                "Statut de la catégorie" in str(message.embeds[0].title or "")):
+                self._remember_status_message(category, message.id)
+                return thread.get_partial_message(message.id)
+
+        self._remember_status_message(category, 0)
+        return None
+
     async def update_category_status_message(self, thread: discord.Thread, category: str,
                                            cards_by_category: dict = None, upgrade_cards_by_category: dict = None) -> bool:
         """
@@ -264,53 +368,126 @@ class ForumManager:
         try:
             # Récupérer les statistiques de la catégorie
             stats = self.get_category_stats(category, cards_by_category, upgrade_cards_by_category)
+            status_message = await self._find_status_message(thread, category)
 
             # Si toutes les cartes sont découvertes, supprimer le message de statut s'il existe
             if stats['missing'] == 0:
-                # Chercher et supprimer le message de statut existant
-                async for message in thread.history(limit=50):
-                    if (message.author == self.bot.user and
-                        message.embeds and
-                        len(message.embeds) > 0 and
-                        "Statut de la catégorie" in str(message.embeds[0].title or "")):
-                        try:
-                            await message.delete()
-                            logging.info(f"[FORUM] Message de statut supprimé pour {category} (catégorie complète)")
-                        except:
-                            pass
-                        break
+                if status_message:
+                    try:
+                        await status_message.delete()
+                        logging.info(f"[FORUM] Message de statut supprimé pour {category} (catégorie complète)")
+                    except discord.NotFound:
+                        pass
+                    self._remember_status_message(category, 0)
                 return True
 
             # Créer l'embed de statut
             status_embed = self.create_missing_cards_embed(category, stats)
 
-            # Chercher un message de statut existant
-            status_message = None
-            async for message in thread.history(limit=50):
-                if (message.author == self.bot.user and
-                    message.embeds and
-                    len(message.embeds) > 0 and
-                    "Statut de la catégorie" in str(message.embeds[0].title or "")):
-                    status_message = message
-                    break
-
             if status_message:
                 # Mettre à jour le message existant
-                await status_message.edit(embed=status_embed)
-                logging.info(f"[FORUM] Message de statut mis à jour pour {category}")
-            else:
-                # Créer un nouveau message de statut
-                await thread.send(embed=status_embed)
-                logging.info(f"[FORUM] Nouveau message de statut créé pour {category}")
+                try:
+                    await outbound.edit(status_message, priority=Priority.STATUS, embed=status_embed)
+                    logging.info(f"[FORUM] Message de statut mis à jour pour {category}")
+                    return True
+                except discord.NotFound:
+                    # Message supprimé entre-temps : en recréer un
+                    self._remember_status_message(category, 0)
+
+            # Créer un nouveau message de statut
+            sent_message = await outbound.send(thread, priority=Priority.STATUS, embed=status_embed)
+            self._remember_status_message(category, sent_message.id)
+            logging.info(f"[FORUM] Nouveau message de statut créé pour {category}")
 
             return True
 
         except Exception as e:
             logging.error(f"[FORUM] Erreur lors de la mise à jour du statut pour {category}: {e}")
             return False
-    
+
+    async def update_category_thread_header(self, forum_channel: discord.ForumChannel, category: str,
+                                            stats: dict = None) -> bool:
+        """
+        Met à jour le message initial (en-tête) d'un thread de catégorie avec la progression.
+        Le message initial d'un thread de forum a le même ID que le thread : il est
+        modifié directement, sans lecture préalable, et seulement si son contenu a changé.
+
+        Args:
+            forum_channel: Canal forum Discord
+            category: Nom de la catégorie
+            stats: Statistiques de découverte (recalculées si None)
+
+        Returns:
+            bool: True si l'en-tête est à jour
+        """
+        thread = await self.get_or_create_category_thread(forum_channel, category)
+        if not thread:
+            return False
+
+        if stats is None:
+            stats = await asyncio.to_thread(self.discovery_manager.get_discovery_stats)
+        content = self._create_category_initial_message(category, stats)
+        content_hash = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+        if self._header_hashes.get(category) == content_hash:
+            return True
+
+        try:
+            await outbound.edit(thread.get_partial_message(thread.id), priority=Priority.STATUS, content=content)
+        except discord.NotFound:
+            logging.warning(f"[FORUM] Message initial introuvable pour le thread {category}")
+            return False
+
+        self._header_hashes[category] = content_hash
+        logging.info(f"[FORUM] En-tête du thread {category} mis à jour")
+        return True
+
+    def schedule_header_update(self, category: str):
+        """
+        Marque l'en-tête d'une catégorie comme à mettre à jour.
+
+        Les demandes sont regroupées : chaque en-tête est recalculé au plus une
+        fois par fenêtre de FORUM_HEADER_UPDATE_INTERVAL secondes, quel que soit
+        le nombre de découvertes pendant cette fenêtre.
+        """
+        self._dirty_headers.add(category)
+        if self._header_flush_task is None or self._header_flush_task.done():
+            self._header_flush_task = asyncio.create_task(self._flush_header_updates())
+
+    async def _flush_header_updates(self):
+        """Met à jour les en-têtes marqués, une fenêtre après la mise à jour précédente."""
+        while True:
+            delay = self._last_header_flush + FORUM_HEADER_UPDATE_INTERVAL - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self._dirty_headers:
+                return
+
+            categories, self._dirty_headers = self._dirty_headers, set()
+            self._last_header_flush = time.monotonic()
+
+            forum_channel = self.bot.get_channel(CARD_FORUM_CHANNEL_ID)
+            if not isinstance(forum_channel, discord.ForumChannel):
+                logging.error(f"[FORUM] Canal {CARD_FORUM_CHANNEL_ID} n'est pas un ForumChannel")
+                return
+
+            try:
+                # Statistiques communes à tous les en-têtes, calculées une fois par regroupement
+                stats = await asyncio.to_thread(self.discovery_manager.get_discovery_stats)
+            except Exception as e:
+                logging.error(f"[FORUM] Erreur lors du calcul des statistiques de découverte: {e}")
+                # Réessayer ces en-têtes à la fenêtre suivante
+                self._dirty_headers |= categories
+                continue
+
+            for category in categories:
+                try:
+                    await self.update_category_thread_header(forum_channel, category, stats)
+                except Exception as e:
+                    logging.error(f"[FORUM] Erreur mise à jour header {category}: {e}")
+
     async def post_card_to_forum(self, category: str, name: str, file_bytes: bytes,
-                               discoverer_name: str, discovery_index: int) -> bool:
+                               discoverer_name: str, discovery_index: int,
+                               file_id: Optional[str] = None) -> bool:
         """
         Poste une carte dans le forum.
         
@@ -320,6 +497,7 @@ class ForumManager:
             file_bytes: Données de l'image
             discoverer_name: Nom du découvreur
             discovery_index: Index de découverte
+            file_id: ID du fichier Drive, pour réutiliser la pièce jointe ailleurs
         
         Returns:
             bool: True si le post a réussi
@@ -339,21 +517,11 @@ class ForumManager:
 
             logging.info(f"[FORUM] Thread trouvé/créé: {thread.name} (ID: {thread.id})")
 
-            # Créer le fichier Discord avec un nom constant pour l'attachment
-            filename = "card.png"  # Nom constant pour l'URL attachment://
-
-            logging.info(f"[FORUM] Création du fichier Discord pour {name} ({len(file_bytes)} bytes)")
-            file = discord.File(
-                fp=io.BytesIO(file_bytes),
-                filename=filename
-            )
-
-            # Créer l'embed avec l'URL d'attachment
-            embed = self.create_card_embed(name, category, discoverer_name, discovery_index, f"attachment://{filename}")
-
             # Poster l'embed avec l'image attachée directement
             logging.info(f"[FORUM] Posting de l'embed avec image attachée pour {name} dans {category}")
-            sent_message = await thread.send(embed=embed, file=file)
+            sent_message = await self._send_card_message(
+                thread, category, name, file_bytes, discoverer_name, discovery_index, file_id
+            )
             logging.info(f"[FORUM] ✅ Carte postée automatiquement: {name} ({category}) par {discoverer_name} - Message ID: {sent_message.id}")
             return True
 
@@ -391,7 +559,7 @@ class ForumManager:
                 async for thread in forum_channel.archived_threads(limit=None):
                     if thread.name == category:
                         existing_threads.append(category)
-                        self.category_threads[category] = thread.id
+                        self._remember_thread(category, thread.id)
                         thread_exists = True
                         break
                 
@@ -400,9 +568,6 @@ class ForumManager:
                     thread = await self.get_or_create_category_thread(forum_channel, category)
                     if thread:
                         created_threads.append(category)
-                    
-                    # Petite pause pour éviter le rate limiting
-                    await asyncio.sleep(0.5)
             
             return created_threads, existing_threads
             
@@ -426,6 +591,11 @@ class ForumManager:
             Tuple[int, int]: (cartes_postées, erreurs)
         """
         try:
+            forum_channel = self.bot.get_channel(CARD_FORUM_CHANNEL_ID)
+            if not isinstance(forum_channel, discord.ForumChannel):
+                logging.error(f"[FORUM] Canal {CARD_FORUM_CHANNEL_ID} n'est pas un ForumChannel")
+                return 0, 0
+
             # Récupérer toutes les découvertes triées par index chronologique
             discoveries_cache = self.discovery_manager.storage.get_discoveries_cache()
 
@@ -433,72 +603,23 @@ class ForumManager:
                 return 0, 0
 
             # Trier par index de découverte (chronologique)
-            discovery_rows = discoveries_cache[1:]  # Skip header
-            discovery_rows.sort(key=lambda row: int(row[5]) if len(row) >= 6 and row[5].isdigit() else 0)
-
-            posted_count = 0
-            error_count = 0
+            discovery_rows = [row for row in discoveries_cache[1:] if len(row) >= 6]  # Skip header
+            discovery_rows.sort(key=lambda row: int(row[5]) if row[5].isdigit() else 0)
 
-            for row in discovery_rows:
-                if len(row) < 6:
-                    continue
-
-                cat, name, discoverer_id_str, discoverer_name, timestamp, discovery_index = row
-                discovery_index = int(discovery_index)
-
-                # Trouver le fichier de la carte
-                file_id = next(
-                    (f['id'] for f in all_files.get(cat, []) if f['name'].removesuffix(".png") == name),
-                    None
-                )
-                if not file_id:
-                    logging.warning(f"[FORUM] Fichier non trouvé pour {name} ({cat})")
-                    error_count += 1
-                    continue
-
-                # Télécharger l'image et poster dans le forum
-                try:
-                    if drive_service:
-                        # Télécharger l'image depuis Google Drive
-                        file_bytes = await self._download_drive_file(drive_service, file_id)
-                        if not file_bytes:
-                            logging.error(f"[FORUM] Impossible de télécharger {name} ({cat})")
-                            error_count += 1
-                            continue
-                    else:
-                        logging.warning(f"[FORUM] Service Drive non fourni, skip {name}")
-                        error_count += 1
-                        continue
-
-                    success = await self.post_card_to_forum(
-                        cat, name, file_bytes, discoverer_name, discovery_index
-                    )
-
-                    if success:
-                        posted_count += 1
-                        logging.info(f"[FORUM] Carte postée avec succès: {name} ({cat})")
-                    else:
-                        error_count += 1
-
-                    # Petite pause pour éviter le rate limiting
-                    await asyncio.sleep(0.5)
-
-                except Exception as e:
-                    logging.error(f"[FORUM] Erreur lors du post de {name}: {e}")
-                    error_count += 1
+            posted_count, error_count = await self._post_discoveries(
+                discovery_rows, all_files, drive_service,
+                lambda cat: self.get_or_create_category_thread(forum_channel, cat)
+            )
 
             # Mettre à jour les messages de statut pour toutes les catégories
             logging.info("[FORUM] Mise à jour des messages de statut des catégories...")
-            forum_channel = self.bot.get_channel(CARD_FORUM_CHANNEL_ID)
-            if isinstance(forum_channel, discord.ForumChannel):
-                for category in self.get_all_card_categories():
-                    try:
-                        thread = await self.get_or_create_category_thread(forum_channel, category)
-                        if thread:
-                            await self.update_category_status_message(thread, category, cards_by_category, upgrade_cards_by_category)
-                            await asyncio.sleep(0.5)  # Éviter le rate limiting
-                    except Exception as e:
-                        logging.error(f"[FORUM] Erreur lors de la mise à jour du statut pour {category}: {e}")
+            for category in self.get_all_card_categories():
+                try:
+                    thread = await self.get_or_create_category_thread(forum_channel, category)
+                    if thread:
+                        await self.update_category_status_message(thread, category, cards_by_category, upgrade_cards_by_category)
+                except Exception as e:
+                    logging.error(f"[FORUM] Erreur lors de la mise à jour du statut pour {category}: {e}")
 
             return posted_count, error_count
 
@@ -506,28 +627,175 @@ class ForumManager:
             logging.error(f"[FORUM] Erreur lors de la population du forum: {e}")
             return 0, 0
 
+    def _thread_drive_service(self):
+        """Client Drive propre au thread courant (les clients ne sont pas thread-safe)."""
+        service = getattr(self._local, "drive_service", None)
+        if service is None:
+            service = build("drive", "v3", credentials=self.credentials, cache_discovery=False)
+            self._local.drive_service = service
+        return service
+
     async def _download_drive_file(self, drive_service, file_id: str) -> bytes | None:
         """
         Télécharge un fichier depuis Google Drive de manière asynchrone.
+        Les téléchargements simultanés utilisent chacun le client Drive de leur thread.
 
         Args:
-            drive_service: Service Google Drive
+            drive_service: Service Google Drive (utilisé seulement sans identifiants)
             file_id: ID du fichier à télécharger
 
         Returns:
             bytes: Contenu du fichier ou None si erreur
         """
+        def execute() -> bytes:
+            if self.credentials is None:
+                # Sans identifiants, le client partagé est utilisé un téléchargement à la fois
+                with self._shared_drive_lock:
+                    return drive_service.files().get_media(fileId=file_id).execute()
+            return self._thread_drive_service().files().get_media(fileId=file_id).execute()
+
+        async def fetch() -> bytes | None:
+            try:
+                return await asyncio.to_thread(execute)
+            except Exception as e:
+                logging.error(f"[FORUM] Erreur lors du téléchargement du fichier {file_id}: {e}")
+                return None
+
+        return await card_image_cache.get_or_fetch(file_id, fetch)
+
+    @staticmethod
+    def _find_card_file_id(all_files: Dict[str, List[Dict]], category: str, name: str) -> Optional[str]:
+        """Retourne l'ID du fichier Drive d'une carte, None si introuvable."""
+        return next(
+            (f['id'] for f in all_files.get(category, []) if f['name'].removesuffix(".png") == name),
+            None
+        )
+
+    async def _send_card_message(self, thread: discord.Thread, category: str, name: str, file_bytes: bytes,
+                                 discoverer_name: str, discovery_index: int,
+                                 file_id: Optional[str] = None,
+                                 priority: Priority = Priority.STATUS) -> discord.Message:
+        """
+        Envoie le message d'une carte découverte dans un thread (via l'ordonnanceur partagé).
+
+        Returns:
+            discord.Message: Message envoyé
+        """
+        # Créer le fichier Discord avec un nom constant pour l'URL attachment://
+        filename = "card.png"
+        file = discord.File(fp=io.BytesIO(file_bytes), filename=filename)
+
+        # Créer l'embed avec l'URL d'attachment
+        embed = self.create_card_embed(name, category, discoverer_name, discovery_index, f"attachment://{filename}")
+
+        sent_message = await outbound.send(thread, priority=priority, embed=embed, file=file)
+        if file_id:
+            attachment_registry.learn_from_message(sent_message, {filename: file_id})
+        return sent_message
+
+    async def _post_discoveries(self, discovery_rows: List[List[str]], all_files: Dict[str, List[Dict]],
+                                drive_service, get_thread: Callable[[str], Awaitable[Optional[discord.Thread]]]) -> Tuple[int, int]:
+        """
+        Poste des découvertes dans l'ordre, en pipeline : les images suivantes
+        sont téléchargées (FORUM_REBUILD_PREFETCH à l'avance) pendant l'envoi des
+        messages. L'envoi passe par l'ordonnanceur partagé en priorité basse,
+        cadencé par les en-têtes de rate limit plutôt que par des pauses fixes.
+
+        Args:
+            discovery_rows: Lignes de découvertes triées (cat, nom, id, découvreur, date, index)
+            all_files: Dictionnaire des fichiers par catégorie
+            drive_service: Service Google Drive pour télécharger les images
+            get_thread: Retourne le thread d'une catégorie
+
+        Returns:
+            Tuple[int, int]: (cartes_postées, erreurs)
+        """
+        if not drive_service:
+            logging.error("[FORUM] Service Drive non fourni, aucune carte postée")
+            return 0, len(discovery_rows)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=FORUM_REBUILD_PREFETCH)
+
+        async def prefetch():
+            for row in discovery_rows:
+                file_id = self._find_card_file_id(all_files, row[0], row[1])
+                download = asyncio.create_task(self._download_drive_file(drive_service, file_id)) if file_id else None
+                await queue.put((row, file_id, download))
+            await queue.put(None)
+
+        producer = asyncio.create_task(prefetch())
+        posted_count = 0
+        error_count = 0
         try:
-            request = drive_service.files().get_media(fileId=file_id)
-            file_bytes = await asyncio.to_thread(request.execute)
-            return file_bytes
-        except Exception as e:
-            logging.error(f"[FORUM] Erreur lors du téléchargement du fichier {file_id}: {e}")
-            return None
+            while (item := await queue.get()) is not None:
+                row, file_id, download = item
+                cat, name, discoverer_id_str, discoverer_name, timestamp, discovery_index = row[:6]
+
+                if download is None:
+                    available_files = [f['name'] for f in all_files.get(cat, [])]
+                    logging.warning(f"[FORUM] Fichier non trouvé pour '{name}' dans {cat}")
+                    logging.warning(f"[FORUM] Fichiers disponibles: {available_files[:10]}...")  # Limiter pour éviter les logs trop longs
+                    error_count += 1
+                    continue
+
+                try:
+                    file_bytes = await download
+                    if not file_bytes:
+                        logging.error(f"[FORUM] Impossible de télécharger {name} ({cat}) - fichier vide")
+                        error_count += 1
+                        continue
+
+                    thread = await get_thread(cat)
+                    if not thread:
+                        logging.error(f"[FORUM] Impossible d'obtenir le thread pour {cat}")
+                        error_count += 1
+                        continue
+
+                    sent_message = await self._send_card_message(
+                        thread, cat, name, file_bytes, discoverer_name, int(discovery_index), file_id,
+                        priority=Priority.BULK
+                    )
+                    posted_count += 1
+                    logging.info(f"[FORUM] ✅ Carte postée: {name} ({cat}) n°{discovery_index} - Message ID: {sent_message.id}")
+
+                except discord.Forbidden as e:
+                    logging.error(f"[FORUM] Permissions insuffisantes pour poster {name}: {e}")
+                    error_count += 1
+                except discord.HTTPException as e:
+                    logging.error(f"[FORUM] Erreur HTTP Discord lors du post de {name}: {e}")
+                    error_count += 1
+                except Exception as e:
+                    logging.error(f"[FORUM] Erreur générale lors du post de {name}: {e}")
+                    import traceback
+                    logging.error(f"[FORUM] Traceback: {traceback.format_exc()}")
+                    error_count += 1
+        finally:
+            # Interruption : annuler les téléchargements encore en attente
+            producer.cancel()
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not None and item[2] is not None:
+                    item[2].cancel()
+
+        return posted_count, error_count
+
+    async def _last_posted_discovery_index(self, thread: discord.Thread) -> int:
+        """
+        Retourne l'index de la dernière découverte postée dans un thread (0 si aucune),
+        lu dans le pied de page du dernier message de carte.
+        """
+        async for message in thread.history(limit=50):
+            if message.author != self.bot.user or not message.embeds:
+                continue
+            match = re.search(r"→ (\d+)", message.embeds[0].footer.text or "")
+            if match:
+                return int(match.group(1))
+        return 0
 
     async def clear_and_rebuild_category_thread(self, category: str, all_files: Dict[str, List[Dict]],
                                               drive_service=None, cards_by_category: dict = None,
-                                              upgrade_cards_by_category: dict = None) -> Tuple[int, int]:
+                                              upgrade_cards_by_category: dict = None,
+                                              resume: bool = False) -> Tuple[int, int]:
         """
         Vide complètement un thread de catégorie et le reconstruit avec toutes les cartes découvertes.
 
@@ -537,6 +805,8 @@ class ForumManager:
             drive_service: Service Google Drive pour télécharger les images
             cards_by_category: Dictionnaire des cartes normales par catégorie
             upgrade_cards_by_category: Dictionnaire des cartes Full par catégorie
+            resume: Reprendre une reconstruction interrompue après la dernière carte postée,
+                sans vider le thread
 
         Returns:
             Tuple[int, int]: (cartes_postées, erreurs)
@@ -553,39 +823,22 @@ class ForumManager:
                 logging.error(f"[FORUM] Impossible d'obtenir le thread pour {category}")
                 return 0, 1
 
-            # Supprimer tous les messages du thread (sauf le premier message initial)
-            try:
-                messages_to_delete = []
-                message_count = 0
-                async for message in thread.history(limit=None):
-                    message_count += 1
-                    # Garder le premier message (message initial du thread)
-                    if message.id != thread.id:
-                        messages_to_delete.append(message)
-
-                logging.info(f"[FORUM] Thread {category}: {message_count} messages totaux, {len(messages_to_delete)} à supprimer")
-
-                if messages_to_delete:
-                    # Supprimer les messages par lots pour éviter le rate limiting
-                    for i in range(0, len(messages_to_delete), 10):
-                        batch = messages_to_delete[i:i+10]
-                        for message in batch:
-                            try:
-                                await message.delete()
-                                await asyncio.sleep(0.2)  # Pause pour éviter le rate limiting
-                            except discord.NotFound:
-                                pass  # Message déjà supprimé
-                            except Exception as e:
-                                logging.warning(f"[FORUM] Erreur lors de la suppression du message {message.id}: {e}")
-
-                    logging.info(f"[FORUM] Thread {category} vidé, {len(messages_to_delete)} messages supprimés")
-                else:
-                    logging.info(f"[FORUM] Thread {category} était déjà vide (sauf message initial)")
-
-            except Exception as e:
-                logging.error(f"[FORUM] Erreur lors du vidage du thread {category}: {e}")
-                # Ne pas retourner d'erreur, continuer avec la reconstruction
-                logging.info(f"[FORUM] Continuation de la reconstruction malgré l'erreur de vidage")
+            last_index = 0
+            if resume:
+                last_index = await self._last_posted_discovery_index(thread)
+                logging.info(f"[FORUM] Reprise de la reconstruction de {category} après la découverte n°{last_index}")
+            else:
+                # Supprimer tous les messages du thread (sauf le premier message initial).
+                # purge() supprime par lots de 100 les messages de moins de 14 jours
+                # et un par un les plus anciens (limite de l'API Discord).
+                try:
+                    deleted = await thread.purge(limit=None, check=lambda message: message.id != thread.id, bulk=True)
+                    self._remember_status_message(category, 0)
+                    logging.info(f"[FORUM] Thread {category} vidé, {len(deleted)} messages supprimés")
+                except Exception as e:
+                    logging.error(f"[FORUM] Erreur lors du vidage du thread {category}: {e}")
+                    # Ne pas retourner d'erreur, continuer avec la reconstruction
+                    logging.info(f"[FORUM] Continuation de la reconstruction malgré l'erreur de vidage")
 
             # Reconstruire le thread avec les cartes de cette catégorie
             discoveries_cache = self.discovery_manager.storage.get_discoveries_cache()
@@ -595,83 +848,21 @@ class ForumManager:
 
             # Filtrer et trier les découvertes pour cette catégorie
             discovery_rows = discoveries_cache[1:]  # Skip header
-            category_discoveries = [row for row in discovery_rows if len(row) >= 6 and row[0] == category]
-            category_discoveries.sort(key=lambda row: int(row[5]) if row[5].isdigit() else 0)
+            category_discoveries = [
+                row for row in discovery_rows
+                if len(row) >= 6 and row[0] == category and row[5].isdigit() and int(row[5]) > last_index
+            ]
+            category_discoveries.sort(key=lambda row: int(row[5]))
 
-            logging.info(f"[FORUM] Reconstruction {category}: {len(category_discoveries)} découvertes trouvées")
+            logging.info(f"[FORUM] Reconstruction {category}: {len(category_discoveries)} découvertes à poster")
             logging.info(f"[FORUM] Fichiers disponibles pour {category}: {len(all_files.get(category, []))}")
 
-            posted_count = 0
-            error_count = 0
-
-            for row in category_discoveries:
-                cat, name, discoverer_id_str, discoverer_name, timestamp, discovery_index = row
-                discovery_index = int(discovery_index)
-
-                logging.info(f"[FORUM] Traitement de la carte: {name} ({cat})")
-
-                # Trouver le fichier de la carte
-                file_id = next(
-                    (f['id'] for f in all_files.get(cat, []) if f['name'].removesuffix(".png") == name),
-                    None
-                )
-                if not file_id:
-                    # Debug détaillé pour comprendre pourquoi le fichier n'est pas trouvé
-                    available_files = [f['name'] for f in all_files.get(cat, [])]
-                    logging.warning(f"[FORUM] Fichier non trouvé pour '{name}' dans {cat}")
-                    logging.warning(f"[FORUM] Fichiers disponibles: {available_files[:10]}...")  # Limiter pour éviter les logs trop longs
-                    error_count += 1
-                    continue
-
-                # Télécharger l'image et poster dans le forum
-                try:
-                    if drive_service:
-                        logging.info(f"[FORUM] Téléchargement de {name} (ID: {file_id})")
-                        file_bytes = await self._download_drive_file(drive_service, file_id)
-                        if not file_bytes:
-                            logging.error(f"[FORUM] Impossible de télécharger {name} ({cat}) - fichier vide")
-                            error_count += 1
-                            continue
-                        logging.info(f"[FORUM] Fichier téléchargé: {len(file_bytes)} bytes")
-                    else:
-                        logging.error(f"[FORUM] Service Drive non fourni pour {name}")
-                        error_count += 1
-                        continue
-
-                    # Créer le fichier Discord avec un nom constant pour l'attachment
-                    filename = "card.png"  # Nom constant pour l'URL attachment://
-
-                    logging.info(f"[FORUM] Création du fichier Discord pour {name}")
-
-                    # Créer le fichier Discord
-                    file = discord.File(
-                        fp=io.BytesIO(file_bytes),
-                        filename=filename
-                    )
-
-                    # Créer l'embed avec l'URL d'attachment
-                    embed = self.create_card_embed(name, cat, discoverer_name, discovery_index, f"attachment://{filename}")
-
-                    # Poster l'embed avec l'image attachée directement
-                    logging.info(f"[FORUM] Posting de l'embed avec image attachée pour {name} dans le thread {thread.name} (ID: {thread.id})")
-                    sent_message = await thread.send(embed=embed, file=file)
-                    posted_count += 1
-                    logging.info(f"[FORUM] ✅ Carte repostée avec succès: {name} ({cat}) - Message ID: {sent_message.id}")
-
-                    # Petite pause pour éviter le rate limiting
-                    await asyncio.sleep(0.5)
+            async def get_thread(cat: str) -> discord.Thread:
+                return thread
 
-                except discord.HTTPException as e:
-                    logging.error(f"[FORUM] Erreur HTTP Discord lors du post de {name}: {e}")
-                    error_count += 1
-                except discord.Forbidden as e:
-                    logging.error(f"[FORUM] Permissions insuffisantes pour poster {name}: {e}")
-                    error_count += 1
-                except Exception as e:
-                    logging.error(f"[FORUM] Erreur générale lors du repost de {name}: {e}")
-                    import traceback
-                    logging.error(f"[FORUM] Traceback: {traceback.format_exc()}")
-                    error_count += 1
+            posted_count, error_count = await self._post_discoveries(
+                category_discoveries, all_files, drive_service, get_thread
+            )
 
             # Mettre à jour le message de statut pour cette catégorie
             try:
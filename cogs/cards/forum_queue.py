@@ -0,0 +1,322 @@
+"""
+File d'attente persistante des publications sur le forum des cartes.
+Les nouvelles découvertes sont enregistrées dans la feuille « File Forum »
+puis publiées par une tâche de fond, en dehors de l'interaction de tirage.
+Une entrée n'est marquée traitée qu'après sa publication : un redémarrage
+reprend les entrées encore en attente.
+"""
+
+import re
+import uuid
+import asyncio
+import threading
+import logging
+from datetime import datetime
+import pytz
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import discord
+import gspread
+
+from .config import CARD_FORUM_CHANNEL_ID, FORUM_PUBLISH_RETRY_DELAY, FORUM_PUBLISH_RETRY_MAX_DELAY
+
+if TYPE_CHECKING:
+    from ..Cards import Cards
+
+STATUS_COLUMN = 7
+
+
+class ForumQueueEntry:
+    """Carte en attente de publication sur le forum."""
+
+    def __init__(self, entry_id: str, category: str, name: str, discoverer_id: int,
+                 discoverer_name: str, timestamp: str, row: int = 0):
+        self.id = entry_id
+        self.category = category
+        self.name = name
+        self.discoverer_id = discoverer_id
+        self.discoverer_name = discoverer_name
+        self.timestamp = timestamp
+        self.row = row
+        self.attempts = 0
+
+    def __repr__(self):
+        return f"ForumQueueEntry(row={self.row}, category='{self.category}', name='{self.name}')"
+
+
+class ForumQueue:
+    """
+    File persistante (feuille id, category, name, discoverer_id, discoverer_name, timestamp, status).
+
+    Un ajout écrit toutes les cartes d'un tirage en une ligne chacune et un
+    seul appel ; une publication terminée met à jour une seule cellule. Les
+    lignes traitées sont effacées dès que la file est vide. Les entrées dont
+    l'écriture a échoué sont réécrites par persist_unsaved().
+    """
+
+    def __init__(self, sheet: gspread.Worksheet):
+        self.sheet = sheet
+        self._pending: Dict[str, ForumQueueEntry] = {}
+        self._unsaved: List[ForumQueueEntry] = []
+        self._done_rows = 0
+        self._lock = threading.RLock()
+
+    def load_pending(self) -> List[ForumQueueEntry]:
+        """Relit la feuille et retourne les entrées non traitées d'une exécution précédente."""
+        with self._lock:
+            all_rows = self.sheet.get_all_values()
+            pending = []
+            done_rows = 0
+            for i, row in enumerate(all_rows[1:], start=2):
+                if len(row) < 6 or not row[0]:
+                    continue
+                if len(row) >= STATUS_COLUMN and row[STATUS_COLUMN - 1] == "done":
+                    done_rows += 1
+                    continue
+                try:
+                    discoverer_id = int(row[3])
+                except ValueError:
+                    continue
+                if row[0] not in self._pending:  # Entrées ajoutées depuis le démarrage exclues
+                    pending.append(ForumQueueEntry(row[0], row[1], row[2], discoverer_id, row[4], row[5], i))
+            for entry in pending:
+                self._pending[entry.id] = entry
+            self._done_rows = done_rows
+            if pending:
+                logging.info(f"[FORUM] {len(pending)} publications en attente reprises depuis la file")
+            return pending
+
+    def enqueue(self, cards: List[Tuple[str, str]], discoverer_id: int, discoverer_name: str) -> List[ForumQueueEntry]:
+        """
+        Ajoute des cartes à la file.
+
+        Args:
+            cards: Liste de (catégorie, nom)
+            discoverer_id: ID Discord du joueur
+            discoverer_name: Nom d'affichage du joueur
+
+        Returns:
+            List[ForumQueueEntry]: Entrées ajoutées
+        """
+        if not cards:
+            return []
+        timestamp = datetime.now(pytz.timezone("Europe/Paris")).strftime("%Y-%m-%d %H:%M:%S")
+        entries = [
+            ForumQueueEntry(uuid.uuid4().hex[:12], cat, name, discoverer_id, discoverer_name, timestamp)
+            for cat, name in cards
+        ]
+
+        with self._lock:
+            for entry in entries:
+                self._pending[entry.id] = entry
+            if not self._append(entries):
+                # Publiées quand même ; la tâche de fond réessaie de les écrire avant chaque publication
+                self._unsaved.extend(entries)
+        return entries
+
+    def persist_unsaved(self) -> bool:
+        """
+        Réécrit dans la feuille les entrées encore en attente dont l'ajout avait échoué.
+
+        Returns:
+            bool: False si l'écriture a encore échoué
+        """
+        with self._lock:
+            if not self._unsaved:
+                return True
+            entries = [entry for entry in self._unsaved if entry.id in self._pending]
+            if entries and not self._append(entries):
+                return False
+            self._unsaved = []
+            if entries:
+                logging.info(f"[FORUM] {len(entries)} entrées réécrites dans la file de publication")
+            return True
+
+    def _append(self, entries: List[ForumQueueEntry]) -> bool:
+        """Écrit des entrées en un seul appel et retient leurs numéros de ligne."""
+        rows = [
+            [entry.id, entry.category, entry.name, str(entry.discoverer_id),
+             entry.discoverer_name, entry.timestamp, "pending"]
+            for entry in entries
+        ]
+        try:
+            response = self.sheet.append_rows(rows)
+        except Exception as e:
+            logging.error(f"[FORUM] Erreur lors de l'ajout à la file de publication: {e}")
+            return False
+
+        updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+        match = re.search(r"![A-Z]+(\d+)", updated_range)
+        first_row = int(match.group(1)) if match else 0
+        for i, entry in enumerate(entries):
+            entry.row = first_row + i if first_row else 0
+        return True
+
+    def mark_done(self, entry: ForumQueueEntry) -> bool:
+        """
+        Marque une entrée comme publiée, puis vide la feuille si plus rien n'est en attente.
+
+        Returns:
+            bool: False si la feuille n'a pas pu être mise à jour
+        """
+        with self._lock:
+            try:
+                if entry in self._unsaved:
+                    self._unsaved.remove(entry)  # Jamais écrite : rien à marquer
+                elif entry.row:
+                    self.sheet.update_cell(entry.row, STATUS_COLUMN, "done")
+                else:
+                    # Position inconnue : retrouver la ligne par son identifiant
+                    cell = self.sheet.find(entry.id, in_column=1)
+                    if cell:
+                        self.sheet.update_cell(cell.row, STATUS_COLUMN, "done")
+            except Exception as e:
+                logging.error(f"[FORUM] Erreur lors du marquage de {entry}: {e}")
+                return False
+
+            self._pending.pop(entry.id, None)
+            self._done_rows += 1
+            if not self._pending:
+                self._clear_done_rows()
+            return True
+
+    def _clear_done_rows(self):
+        """Efface les lignes traitées (la file est vide, aucune ligne n'est perdue)."""
+        try:
+            self.sheet.batch_clear(["A2:G"])
+            self._done_rows = 0
+        except Exception as e:
+            logging.warning(f"[FORUM] Impossible de vider la file de publication: {e}")
+
+
+class ForumPostingWorker:
+    """
+    Tâche de fond qui publie les découvertes de la file sur le forum.
+
+    Pour chaque entrée : enregistrement de la découverte, téléchargement de
+    l'image, publication dans le thread de la catégorie puis marquage dans
+    la file. Une entrée en échec est reprise plus tard (délai doublé à chaque
+    tentative). Les en-têtes des threads sont mis à jour quand la file est vide.
+    """
+
+    def __init__(self, cog: "Cards", queue: ForumQueue):
+        self.cog = cog
+        self.queue = queue
+        self._items: asyncio.Queue = asyncio.Queue()
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, cards: List[Tuple[str, str]], discoverer_id: int, discoverer_name: str):
+        """Enregistre des cartes dans la file persistante et réveille la tâche de fond."""
+        entries = await asyncio.to_thread(self.queue.enqueue, cards, discoverer_id, discoverer_name)
+        for entry in entries:
+            self._items.put_nowait((entry, False))
+
+    def start(self):
+        """Démarre la tâche de publication (et reprend les entrées en attente)."""
+        if self._running:
+            return
+
+        self._running = True
+        self._task = asyncio.create_task(self._worker_loop())
+        logging.info("[FORUM] Tâche de publication du forum lancée")
+
+    def stop(self):
+        """Arrête la tâche de publication (les entrées restent dans la file)."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        logging.info("[FORUM] Tâche de publication du forum arrêtée")
+
+    async def _worker_loop(self):
+        await self.cog.bot.wait_until_ready()
+
+        try:
+            for entry in await asyncio.to_thread(self.queue.load_pending):
+                self._items.put_nowait((entry, True))
+        except Exception as e:
+            logging.error(f"[FORUM] Erreur lors de la reprise de la file de publication: {e}")
+
+        new_draws: List[Tuple[str, str]] = []
+        while self._running:
+            entry, recovered = await self._items.get()
+            try:
+                await asyncio.to_thread(self.queue.persist_unsaved)
+                if await self._publish(entry, recovered):
+                    new_draws.append((entry.category, entry.name))
+                if not await asyncio.to_thread(self.queue.mark_done, entry):
+                    raise RuntimeError("marquage dans la file impossible")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"[FORUM] Erreur lors de la publication de {entry}: {e}")
+                self._retry_later(entry)
+
+            if self._items.empty() and new_draws:
+                await self.cog._update_progress_message(new_draws)
+                new_draws = []
+
+    def _retry_later(self, entry: ForumQueueEntry):
+        """
+        Replanifie une entrée en échec. Elle est reprise comme après un
+        redémarrage, la découverte ayant pu être enregistrée avant l'échec.
+        """
+        entry.attempts += 1
+        delay = min(FORUM_PUBLISH_RETRY_DELAY * 2 ** (entry.attempts - 1), FORUM_PUBLISH_RETRY_MAX_DELAY)
+        logging.info(f"[FORUM] Nouvelle tentative pour {entry} dans {delay} s")
+        asyncio.get_running_loop().call_later(delay, self._items.put_nowait, (entry, True))
+
+    async def _publish(self, entry: ForumQueueEntry, recovered: bool) -> bool:
+        """
+        Publie une entrée sur le forum.
+
+        Args:
+            entry: Entrée de la file
+            recovered: Entrée reprise après un redémarrage (peut déjà avoir été publiée)
+
+        Returns:
+            bool: True si une carte a été publiée
+        """
+        cog = self.cog
+        cat, name = entry.category, entry.name
+
+        # La carte a pu être découverte (et publiée) entre le tirage et la publication ;
+        # seule une entrée reprise après redémarrage peut avoir été enregistrée sans être publiée
+        discoveries_cache = await asyncio.to_thread(cog.storage.get_discoveries_cache)
+        existing = next(
+            (row for row in (discoveries_cache or [])[1:]
+             if len(row) >= 6 and row[0] == cat and row[1] == name),
+            None
+        )
+        if existing and (not recovered or existing[2] != str(entry.discoverer_id)):
+            return False
+
+        file_id = cog.get_card_file_id(cat, name)
+        if not file_id:
+            logging.warning(f"[FORUM] Fichier non trouvé pour {name} ({cat}), publication ignorée")
+            return False
+
+        discovery_index = await asyncio.to_thread(
+            cog.discovery_manager.log_discovery, cat, name, entry.discoverer_id, entry.discoverer_name
+        )
+
+        forum_manager = cog.forum_manager
+        if existing:
+            # Reprise : ne pas publier deux fois une carte déjà présente dans le thread
+            forum_channel = cog.bot.get_channel(CARD_FORUM_CHANNEL_ID)
+            if isinstance(forum_channel, discord.ForumChannel):
+                thread = await forum_manager.get_or_create_category_thread(forum_channel, cat)
+                if thread and await forum_manager._last_posted_discovery_index(thread) >= discovery_index:
+                    return False
+
+        file_bytes = await cog.download_drive_file(file_id)
+        if not file_bytes:
+            raise RuntimeError(f"Impossible de télécharger l'image pour {name} ({cat})")
+
+        success = await forum_manager.post_card_to_forum(
+            cat, name, file_bytes, entry.discoverer_name, discovery_index, file_id=file_id
+        )
+        if not success:
+            raise RuntimeError(f"Échec du post de la carte {name} ({cat}) dans le forum")
+        return True
@@ -0,0 +1,196 @@
+"""
+Cache des images de cartes, partagé par le bot et le site.
+Les images sont indexées par ID de fichier Drive et date de modification
+(modifiedTime) : une image modifiée sur Drive obtient une nouvelle clé.
+Un cache mémoire LRU borné en taille est placé devant un cache disque
+composé de fichiers bruts, lisibles directement par les deux processus.
+"""
+
+import os
+import re
+import asyncio
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from .config import CARD_IMAGE_CACHE_DIR, CARD_IMAGE_MEMORY_CACHE_BYTES
+
+
+class CardImageCache:
+    """Cache d'images à deux niveaux (mémoire LRU puis disque)."""
+
+    def __init__(self, directory: str = CARD_IMAGE_CACHE_DIR,
+                 max_memory_bytes: int = CARD_IMAGE_MEMORY_CACHE_BYTES):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+
+    def register_files(self, files: Iterable[Dict]):
+        """
+        Enregistre la date de modification des fichiers du catalogue Drive.
+
+        Args:
+            files: Fichiers Drive (dictionnaires avec 'id' et 'modifiedTime')
+        """
+        with self._lock:
+            for f in files:
+                if f.get('id') and f.get('modifiedTime'):
+                    self._versions[f['id']] = f['modifiedTime']
+
+    def key_for(self, file_id: str, modified_time: Optional[str] = None) -> str:
+        """Clé de contenu d'une image : ID du fichier et version."""
+        version = modified_time or self._versions.get(file_id) or "0"
+        return f"{file_id}_{re.sub(r'[^0-9A-Za-z]', '', version)}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    # ------------------------------------------------------------------
+    # Mémoire
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, data: bytes):
+        """Ajoute une image au cache mémoire en respectant la taille maximale."""
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def get(self, file_id: str, modified_time: Optional[str] = None) -> Optional[bytes]:
+        """
+        Retourne une image depuis le cache mémoire ou disque.
+
+        Args:
+            file_id: ID du fichier Drive
+            modified_time: Date de modification Drive (version enregistrée si None)
+
+        Returns:
+            Optional[bytes]: Contenu de l'image, None si absente
+        """
+        key = self.key_for(file_id, modified_time)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except OSError as e:
+            logging.warning(f"[CACHE] Lecture impossible de l'image {file_id} sur disque: {e}")
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._remember(key, data)
+        return data
+
+    def put(self, file_id: str, data: bytes, modified_time: Optional[str] = None):
+        """
+        Enregistre une image en mémoire et sur disque.
+
+        L'écriture disque passe par un fichier temporaire renommé, pour qu'un
+        autre processus ne lise jamais une image partielle.
+
+        Args:
+            file_id: ID du fichier Drive
+            data: Contenu de l'image
+            modified_time: Date de modification Drive (version enregistrée si None)
+        """
+        if not data:
+            return
+        key = self.key_for(file_id, modified_time)
+        self._remember(key, data)
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self._remove_stale_versions(file_id, key)
+        except OSError as e:
+            logging.warning(f"[CACHE] Écriture impossible de l'image {file_id} sur disque: {e}")
+
+    def _remove_stale_versions(self, file_id: str, current_key: str):
+        """Supprime du disque les anciennes versions d'une image."""
+        directory = os.path.dirname(self._path(current_key))
+        prefix = f"{file_id}_"
+        for entry in os.listdir(directory):
+            if entry.startswith(prefix) and entry != f"{current_key}.png" and entry.endswith(".png"):
+                try:
+                    os.unlink(os.path.join(directory, entry))
+                except OSError:
+                    pass
+
+    async def get_or_fetch(self, file_id: str, fetch: Callable[[], Awaitable[Optional[bytes]]],
+                           modified_time: Optional[str] = None) -> Optional[bytes]:
+        """
+        Retourne une image depuis le cache, ou la télécharge puis la met en cache.
+
+        Args:
+            file_id: ID du fichier Drive
+            fetch: Téléchargement de l'image en cas d'absence
+            modified_time: Date de modification Drive (version enregistrée si None)
+
+        Returns:
+            Optional[bytes]: Contenu de l'image, None si le téléchargement a échoué
+        """
+        data = await asyncio.to_thread(self.get, file_id, modified_time)
+        if data is not None:
+            return data
+
+        data = await fetch()
+        if data:
+            await asyncio.to_thread(self.put, file_id, data, modified_time)
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        """Statistiques du cache."""
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+# Instance partagée par le bot et le site (même processus en mode unifié)
+card_image_cache = CardImageCache()
@@ -529,3 +529,48 @@ class CardsLoggingManager:
             success = False
 
         return success
+
+    def log_card_upgrades_batch(self, upgrades: list, source: str = None) -> bool:
+        """
+        Enregistre plusieurs upgrades de cartes en une seule écriture.
+
+        Args:
+            upgrades: Liste de tuples (user_id, user_name, base_cards, upgraded_card)
+            source: Source de l'action (optionnel)
+
+        Returns:
+            bool: True si l'enregistrement a réussi
+        """
+        if not upgrades:
+            return True
+
+        try:
+            if not hasattr(self.storage, 'sheet_logs') or self.storage.sheet_logs is None:
+                logging.error(f"[LOGS] Feuille de logs non disponible")
+                return False
+
+            timestamp = self._get_timestamp()
+            rows = []
+            for user_id, user_name, base_cards, upgraded_card in upgrades:
+                for category, name in base_cards:
+                    rows.append([
+                        timestamp, self.ACTION_CARD_UPGRADE, str(user_id),
+                        user_name or f"User_{user_id}", category, name, "-1",
+                        "Upgrade de carte - Carte utilisée", source or "",
+                        json.dumps({"upgrade": True})
+                    ])
+                category, name = upgraded_card
+                rows.append([
+                    timestamp, self.ACTION_CARD_UPGRADE, str(user_id),
+                    user_name or f"User_{user_id}", category, name, "1",
+                    "Upgrade de carte - Carte Full obtenue", source or "",
+                    json.dumps({"upgrade": True, "full_card": True})
+                ])
+
+            self.storage.sheet_logs.append_rows(rows)
+            logging.info(f"[LOGS] ✅ {len(upgrades)} upgrades enregistrés en une seule écriture")
+            return True
+
+        except Exception as e:
+            logging.error(f"[LOGS] ❌ Erreur lors de l'enregistrement groupé des upgrades: {e}")
+            return False
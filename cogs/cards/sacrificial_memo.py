@@ -0,0 +1,99 @@
+"""
+Mémo journalier des sélections sacrificielles.
+La sélection étant déterministe par utilisateur et par jour, elle n'est
+recalculée que si les cartes éligibles de l'utilisateur ont changé.
+Une instance unique est partagée par le bot et le site (même processus).
+"""
+
+import time
+import threading
+import logging
+from typing import Callable, Dict, List, Tuple
+
+
+class SacrificialSelection:
+    """Sélection sacrificielle du jour pour un utilisateur."""
+
+    def __init__(self, eligible_count: int, cards: List[Tuple[str, str]],
+                 owned_counts: Dict[Tuple[str, str], int]):
+        self.eligible_count = eligible_count
+        self.cards = cards
+        self.owned_counts = owned_counts
+
+    def __repr__(self):
+        return f"SacrificialSelection(eligible_count={self.eligible_count}, cards={self.cards})"
+
+
+class SacrificialSelectionMemo:
+    """Mémo (user_id, date Paris, génération d'inventaire) -> sélection."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._generations: Dict[str, int] = {}
+        self._entries: Dict[str, Tuple[str, int, SacrificialSelection]] = {}
+        self._invalidated_at: Dict[str, float] = {}
+        self._day = None
+
+    def invalidate(self, user_id):
+        """Signale un changement des cartes éligibles d'un utilisateur."""
+        key = str(user_id)
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.pop(key, None)
+            self._invalidated_at[key] = time.time()
+
+    def invalidated_at(self, user_id) -> float:
+        """
+        Horodatage (time.time) de la dernière invalidation d'un utilisateur.
+
+        Le bot et le site ont chacun leur cache des cartes : un cache rempli
+        avant cet instant peut ignorer une modification faite par l'autre côté.
+
+        Returns:
+            float: Horodatage, 0 si l'utilisateur n'a jamais été invalidé
+        """
+        with self._lock:
+            return self._invalidated_at.get(str(user_id), 0.0)
+
+    def get_or_compute(self, user_id, today: str,
+                       compute: Callable[[], SacrificialSelection]) -> SacrificialSelection:
+        """
+        Retourne la sélection mémorisée ou la calcule.
+
+        Args:
+            user_id: ID de l'utilisateur
+            today: Date du jour (heure de Paris, format %Y-%m-%d)
+            compute: Calcul de la sélection en cas d'absence
+
+        Returns:
+            SacrificialSelection: Sélection du jour
+        """
+        key = str(user_id)
+        with self._lock:
+            generation = self._generations.get(key, 0)
+            entry = self._entries.get(key)
+            if entry and entry[0] == today and entry[1] == generation:
+                return entry[2]
+
+        selection = compute()
+
+        with self._lock:
+            # Ne mémoriser que si l'inventaire n'a pas changé pendant le calcul
+            if self._generations.get(key, 0) == generation:
+                if today != self._day:
+                    self._purge(today)
+                    self._day = today
+                self._entries[key] = (today, generation, selection)
+        return selection
+
+    def _purge(self, today: str):
+        """Supprime les entrées des jours précédents."""
+        stale = [key for key, entry in self._entries.items() if entry[0] != today]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            logging.debug(f"[DRAWING] {len(stale)} sélections sacrificielles expirées supprimées")
+
+
+# Instance partagée par le bot et le site
+sacrificial_memo = SacrificialSelectionMemo()
@@ -0,0 +1,205 @@
+"""
+Échantillonneur précompilé pour les tirages de cartes.
+Utilise la méthode des alias de Walker (variante de Vose) pour choisir la
+catégorie en temps constant, puis une carte uniformément dans la catégorie.
+"""
+
+import random
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .config import RARITY_WEIGHTS, ALL_CATEGORIES
+
+try:
+    import numpy as np
+except ImportError:  # numpy n'est requis que pour les tirages vectorisés
+    np = None
+
+
+def build_alias_table(weights: List[float]) -> Tuple[List[float], List[int]]:
+    """
+    Construit une table d'alias de Walker à partir de poids positifs.
+
+    Args:
+        weights: Poids (non nécessairement normalisés)
+
+    Returns:
+        Tuple: (probabilités de conservation, indices d'alias)
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    if n == 0 or total <= 0:
+        raise ValueError("La table d'alias nécessite au moins un poids positif")
+
+    scaled = [w * n / total for w in weights]
+    prob = [0.0] * n
+    alias = [0] * n
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+
+    # Les restes valent 1 aux erreurs d'arrondi près
+    for i in large + small:
+        prob[i] = 1.0
+        alias[i] = i
+
+    return prob, alias
+
+
+class CardSampler:
+    """Échantillonneur de cartes compilé depuis les poids de rareté et le catalogue."""
+
+    def __init__(self, cards_by_category: Dict[str, List[Dict]],
+                 weights: Optional[Dict[str, float]] = None,
+                 categories: Optional[List[str]] = None,
+                 seed: Optional[int] = None):
+        self.cards_by_category = cards_by_category
+        self.weights = weights if weights is not None else RARITY_WEIGHTS
+        self.categories = list(categories) if categories is not None else list(ALL_CATEGORIES)
+
+        self._rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed) if np is not None else None
+        self._signature = None
+
+        # Tables compilées
+        self._prob: List[float] = []
+        self._alias: List[int] = []
+        self._names: List[List[str]] = []
+        self._np_prob = None
+        self._np_alias = None
+        self._np_sizes = None
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _current_signature(self) -> tuple:
+        """Empreinte légère des poids et du catalogue pour détecter les changements."""
+        return (
+            tuple(self.weights.get(cat, 0.0) for cat in self.categories),
+            tuple((id(self.cards_by_category.get(cat)), len(self.cards_by_category.get(cat, [])))
+                  for cat in self.categories),
+        )
+
+    def invalidate(self):
+        """Force la recompilation au prochain tirage (catalogue ou poids modifiés)."""
+        self._signature = None
+
+    def _ensure_compiled(self):
+        """Recompile les tables si le catalogue ou les poids ont changé."""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+
+        self._prob, self._alias = build_alias_table([self.weights.get(cat, 0.0) for cat in self.categories])
+        self._names = [
+            [f['name'].removesuffix('.png') for f in self.cards_by_category.get(cat, [])]
+            for cat in self.categories
+        ]
+
+        if np is not None:
+            self._np_prob = np.asarray(self._prob, dtype=np.float64)
+            self._np_alias = np.asarray(self._alias, dtype=np.int64)
+            self._np_sizes = np.asarray([len(names) for names in self._names], dtype=np.int64)
+
+        self._signature = signature
+        logging.debug(f"[DRAWING] Échantillonneur recompilé ({sum(len(n) for n in self._names)} cartes)")
+
+    def seed(self, seed: Optional[int]):
+        """
+        Réinitialise les générateurs aléatoires pour rejouer une séquence de tirages.
+
+        Args:
+            seed: Graine (None pour une graine aléatoire)
+        """
+        self._rng.seed(seed)
+        if np is not None:
+            self._np_rng = np.random.default_rng(seed)
+
+    # ------------------------------------------------------------------
+    # Tirages
+    # ------------------------------------------------------------------
+
+    def _sample_category(self) -> int:
+        """Tire un index de catégorie via la table d'alias."""
+        x = self._rng.random() * len(self._prob)
+        i = int(x)
+        return i if x - i < self._prob[i] else self._alias[i]
+
+    def draw(self, number: int) -> List[Tuple[str, str]]:
+        """
+        Tire `number` cartes. Une catégorie vide ne produit pas de carte,
+        comme dans le tirage historique.
+
+        Args:
+            number: Nombre de cartes à tirer
+
+        Returns:
+            List[Tuple[str, str]]: Cartes tirées (category, name)
+        """
+        self._ensure_compiled()
+        drawn = []
+        for _ in range(number):
+            cat_index = self._sample_category()
+            names = self._names[cat_index]
+            if not names:
+                continue
+            drawn.append((self.categories[cat_index], names[int(self._rng.random() * len(names))]))
+        return drawn
+
+    def draw_indices(self, n: int):
+        """
+        Tire `n` cartes de manière vectorisée et retourne les indices bruts.
+
+        Args:
+            n: Nombre de cartes à tirer
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (indices de catégorie, indices de carte) de
+            longueur `n` ; l'indice de carte vaut -1 si la catégorie tirée est vide
+        """
+        if np is None:
+            raise RuntimeError("numpy est requis pour les tirages vectorisés")
+
+        self._ensure_compiled()
+        k = len(self._np_prob)
+        x = self._np_rng.random(n) * k
+        i = x.astype(np.int64)
+        cat_indices = np.where(x - i < self._np_prob[i], i, self._np_alias[i])
+
+        sizes = self._np_sizes[cat_indices]
+        card_indices = (self._np_rng.random(n) * sizes).astype(np.int64)
+        card_indices[sizes == 0] = -1
+        return cat_indices, card_indices
+
+    def compiled_names(self) -> List[List[str]]:
+        """Retourne les noms de cartes compilés, dans l'ordre de ``self.categories``."""
+        self._ensure_compiled()
+        return self._names
+
+    def draw_many(self, n: int) -> List[Tuple[str, str]]:
+        """
+        Tire `n` cartes en une fois (vectorisé si numpy est disponible).
+
+        Args:
+            n: Nombre de cartes à tirer
+
+        Returns:
+            List[Tuple[str, str]]: Cartes tirées (category, name)
+        """
+        if np is None:
+            return self.draw(n)
+
+        cat_indices, card_indices = self.draw_indices(n)
+        return [
+            (self.categories[c], self._names[c][j])
+            for c, j in zip(cat_indices.tolist(), card_indices.tolist())
+            if j >= 0
+        ]
@@ -11,6 +11,10 @@ import gspread
 
 from .config import CACHE_VALIDITY_DURATION
 
+# Verrou du tableau d'échanges, commun au stockage du bot et à celui du site
+# quand ils tournent dans le même processus
+BOARD_LOCK = threading.RLock()
+
 
 class CardsStorage:
     """Gestionnaire de stockage et cache pour les cartes."""
@@ -48,14 +52,17 @@ class CardsStorage:
         self.vault_cache_time = 0
         self.discoveries_cache = None
         self.discoveries_cache_time = 0
+        # Index (catégorie, nom) -> ligne, reconstruit quand le cache des cartes change
+        self._cards_row_index = {}
+        self._cards_row_index_source = None
 
         # Verrous pour thread safety
         self._cards_lock = threading.RLock()
         self._vault_lock = threading.RLock()
         self._cache_lock = threading.RLock()
         self._discoveries_lock = threading.RLock()
-        # Verrou spécifique pour le tableau d'échanges
-        self._board_lock = threading.RLock()
+        # Verrou spécifique pour le tableau d'échanges (partagé avec le site)
+        self._board_lock = BOARD_LOCK
     
     def _init_worksheets(self):
         """Initialise les feuilles de calcul nécessaires."""
@@ -126,6 +133,18 @@ class CardsStorage:
             # Initialiser l'en-tête
             self.sheet_bonus.append_row(["user_id", "count", "source"])
 
+        # Feuille de la file de publication du forum
+        try:
+            self.sheet_forum_queue = self.spreadsheet.worksheet("File Forum")
+        except gspread.exceptions.WorksheetNotFound:
+            self.sheet_forum_queue = self.spreadsheet.add_worksheet(
+                title="File Forum", rows="1000", cols="7"
+            )
+            # Initialiser l'en-tête
+            self.sheet_forum_queue.append_row([
+                "id", "category", "name", "discoverer_id", "discoverer_name", "timestamp", "status"
+            ])
+
         # Feuille du tableau d'échanges
         self._init_exchange_sheet()
 
@@ -185,8 +204,10 @@ class CardsStorage:
         """Rafraîchit le cache des cartes."""
         with self._cache_lock:
             try:
+                # Horodatage pris avant la lecture : toute écriture antérieure y figure
+                started = time.time()
                 self.cards_cache = self.sheet_cards.get_all_values()
-                self.cards_cache_time = time.time()
+                self.cards_cache_time = started
                 logging.info("[CACHE] Cache des cartes rafraîchi")
             except Exception as e:
                 logging.error(f"[CACHE] Erreur lors du rafraîchissement du cache des cartes: {e}")
@@ -219,6 +240,26 @@ class CardsStorage:
                 self.refresh_cards_cache()
             return self.cards_cache
     
+    def get_card_row(self, category: str, name: str) -> Optional[List[str]]:
+        """
+        Retourne la ligne d'inventaire d'une carte sans parcourir tout le cache.
+
+        Args:
+            category: Catégorie de la carte
+            name: Nom de la carte
+
+        Returns:
+            Optional[List[str]]: Ligne [catégorie, nom, "id:quantité", ...] ou None
+        """
+        with self._cache_lock:
+            rows = self.get_cards_cache()
+            if rows is not self._cards_row_index_source:
+                self._cards_row_index = {
+                    (row[0], row[1]): row for row in (rows or [])[1:] if len(row) >= 2
+                }
+                self._cards_row_index_source = rows
+            return self._cards_row_index.get((category, name))
+
     def get_vault_cache(self) -> Optional[List[List[str]]]:
         """Retourne le cache du vault, le rafraîchit si nécessaire."""
         with self._vault_lock:
@@ -335,6 +376,31 @@ class CardsStorage:
             logging.error(f"[STORAGE] Erreur lors de la suppression d'une entrée d'échange: {e}")
             return False
 
+    def delete_exchange_entries(self, entry_ids: List[int]) -> bool:
+        """
+        Supprime plusieurs entrées du tableau d'échanges en une seule requête.
+        Les lignes sont retrouvées par identifiant juste avant la suppression.
+        """
+        try:
+            with self._board_lock:
+                wanted = {str(entry_id) for entry_id in entry_ids}
+                ids = self.sheet_exchange.col_values(1)
+                rows = [i for i, value in enumerate(ids[1:], start=2) if value in wanted]
+                # Du bas vers le haut pour que les indices restent valides
+                requests = [
+                    {"deleteDimension": {"range": {
+                        "sheetId": self.sheet_exchange.id, "dimension": "ROWS",
+                        "startIndex": row - 1, "endIndex": row
+                    }}}
+                    for row in sorted(rows, reverse=True)
+                ]
+                if requests:
+                    self.spreadsheet.batch_update({"requests": requests})
+                return True
+        except Exception as e:
+            logging.error(f"[STORAGE] Erreur lors de la suppression groupée d'entrées d'échange: {e}")
+            return False
+
     def _init_logging(self):
         """Initialise le gestionnaire de logging."""
         logging.info("[STORAGE] 🔄 Début de l'initialisation du logging manager...")
@@ -0,0 +1,101 @@
+"""
+Canal d'événements des demandes d'échange, du site vers le bot.
+Quand le site et le bot tournent dans le même processus (server_unified.py),
+le site publie ses demandes créées ou résolues et le bot les reçoit aussitôt
+dans sa boucle asyncio. Sans consommateur (déploiement séparé), les
+événements sont ignorés et le bot lit la sheet TradeRequests.
+"""
+
+import asyncio
+import threading
+import logging
+from typing import Any, Dict, Optional
+
+PROPOSED = "proposed"
+ACCEPTED = "accepted"
+DECLINED = "declined"
+CANCELLED = "cancelled"
+
+
+class TradeEvent:
+    """Événement sur une demande d'échange."""
+
+    def __init__(self, kind: str, trade: Dict[str, Any], row_index: int = 0):
+        self.kind = kind
+        self.trade = trade
+        self.row_index = row_index
+
+    def __repr__(self):
+        return f"TradeEvent(kind='{self.kind}', id='{self.trade.get('id')}')"
+
+
+class TradeEventBus:
+    """
+    File thread-safe reliée à la boucle du bot.
+
+    Le site publie depuis n'importe quel thread ; les événements sont remis
+    dans une asyncio.Queue de la boucle du consommateur.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._producer = False
+
+    @property
+    def has_producer(self) -> bool:
+        """True si le site publie ses événements dans ce processus."""
+        return self._producer
+
+    def attach_producer(self):
+        """Signale que le site tourne dans ce processus et publie ses événements."""
+        self._producer = True
+
+    def attach_consumer(self) -> asyncio.Queue:
+        """
+        Relie le bus à la boucle courante (à appeler depuis la boucle du bot).
+
+        Returns:
+            asyncio.Queue: File des TradeEvent à consommer
+        """
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            return self._queue
+
+    def detach_consumer(self):
+        """Détache le consommateur ; les événements suivants sont ignorés."""
+        with self._lock:
+            self._loop = None
+            self._queue = None
+
+    def publish(self, kind: str, trade: Dict[str, Any], row_index: int = 0) -> bool:
+        """
+        Publie un événement (depuis n'importe quel thread).
+
+        Args:
+            kind: PROPOSED, ACCEPTED, DECLINED ou CANCELLED
+            trade: Demande d'échange (colonnes de la sheet TradeRequests)
+            row_index: Ligne de la demande dans la sheet (0 si inconnue)
+
+        Returns:
+            bool: True si un consommateur a reçu l'événement
+        """
+        with self._lock:
+            loop, queue = self._loop, self._queue
+        if loop is None or queue is None:
+            return False
+
+        event = TradeEvent(kind, dict(trade), row_index)
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+            return True
+        except RuntimeError:
+            # Boucle du bot arrêtée
+            logging.warning(f"[TRADING] Événement {event} perdu : boucle du bot fermée")
+            return False
+
+
+# Instance unique partagée par le bot et le site (même processus)
+trade_events = TradeEventBus()
@@ -2,6 +2,7 @@
 Logique de trading et d'échange des cartes.
 """
 
+import asyncio
 import logging
 from typing import List, Tuple, Optional
 from datetime import datetime, timedelta
@@ -10,7 +11,13 @@ import pytz
 from .storage import CardsStorage
 from .vault import VaultManager
 from .utils import validate_card_data
-from .config import WEEKLY_EXCHANGE_LIMIT
+from .config import WEEKLY_EXCHANGE_LIMIT, BOARD_OFFER_MAX_AGE_HOURS, BOARD_EXPIRY_RESYNC_INTERVAL
+from .weekly_exchanges import WeeklyExchangeCounter
+from .expiry import ExpiryHeap
+
+# Échéances des offres du tableau, partagées par tous les TradingManager du
+# processus (bot et site) : clé (id, timestamp), l'id pouvant être réutilisé
+board_expiry = ExpiryHeap()
 
 
 class TradingManager:
@@ -19,6 +26,8 @@ class TradingManager:
     def __init__(self, storage: CardsStorage, vault_manager: VaultManager):
         self.storage = storage
         self.vault_manager = vault_manager
+        self.board_expiry = board_expiry
+        self._board_expiry_seeded = False
 
     # ------------------------------------------------------------------
     # Tableau d'échanges
@@ -50,6 +59,7 @@ class TradingManager:
                 if entry_id is None:
                     self._add_card_to_user(user_id, cat, name)
                     return False
+                self._track_board_entry(entry_id, timestamp)
 
             if self.storage.logging_manager:
                 self.storage.logging_manager.log_card_remove(
@@ -124,6 +134,7 @@ class TradingManager:
 
                 if not self.storage.delete_exchange_entry(board_id):
                     return False
+                self.board_expiry.discard((int(board_id), str(timestamp)))
 
                 removed = []
                 added_owner = []
@@ -150,7 +161,9 @@ class TradingManager:
                         self._remove_card_from_user(owner_id, cat, name)
                     for cat, name in removed:
                         self._add_card_to_user(user_id, cat, name)
-                    self.storage.create_exchange_entry(owner_id, board_cat, board_name, timestamp, entry.get("comment") if 'comment' in entry else None)
+                    restored_id = self.storage.create_exchange_entry(owner_id, board_cat, board_name, timestamp, entry.get("comment") if 'comment' in entry else None)
+                    if restored_id is not None:
+                        self._track_board_entry(restored_id, timestamp)
                     return False
 
             if self.storage.logging_manager:
@@ -164,10 +177,6 @@ class TradingManager:
                     source="board_exchange",
                 )
 
-            if hasattr(self.storage, '_cog_ref'):
-                self.storage._cog_ref._mark_user_for_upgrade_check(user_id)
-                self.storage._cog_ref._mark_user_for_upgrade_check(owner_id)
-
             return True
 
         except Exception as e:
@@ -188,10 +197,13 @@ class TradingManager:
 
                 if not self.storage.delete_exchange_entry(board_id):
                     return False
+                self.board_expiry.discard((int(board_id), str(timestamp)))
 
                 if not self._add_card_to_user(user_id, cat, name):
                     # Rollback si impossible de rendre la carte
-                    self.storage.create_exchange_entry(user_id, cat, name, timestamp, entry.get("comment") if 'comment' in entry else None)
+                    restored_id = self.storage.create_exchange_entry(user_id, cat, name, timestamp, entry.get("comment") if 'comment' in entry else None)
+                    if restored_id is not None:
+                        self._track_board_entry(restored_id, timestamp)
                     return False
 
             if self.storage.logging_manager:
@@ -210,39 +222,97 @@ class TradingManager:
             logging.error(f"[BOARD] Erreur lors du retrait: {e}")
             return False
 
-    def cleanup_board(self, max_age_hours: int = 24) -> None:
+    def _track_board_entry(self, entry_id: int, timestamp: str,
+                           max_age_hours: int = BOARD_OFFER_MAX_AGE_HOURS) -> None:
+        """Planifie l'expiration d'une offre (immédiate si sa date est illisible)."""
+        try:
+            ts = datetime.fromisoformat(str(timestamp))
+            if ts.tzinfo is None:
+                ts = pytz.timezone("Europe/Paris").localize(ts)
+            expires_at = ts + timedelta(hours=max_age_hours)
+        except Exception:
+            expires_at = datetime.now(pytz.timezone("Europe/Paris"))
+        self.board_expiry.push((int(entry_id), str(timestamp)), expires_at)
+
+    def seed_board_expiry(self, max_age_hours: int = BOARD_OFFER_MAX_AGE_HOURS) -> None:
+        """Charge les échéances des offres présentes (une lecture du tableau)."""
+        for entry in self.list_board_offers():
+            try:
+                self._track_board_entry(int(entry["id"]), entry["timestamp"], max_age_hours)
+            except (KeyError, ValueError):
+                continue
+        self._board_expiry_seeded = True
+
+    def cleanup_board(self, max_age_hours: int = BOARD_OFFER_MAX_AGE_HOURS) -> None:
         """Retire les offres expirées et restitue les cartes."""
         try:
-            now = datetime.now(pytz.timezone("Europe/Paris"))
-            entries = self.list_board_offers()
-            for entry in entries:
-                try:
-                    ts = datetime.fromisoformat(entry["timestamp"])
-                except Exception:
-                    ts = None
+            if not self._board_expiry_seeded:
+                self.seed_board_expiry(max_age_hours)
+            due = self.board_expiry.pop_due()
+            if due:
+                self._expire_board_entries(due)
+        except Exception as e:
+            logging.error(f"[BOARD] Erreur lors du nettoyage du tableau: {e}")
 
-                if ts and now - ts < timedelta(hours=max_age_hours):
-                    continue
+    def _expire_board_entries(self, due: List[Tuple[int, str]]) -> None:
+        """
+        Retire les offres échues : une lecture pour vérifier qu'elles sont
+        toujours présentes, une suppression groupée, puis restitution des cartes.
 
+        La lecture sert aussi à replanifier les offres déposées par un autre
+        processus. Le verrou du tableau est commun aux stockages du bot et du
+        site, et les lignes sont retrouvées par identifiant au moment de la
+        suppression.
+        """
+        with self.storage._cards_lock, self.storage._board_lock:
+            current = {}
+            for entry in self.storage.get_exchange_entries():
+                try:
+                    key = (int(entry["id"]), str(entry["timestamp"]))
+                except (KeyError, ValueError):
+                    continue
+                current[key] = entry
+                self._track_board_entry(*key)
+
+            expired = [current[key] for key in due if key in current]
+            if not expired:
+                return
+            if not self.storage.delete_exchange_entries([int(entry["id"]) for entry in expired]):
+                raise RuntimeError("suppression des offres expirées impossible")
+            for entry in expired:
+                self.board_expiry.discard((int(entry["id"]), str(entry["timestamp"])))
+
+            for entry in expired:
                 owner_id = int(entry["owner"])
                 cat = entry["cat"]
                 name = entry["name"]
-                entry_id = int(entry["id"])
-
-                with self.storage._cards_lock, self.storage._board_lock:
-                    if self.storage.delete_exchange_entry(entry_id):
-                        self._add_card_to_user(owner_id, cat, name)
-                        if self.storage.logging_manager:
-                            self.storage.logging_manager.log_card_add(
-                                user_id=owner_id,
-                                user_name=f"User_{owner_id}",
-                                category=cat,
-                                name=name,
-                                details="Retour après expiration du tableau",
-                                source="board_cleanup"
-                            )
-        except Exception as e:
-            logging.error(f"[BOARD] Erreur lors du nettoyage du tableau: {e}")
+                self._add_card_to_user(owner_id, cat, name)
+                if self.storage.logging_manager:
+                    self.storage.logging_manager.log_card_add(
+                        user_id=owner_id,
+                        user_name=f"User_{owner_id}",
+                        category=cat,
+                        name=name,
+                        details="Retour après expiration du tableau",
+                        source="board_cleanup"
+                    )
+
+        logging.info(f"[BOARD] {len(expired)} offre(s) expirée(s) retirée(s) du tableau")
+
+    async def run_board_expiry(self) -> None:
+        """
+        Minuteur des offres du tableau : dort jusqu'à la prochaine expiration.
+        Lancé par le bot et par le site ; un seul tourne par processus, l'autre
+        attend en réserve. Le tableau est relu au plus tard toutes les
+        BOARD_EXPIRY_RESYNC_INTERVAL secondes.
+        """
+        if not self._board_expiry_seeded:
+            await asyncio.to_thread(self.seed_board_expiry)
+        await self.board_expiry.run(
+            self._expire_board_entries,
+            resync=self.seed_board_expiry,
+            resync_interval=BOARD_EXPIRY_RESYNC_INTERVAL,
+        )
     
     def safe_exchange(self, offerer_id: int, target_id: int,
                      offer_cards: List[Tuple[str, str]],
@@ -306,10 +376,6 @@ class TradingManager:
                     source="echange_direct",
                 )
 
-            if hasattr(self.storage, '_cog_ref'):
-                self.storage._cog_ref._mark_user_for_upgrade_check(offerer_id)
-                self.storage._cog_ref._mark_user_for_upgrade_check(target_id)
-
             return True
 
         except Exception as e:
@@ -386,11 +452,6 @@ class TradingManager:
                     source="echange_vault"
                 )
 
-            # Marquer que les vérifications d'upgrade sont nécessaires via le cog principal
-            if hasattr(self.storage, '_cog_ref'):
-                self.storage._cog_ref._mark_user_for_upgrade_check(user1_id)
-                self.storage._cog_ref._mark_user_for_upgrade_check(user2_id)
-
             return True
             
         except Exception as e:
@@ -399,9 +460,31 @@ class TradingManager:
 
 
     
+    @property
+    def weekly_exchanges(self) -> WeeklyExchangeCounter:
+        """Compteur partagé des échanges hebdomadaires."""
+        return WeeklyExchangeCounter.for_sheet(self.storage.sheet_weekly_exchanges)
+
+    def get_weekly_exchange_count(self, user_id: int) -> int:
+        """
+        Retourne le nombre d'échanges hebdomadaires effectués cette semaine.
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            int: Nombre d'échanges de la semaine (0 en cas d'erreur)
+        """
+        try:
+            return self.weekly_exchanges.get_count(user_id)
+        except Exception as e:
+            logging.error(f"[TRADING] Erreur lors de la lecture des échanges hebdomadaires: {e}")
+            return 0
+
     def can_perform_weekly_exchange(self, user_id: int) -> bool:
         """
         Vérifie si un utilisateur peut effectuer un échange hebdomadaire.
+        La vérification se fait en mémoire via le compteur hebdomadaire.
         
         Args:
             user_id: ID de l'utilisateur
@@ -410,22 +493,7 @@ class TradingManager:
             bool: True si l'échange est autorisé
         """
         try:
-            # Calculer la semaine actuelle (lundi = début de semaine, timezone Paris)
-            paris_tz = pytz.timezone("Europe/Paris")
-            now = datetime.now(paris_tz)
-            monday = now - timedelta(days=now.weekday())
-            week_key = monday.strftime("%Y-W%U")
-            
-            # Vérifier dans la feuille des échanges hebdomadaires
-            all_rows = self.storage.sheet_weekly_exchanges.get_all_values()
-            user_id_str = str(user_id)
-            
-            for row in all_rows:
-                if len(row) >= 3 and row[0] == user_id_str and row[1] == week_key:
-                    current_count = int(row[2])
-                    return current_count < WEEKLY_EXCHANGE_LIMIT
-            
-            return True  # Aucun échange cette semaine
+            return self.weekly_exchanges.get_count(user_id) < WEEKLY_EXCHANGE_LIMIT
             
         except Exception as e:
             logging.error(f"[TRADING] Erreur lors de la vérification des échanges hebdomadaires: {e}")
@@ -442,35 +510,9 @@ class TradingManager:
             bool: True si l'enregistrement a réussi
         """
         try:
-            # Calculer la semaine actuelle
-            paris_tz = pytz.timezone("Europe/Paris")
-            now = datetime.now(paris_tz)
-            monday = now - timedelta(days=now.weekday())
-            week_key = monday.strftime("%Y-W%U")
-            user_id_str = str(user_id)
-            
-            # Mettre à jour ou ajouter l'entrée
-            all_rows = self.storage.sheet_weekly_exchanges.get_all_values()
-            row_idx = None
-            current_count = 0
-            
-            for i, row in enumerate(all_rows):
-                if len(row) >= 3 and row[0] == user_id_str and row[1] == week_key:
-                    row_idx = i
-                    current_count = int(row[2])
-                    break
-            
-            if row_idx is not None:
-                # Mettre à jour la ligne existante
-                self.storage.sheet_weekly_exchanges.update(f"C{row_idx + 1}", str(current_count + 1))
-            else:
-                # Ajouter une nouvelle ligne
-                self.storage.sheet_weekly_exchanges.append_row([user_id_str, week_key, "1"])
+            if not self.weekly_exchanges.record(user_id):
+                return False
             
-            # Marquer que cet utilisateur a besoin d'une vérification d'upgrade via le cog principal
-            if hasattr(self.storage, '_cog_ref'):
-                self.storage._cog_ref._mark_user_for_upgrade_check(user_id)
-
             logging.info(f"[TRADING] Échange hebdomadaire enregistré pour l'utilisateur {user_id}")
             return True
             
@@ -0,0 +1,301 @@
+"""
+Planification et application des conversions vers les cartes Full.
+Permet de traiter toute la population en une seule passe sur l'inventaire
+et une seule écriture groupée dans Google Sheets.
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional, Tuple, Iterable
+
+from .storage import CardsStorage
+from .config import ALL_CATEGORIES, UPGRADE_THRESHOLD
+from .utils import normalize_name, merge_cells, is_full_card
+from .sacrificial_memo import sacrificial_memo
+
+
+class UpgradePlan:
+    """Conversion planifiée : N exemplaires d'une carte contre sa version Full."""
+
+    def __init__(self, user_id: int, category: str, name: str, full_name: str,
+                 file_id: str, threshold: int = UPGRADE_THRESHOLD):
+        self.user_id = user_id
+        self.category = category
+        self.name = name
+        self.full_name = full_name
+        self.file_id = file_id
+        self.threshold = threshold
+
+    def __repr__(self):
+        return (f"UpgradePlan(user_id={self.user_id}, category='{self.category}', "
+                f"name='{self.name}', full_name='{self.full_name}')")
+
+
+class UpgradeManager:
+    """Gestionnaire des conversions Full groupées."""
+
+    def __init__(self, storage: CardsStorage, upgrade_cards_by_category: Dict[str, List[Dict]]):
+        self.storage = storage
+        self.upgrade_cards_by_category = upgrade_cards_by_category
+        # Seuil par catégorie (toutes les catégories utilisent le même seuil pour l'instant)
+        self.upgrade_thresholds = {cat: UPGRADE_THRESHOLD for cat in ALL_CATEGORIES}
+        self._full_card_index: Optional[Dict[str, Dict[str, str]]] = None
+        # Notifiée de chaque quantité modifiée (user_id, catégorie, nom, nouvelle quantité),
+        # comme les autres écritures d'inventaire du bot
+        self.on_inventory_change: Optional[Callable[[int, str, str, int], None]] = None
+
+    # ------------------------------------------------------------------
+    # Index du catalogue Full
+    # ------------------------------------------------------------------
+
+    def invalidate_full_card_index(self):
+        """Invalide l'index des cartes Full (à appeler si le catalogue change)."""
+        self._full_card_index = None
+
+    def _get_full_card_index(self) -> Dict[str, Dict[str, str]]:
+        """Retourne l'index {catégorie: {nom Full normalisé: file_id}}."""
+        if self._full_card_index is None:
+            index: Dict[str, Dict[str, str]] = {}
+            for cat, files in self.upgrade_cards_by_category.items():
+                cat_index = index.setdefault(cat, {})
+                for f in files:
+                    key = normalize_name(f['name'].removesuffix(".png"))
+                    cat_index.setdefault(key, f['id'])
+            self._full_card_index = index
+        return self._full_card_index
+
+    def find_full_card(self, category: str, name: str) -> Optional[str]:
+        """
+        Cherche le fichier de la version Full d'une carte.
+
+        La catégorie d'origine est prioritaire, puis toutes les autres
+        catégories sont parcourues (même comportement que la vérification
+        individuelle).
+
+        Args:
+            category: Catégorie de la carte normale
+            name: Nom de la carte normale
+
+        Returns:
+            Optional[str]: ID du fichier Drive de la carte Full, None si absente
+        """
+        index = self._get_full_card_index()
+        key = normalize_name(f"{name} (Full)")
+
+        file_id = index.get(category, {}).get(key)
+        if file_id:
+            return file_id
+
+        for search_cat, cat_index in index.items():
+            if search_cat == category:
+                continue
+            file_id = cat_index.get(key)
+            if file_id:
+                return file_id
+        return None
+
+    # ------------------------------------------------------------------
+    # Index de l'inventaire
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def build_inventory_index(cards_cache: List[List[str]]) -> Tuple[Dict[int, Dict[Tuple[str, str], int]], Dict[Tuple[str, str], int]]:
+        """
+        Construit en une seule passe l'index de l'inventaire.
+
+        Args:
+            cards_cache: Contenu brut de la feuille des cartes
+
+        Returns:
+            Tuple: ({user_id: {(catégorie, nom): quantité}}, {(catégorie, nom): index de ligne})
+        """
+        inventory: Dict[int, Dict[Tuple[str, str], int]] = {}
+        row_positions: Dict[Tuple[str, str], int] = {}
+
+        for i, row in enumerate(cards_cache):
+            if i == 0 or len(row) < 2:
+                continue
+            key = (row[0], row[1])
+            row_positions.setdefault(key, i)
+            for cell in row[2:]:
+                if not cell:
+                    continue
+                try:
+                    uid, count = cell.split(":", 1)
+                    user_cards = inventory.setdefault(int(uid.strip()), {})
+                    user_cards[key] = user_cards.get(key, 0) + int(count)
+                except (ValueError, IndexError) as e:
+                    logging.warning(f"[SECURITY] Données corrompues dans build_inventory_index: {cell}, erreur: {e}")
+                    continue
+
+        return inventory, row_positions
+
+    # ------------------------------------------------------------------
+    # Planification
+    # ------------------------------------------------------------------
+
+    def plan_upgrades(self, user_ids: Optional[Iterable[int]] = None,
+                      cards_cache: Optional[List[List[str]]] = None) -> List[UpgradePlan]:
+        """
+        Détermine toutes les conversions Full possibles.
+
+        Args:
+            user_ids: Utilisateurs à examiner (tous si None)
+            cards_cache: Contenu de la feuille à utiliser (cache courant si None)
+
+        Returns:
+            List[UpgradePlan]: Conversions à effectuer
+        """
+        if cards_cache is None:
+            cards_cache = self.storage.get_cards_cache()
+        if not cards_cache:
+            return []
+
+        inventory, _ = self.build_inventory_index(cards_cache)
+        if user_ids is not None:
+            wanted = set(user_ids)
+            inventory = {uid: cards for uid, cards in inventory.items() if uid in wanted}
+
+        plans: List[UpgradePlan] = []
+        for user_id, user_cards in inventory.items():
+            for (cat, name), count in user_cards.items():
+                threshold = self.upgrade_thresholds.get(cat)
+                if threshold is None or count < threshold or is_full_card(name):
+                    continue
+
+                full_name = f"{name} (Full)"
+                if user_cards.get((cat, full_name), 0) > 0:
+                    logging.debug(f"[UPGRADE] Utilisateur {user_id} possède déjà {full_name}, conversion ignorée")
+                    continue
+
+                file_id = self.find_full_card(cat, name)
+                if not file_id:
+                    continue
+
+                plans.append(UpgradePlan(user_id, cat, name, full_name, file_id, threshold))
+
+        logging.info(f"[UPGRADE] {len(plans)} conversions planifiées pour {len(inventory)} utilisateurs")
+        return plans
+
+    # ------------------------------------------------------------------
+    # Application
+    # ------------------------------------------------------------------
+
+    def apply_upgrades(self, plans: List[UpgradePlan], source: str = "batch_upgrade",
+                       user_names: Optional[Dict[int, str]] = None) -> List[UpgradePlan]:
+        """
+        Applique un lot de conversions en une seule écriture groupée.
+
+        Les quantités sont revérifiées sur une lecture fraîche de la feuille
+        avant l'écriture ; les conversions devenues invalides sont ignorées.
+        Les nouvelles quantités sont ensuite signalées à on_inventory_change.
+
+        Args:
+            plans: Conversions planifiées
+            source: Source enregistrée dans les logs
+            user_names: Noms d'affichage des joueurs pour les logs (User_<id> par défaut)
+
+        Returns:
+            List[UpgradePlan]: Conversions réellement appliquées
+        """
+        if not plans:
+            return []
+
+        with self.storage._cards_lock:
+            try:
+                self.storage.refresh_cards_cache()
+                cards_cache = self.storage.cards_cache
+                if not cards_cache:
+                    return []
+
+                inventory, row_positions = self.build_inventory_index(cards_cache)
+
+                # Lignes modifiées : index -> (longueur d'origine, {uid: quantité})
+                modified_rows: Dict[int, Tuple[int, Dict[str, int]]] = {}
+                new_rows: Dict[Tuple[str, str], Dict[str, int]] = {}
+                applied: List[UpgradePlan] = []
+
+                def row_counts(row_index: int) -> Dict[str, int]:
+                    if row_index not in modified_rows:
+                        row = cards_cache[row_index]
+                        counts: Dict[str, int] = {}
+                        for cell in merge_cells(row)[2:]:
+                            uid, count = cell.split(":", 1)
+                            counts[uid] = int(count)
+                        modified_rows[row_index] = (len(row), counts)
+                    return modified_rows[row_index][1]
+
+                for plan in plans:
+                    user_cards = inventory.get(plan.user_id, {})
+                    base_key = (plan.category, plan.name)
+                    full_key = (plan.category, plan.full_name)
+
+                    if user_cards.get(base_key, 0) < plan.threshold or user_cards.get(full_key, 0) > 0:
+                        logging.warning(f"[UPGRADE] Conversion obsolète ignorée: {plan}")
+                        continue
+
+                    uid = str(plan.user_id)
+                    base_counts = row_counts(row_positions[base_key])
+                    base_counts[uid] = base_counts.get(uid, 0) - plan.threshold
+                    if base_counts[uid] <= 0:
+                        del base_counts[uid]
+
+                    if full_key in row_positions:
+                        full_counts = row_counts(row_positions[full_key])
+                    else:
+                        full_counts = new_rows.setdefault(full_key, {})
+                    full_counts[uid] = full_counts.get(uid, 0) + 1
+
+                    # Garder l'index cohérent si le même utilisateur apparaît deux fois
+                    user_cards[base_key] -= plan.threshold
+                    user_cards[full_key] = user_cards.get(full_key, 0) + 1
+                    applied.append(plan)
+
+                if not applied:
+                    return []
+
+                updates = []
+                for row_index, (original_len, counts) in modified_rows.items():
+                    row = list(cards_cache[row_index][:2])
+                    row += [f"{uid}:{count}" for uid, count in counts.items() if count > 0]
+                    row += [""] * (max(original_len, len(row)) - len(row))
+                    updates.append({"range": f"A{row_index + 1}", "values": [row]})
+
+                if updates:
+                    self.storage.sheet_cards.batch_update(updates)
+                if new_rows:
+                    self.storage.sheet_cards.append_rows([
+                        [cat, name] + [f"{uid}:{count}" for uid, count in counts.items()]
+                        for (cat, name), counts in new_rows.items()
+                    ])
+
+                self.storage.refresh_cards_cache()
+                changes = {}
+                for plan in applied:
+                    user_cards = inventory[plan.user_id]
+                    for card in ((plan.category, plan.name), (plan.category, plan.full_name)):
+                        changes[(plan.user_id,) + card] = user_cards.get(card, 0)
+                logging.info(f"[BATCH] {len(applied)} conversions Full appliquées "
+                             f"({len(updates)} lignes modifiées, {len(new_rows)} lignes créées)")
+
+            except Exception as e:
+                logging.error(f"[UPGRADE] Erreur lors de l'application groupée des conversions: {e}")
+                self.storage.refresh_cards_cache()
+                return []
+
+        for (user_id, cat, name), new_count in changes.items():
+            if self.on_inventory_change:
+                self.on_inventory_change(user_id, cat, name, new_count)
+            elif not is_full_card(name):
+                # Sans point d'entrée, invalider directement la sélection sacrificielle
+                sacrificial_memo.invalidate(user_id)
+
+        user_names = user_names or {}
+        if self.storage.logging_manager:
+            self.storage.logging_manager.log_card_upgrades_batch(
+                [(plan.user_id, user_names.get(plan.user_id, f"User_{plan.user_id}"),
+                  [(plan.category, plan.name)] * plan.threshold,
+                  (plan.category, plan.full_name)) for plan in applied],
+                source=source
+            )
+
+        return applied
@@ -2,6 +2,7 @@
 Vues principales du menu des cartes.
 """
 
+import asyncio
 import discord
 import logging
 from typing import TYPE_CHECKING
@@ -147,58 +148,50 @@ class CardsMenuView(discord.ui.View):
         # Effectuer le tirage journalier de 3 cartes
         drawn_cards = self.cog.drawing_manager.draw_cards(3)
 
-        # Annonce publique si nouvelles cartes
-        discovered_cards = self.cog.discovery_manager.get_discovered_cards()
-        new_cards = [c for c in drawn_cards if c not in discovered_cards]
-        if new_cards:
-            await self.cog._handle_announce_and_wall(interaction, new_cards)
+        # Lancer tous les téléchargements d'images dès que les cartes sont connues
+        images_task = asyncio.create_task(self.cog.prefetch_card_images(drawn_cards))
 
-        # Affichage des cartes avec embeds/images (style original)
-        embed_msgs = []
-        for cat, name in drawn_cards:
-            # Recherche du fichier image (inclut cartes Full)
-            file_id = next(
-                (f["id"] for f in (self.cog.cards_by_category.get(cat, []) + self.cog.upgrade_cards_by_category.get(cat, []))
-                if f["name"].removesuffix(".png") == name),
-                None,
-            )
-            if file_id:
-                file_bytes = await self.cog.download_drive_file(file_id)
-                if file_bytes:
-                    embed, image_file = self.cog.build_card_embed(cat, name, file_bytes, self.user)
-                    embed_msgs.append((embed, image_file))
+        # Annonce publique si nouvelles cartes (lecture des découvertes pendant les téléchargements)
+        discovered_cards = await asyncio.to_thread(self.cog.discovery_manager.get_discovered_cards)
+        new_cards = [c for c in drawn_cards if c not in discovered_cards]
 
-        if embed_msgs:
-            # Envoyer toutes les cartes directement dans le salon comme messages indépendants
-            for embed, file in embed_msgs:
-                await interaction.channel.send(embed=embed, file=file)
+        # Affichage des cartes avec embeds/images (style original), construits avant l'ajout à l'inventaire
+        card_embeds = self.cog.build_card_embeds(drawn_cards, await images_task, self.user)
 
         # ——————————— COMMIT ———————————
-        # 1) Ajouter les cartes à l'inventaire
-        for cat, name in drawn_cards:
-            self.cog.add_card_to_user(self.user.id, cat, name,
-                                    user_name=self.user.display_name,
-                                    source="tirage_journalier")
-
-        # 2) Logger le tirage journalier
-        if self.cog.storage.logging_manager:
-            logging.info(f"[DAILY_DRAW] Tentative de logging pour {self.user.display_name} ({self.user.id})")
-            logging.info(f"[DAILY_DRAW] Cartes tirées: {drawn_cards}")
-
-            success = self.cog.storage.logging_manager.log_card_draw(
-                user_id=self.user.id,
-                user_name=self.user.display_name,
-                cards=drawn_cards,
-                draw_type="DAILY",
-                source="tirage_journalier"
-            )
+        def commit():
+            # 1) Ajouter les cartes à l'inventaire
+            for cat, name in drawn_cards:
+                self.cog.add_card_to_user(self.user.id, cat, name,
+                                        user_name=self.user.display_name,
+                                        source="tirage_journalier")
+
+            # 2) Logger le tirage journalier
+            if self.cog.storage.logging_manager:
+                logging.info(f"[DAILY_DRAW] Tentative de logging pour {self.user.display_name} ({self.user.id})")
+                logging.info(f"[DAILY_DRAW] Cartes tirées: {drawn_cards}")
+
+                success = self.cog.storage.logging_manager.log_card_draw(
+                    user_id=self.user.id,
+                    user_name=self.user.display_name,
+                    cards=drawn_cards,
+                    draw_type="DAILY",
+                    source="tirage_journalier"
+                )
 
-            if success:
-                logging.info(f"[DAILY_DRAW] ✅ Logging réussi pour {self.user.display_name}")
+                if success:
+                    logging.info(f"[DAILY_DRAW] ✅ Logging réussi pour {self.user.display_name}")
+                else:
+                    logging.error(f"[DAILY_DRAW] ❌ Échec du logging pour {self.user.display_name}")
             else:
-                logging.error(f"[DAILY_DRAW] ❌ Échec du logging pour {self.user.display_name}")
-        else:
-            logging.error(f"[DAILY_DRAW] ❌ Logging manager non disponible pour {self.user.display_name}")
+                logging.error(f"[DAILY_DRAW] ❌ Logging manager non disponible pour {self.user.display_name}")
+
+        # L'écriture dans l'inventaire se fait pendant l'envoi des cartes dans le salon
+        commit_task = asyncio.create_task(asyncio.to_thread(commit))
+        await self.cog.send_card_embeds(interaction.channel, card_embeds)
+        if new_cards:
+            await self.cog._handle_announce_and_wall(interaction, new_cards)
+        await commit_task
 
         # 3) Le tirage journalier est déjà enregistré par reserve_daily_draw()
         # NOTE: Plus besoin d'appeler record_daily_draw() car reserve_daily_draw() l'a déjà fait
@@ -216,65 +209,54 @@ class CardsMenuView(discord.ui.View):
         # Effectuer le tirage bonus de 3 cartes (même logique que le tirage journalier)
         drawn_cards = self.cog.drawing_manager.draw_cards(3)
 
-        # Annonce publique si nouvelles cartes
-        discovered_cards = self.cog.discovery_manager.get_discovered_cards()
-        new_cards = [c for c in drawn_cards if c not in discovered_cards]
-        if new_cards:
-            await self.cog._handle_announce_and_wall(interaction, new_cards)
+        # Lancer tous les téléchargements d'images dès que les cartes sont connues
+        images_task = asyncio.create_task(self.cog.prefetch_card_images(drawn_cards))
 
-        # Affichage des cartes avec embeds/images (même logique que daily_draw_callback)
-        embed_msgs = []
-        for cat, name in drawn_cards:
-            try:
-                # Recherche du fichier image (inclut cartes Full)
-                file_id = next(
-                    (f["id"] for f in (self.cog.cards_by_category.get(cat, []) + self.cog.upgrade_cards_by_category.get(cat, []))
-                    if f["name"].removesuffix(".png") == name),
-                    None,
-                )
-                if file_id:
-                    file_bytes = await self.cog.download_drive_file(file_id)
-                    if file_bytes:
-                        embed, image_file = self.cog.build_card_embed(cat, name, file_bytes, self.user)
-                        embed_msgs.append((embed, image_file))
-                    else:
-                        logging.warning(f"[BONUS_DRAW] Impossible de télécharger l'image pour {name} ({cat})")
-                else:
-                    logging.warning(f"[BONUS_DRAW] Image non trouvée pour {name} ({cat})")
-            except Exception as e:
-                logging.error(f"[BONUS_DRAW] Erreur lors de l'affichage de {name}: {e}")
+        # Annonce publique si nouvelles cartes (lecture des découvertes pendant les téléchargements)
+        discovered_cards = await asyncio.to_thread(self.cog.discovery_manager.get_discovered_cards)
+        new_cards = [c for c in drawn_cards if c not in discovered_cards]
 
-        if embed_msgs:
-            # Envoyer toutes les cartes directement dans le salon comme messages indépendants
-            for embed, file in embed_msgs:
-                await interaction.channel.send(embed=embed, file=file)
+        # Affichage des cartes avec embeds/images (même logique que le tirage journalier)
+        try:
+            card_embeds = self.cog.build_card_embeds(drawn_cards, await images_task, self.user)
+        except Exception as e:
+            logging.error(f"[BONUS_DRAW] Erreur lors de l'affichage des cartes: {e}")
+            card_embeds = []
 
         # ——————————— COMMIT ———————————
-        # 1) Ajouter les cartes à l'inventaire
-        for cat, name in drawn_cards:
-            self.cog.add_card_to_user(self.user.id, cat, name,
-                                    user_name=self.user.display_name,
-                                    source="tirage_bonus")
-
-        # 2) Logger le tirage bonus
-        if self.cog.storage.logging_manager:
-            logging.info(f"[BONUS_DRAW] Tentative de logging pour {self.user.display_name} ({self.user.id})")
-            logging.info(f"[BONUS_DRAW] Cartes tirées: {drawn_cards}")
-
-            success = self.cog.storage.logging_manager.log_card_draw(
-                user_id=self.user.id,
-                user_name=self.user.display_name,
-                cards=drawn_cards,
-                draw_type="BONUS",
-                source="tirage_bonus"
-            )
+        def commit():
+            # 1) Ajouter les cartes à l'inventaire
+            for cat, name in drawn_cards:
+                self.cog.add_card_to_user(self.user.id, cat, name,
+                                        user_name=self.user.display_name,
+                                        source="tirage_bonus")
+
+            # 2) Logger le tirage bonus
+            if self.cog.storage.logging_manager:
+                logging.info(f"[BONUS_DRAW] Tentative de logging pour {self.user.display_name} ({self.user.id})")
+                logging.info(f"[BONUS_DRAW] Cartes tirées: {drawn_cards}")
+
+                success = self.cog.storage.logging_manager.log_card_draw(
+                    user_id=self.user.id,
+                    user_name=self.user.display_name,
+                    cards=drawn_cards,
+                    draw_type="BONUS",
+                    source="tirage_bonus"
+                )
 
-            if success:
-                logging.info(f"[BONUS_DRAW] ✅ Logging réussi pour {self.user.display_name}")
+                if success:
+                    logging.info(f"[BONUS_DRAW] ✅ Logging réussi pour {self.user.display_name}")
+                else:
+                    logging.error(f"[BONUS_DRAW] ❌ Échec du logging pour {self.user.display_name}")
             else:
-                logging.error(f"[BONUS_DRAW] ❌ Échec du logging pour {self.user.display_name}")
-        else:
-            logging.error(f"[BONUS_DRAW] ❌ Logging manager non disponible pour {self.user.display_name}")
+                logging.error(f"[BONUS_DRAW] ❌ Logging manager non disponible pour {self.user.display_name}")
+
+        # L'écriture dans l'inventaire se fait pendant l'envoi des cartes dans le salon
+        commit_task = asyncio.create_task(asyncio.to_thread(commit))
+        await self.cog.send_card_embeds(interaction.channel, card_embeds)
+        if new_cards:
+            await self.cog._handle_announce_and_wall(interaction, new_cards)
+        await commit_task
 
         # 3) Décrémenter un bonus (nouvelle logique)
         success = await self.cog.consume_single_bonus(self.user.id, self.user.display_name)
@@ -316,22 +298,21 @@ class CardsMenuView(discord.ui.View):
                 )
                 return
 
-            # Récupérer les cartes éligibles (non-Full) avec cache optimisé
-            user_cards = self.cog.get_user_cards(interaction.user.id)
-            eligible_cards = [(cat, name) for cat, name in user_cards if not "(Full)" in name]
+            # Sélection du jour (mémorisée tant que les cartes éligibles ne changent pas)
+            user_id = interaction.user.id
+            selection = self.cog.drawing_manager.get_daily_sacrificial_selection(
+                user_id, lambda fresh_after: self.cog.get_user_card_counts(user_id, fresh_after)
+            )
 
-            if len(eligible_cards) < 5:
+            if selection.eligible_count < 5:
                 await interaction.followup.send(
                     f"❌ Vous devez avoir au moins 5 cartes (non-Full) pour effectuer un tirage sacrificiel. "
-                    f"Vous en avez {len(eligible_cards)}.",
+                    f"Vous en avez {selection.eligible_count}.",
                     ephemeral=True
                 )
                 return
 
-            # Sélectionner les cartes sacrificielles du jour
-            selected_cards = self.cog.drawing_manager.select_daily_sacrificial_cards(
-                interaction.user.id, eligible_cards
-            )
+            selected_cards = selection.cards
 
             if not selected_cards:
                 await interaction.followup.send(
@@ -352,7 +333,7 @@ class CardsMenuView(discord.ui.View):
 
             for i, (cat, name) in enumerate(selected_cards, 1):
                 display_name = name.removesuffix('.png')
-                user_count = user_cards.count((cat, name))
+                user_count = selection.owned_counts.get((cat, name), 0)
                 embed.add_field(
                     name=f"Carte {i}",
                     value=f"**{display_name}** ({cat})\n*Vous en possédez: {user_count}*",
@@ -514,18 +495,37 @@ class SacrificialDrawConfirmationView(discord.ui.View):
         )
         
         try:
-            # Vérifier que l'utilisateur possède encore toutes les cartes
-            user_cards = self.cog.get_user_cards(self.user.id)
+            # Vérifier que l'utilisateur possède encore toutes les cartes : la sélection
+            # mémorisée est invalidée à chaque changement d'inventaire éligible
+            user_id = self.user.id
+            selection = self.cog.drawing_manager.get_daily_sacrificial_selection(
+                user_id, lambda fresh_after: self.cog.get_user_card_counts(user_id, fresh_after)
+            )
+            if selection.cards != self.selected_cards:
+                await interaction.followup.send(
+                    "❌ Votre inventaire a changé depuis l'aperçu. Relancez le tirage sacrificiel.",
+                    ephemeral=True
+                )
+                return
             for cat, name in self.selected_cards:
-                if (cat, name) not in user_cards:
+                if selection.owned_counts.get((cat, name), 0) <= 0:
                     await interaction.followup.send(
                         f"❌ Vous ne possédez plus la carte **{name.removesuffix('.png')}** ({cat}).",
                         ephemeral=True
                     )
                     return
 
+            # Réserver le tirage avant toute écriture (évite un double sacrifice concurrent)
+            if not self.cog.drawing_manager.reserve_sacrificial_draw(self.user.id):
+                await interaction.followup.send(
+                    "🚫 Vous avez déjà effectué votre tirage sacrificiel aujourd'hui. Revenez demain !",
+                    ephemeral=True
+                )
+                return
+
             # Utiliser les opérations batch optimisées pour retirer les cartes
             if not self.cog.batch_remove_cards_from_user(self.user.id, self.selected_cards):
+                self.cog.drawing_manager.release_sacrificial_draw(self.user.id)
                 await interaction.followup.send(
                     "❌ Erreur lors du retrait des cartes sacrifiées.",
                     ephemeral=True
@@ -536,84 +536,55 @@ class SacrificialDrawConfirmationView(discord.ui.View):
             drawn_cards = self.cog.drawing_manager.draw_cards(3)
 
             if drawn_cards:
-                # Créer un embed principal pour le sacrifice accompli
-                embed = discord.Embed(
-                    title="⚔️ Sacrifice accompli !",
-                    description=f"Vous avez obtenu **{len(drawn_cards)} cartes** :",
-                    color=0x27ae60
-                )
-
-                # Ajouter chaque carte tirée à l'embed
-                for i, (cat, name) in enumerate(drawn_cards, 1):
-                    display_name = name.removesuffix('.png')
-                    is_full = "(Full)" in name
-
-                    card_info = f"**{display_name}** ({cat})"
-                    if is_full:
-                        card_info += " ✨ *Variante Full !*"
+                # Télécharger toutes les images en parallèle puis construire les embeds - AVANT ajout à l'inventaire
+                images = await self.cog.prefetch_card_images(drawn_cards)
+                card_embeds = self.cog.build_card_embeds(drawn_cards, images, self.user)
 
-                    embed.add_field(
-                        name=f"Carte {i}",
-                        value=card_info,
-                        inline=True
-                    )
-
-                # Affichage des cartes avec embeds/images (style original) - AVANT ajout à l'inventaire
-                embed_msgs = []
-                for cat, name in drawn_cards:
-                    # Recherche du fichier image (inclut cartes Full)
-                    file_id = next(
-                        (f["id"] for f in (self.cog.cards_by_category.get(cat, []) + self.cog.upgrade_cards_by_category.get(cat, []))
-                        if f["name"].removesuffix(".png") == name),
-                        None,
-                    )
-                    if file_id:
-                        file_bytes = await self.cog.download_drive_file(file_id)
-                        if file_bytes:
-                            embed, image_file = self.cog.build_card_embed(cat, name, file_bytes, self.user)
-                            embed_msgs.append((embed, image_file))
-
-                if embed_msgs:
-                    # Envoyer toutes les cartes directement dans le salon comme messages indépendants
-                    for embed, image_file in embed_msgs:
-                        await interaction.channel.send(embed=embed, file=image_file)
+                # ——————————— COMMIT ———————————
+                def commit():
+                    # Logger le sacrifice de cartes
+                    if self.cog.storage.logging_manager:
+                        logging.info(f"[SACRIFICIAL_DRAW] Tentative de logging pour {self.user.display_name} ({self.user.id})")
+                        logging.info(f"[SACRIFICIAL_DRAW] Cartes sacrifiées: {self.selected_cards}")
+                        logging.info(f"[SACRIFICIAL_DRAW] Cartes reçues: {drawn_cards}")
+
+                        success = self.cog.storage.logging_manager.log_card_sacrifice(
+                            user_id=self.user.id,
+                            user_name=self.user.display_name,
+                            sacrificed_cards=self.selected_cards,
+                            received_cards=drawn_cards,
+                            source="tirage_sacrificiel"
+                        )
+
+                        if success:
+                            logging.info(f"[SACRIFICIAL_DRAW] ✅ Logging réussi pour {self.user.display_name}")
+                        else:
+                            logging.error(f"[SACRIFICIAL_DRAW] ❌ Échec du logging pour {self.user.display_name}")
+                    else:
+                        logging.error(f"[SACRIFICIAL_DRAW] ❌ Logging manager non disponible pour {self.user.display_name}")
+
+                    # Maintenant ajouter les cartes tirées à l'inventaire
+                    for cat, name in drawn_cards:
+                        self.cog.add_card_to_user(self.user.id, cat, name,
+                                                user_name=self.user.display_name,
+                                                source="tirage_sacrificiel")
+
+                # L'écriture dans l'inventaire se fait pendant l'envoi des cartes dans le salon
+                commit_task = asyncio.create_task(asyncio.to_thread(commit))
+                if card_embeds:
+                    await self.cog.send_card_embeds(interaction.channel, card_embeds)
                 else:
                     # Si aucune carte n'a été tirée, afficher un message d'erreur éphémère
                     await interaction.followup.send(
                         "❌ Aucune carte n'a pu être tirée.",
                         ephemeral=True
                     )
-
-                # ——————————— COMMIT ———————————
-                # Logger le sacrifice de cartes
-                if self.cog.storage.logging_manager:
-                    logging.info(f"[SACRIFICIAL_DRAW] Tentative de logging pour {self.user.display_name} ({self.user.id})")
-                    logging.info(f"[SACRIFICIAL_DRAW] Cartes sacrifiées: {self.selected_cards}")
-                    logging.info(f"[SACRIFICIAL_DRAW] Cartes reçues: {drawn_cards}")
-
-                    success = self.cog.storage.logging_manager.log_card_sacrifice(
-                        user_id=self.user.id,
-                        user_name=self.user.display_name,
-                        sacrificed_cards=self.selected_cards,
-                        received_cards=drawn_cards,
-                        source="tirage_sacrificiel"
-                    )
-
-                    if success:
-                        logging.info(f"[SACRIFICIAL_DRAW] ✅ Logging réussi pour {self.user.display_name}")
-                    else:
-                        logging.error(f"[SACRIFICIAL_DRAW] ❌ Échec du logging pour {self.user.display_name}")
-                else:
-                    logging.error(f"[SACRIFICIAL_DRAW] ❌ Logging manager non disponible pour {self.user.display_name}")
-
-                # Maintenant ajouter les cartes tirées à l'inventaire
-                for cat, name in drawn_cards:
-                    self.cog.add_card_to_user(self.user.id, cat, name,
-                                            user_name=self.user.display_name,
-                                            source="tirage_sacrificiel")
-
-                # Enregistrer le tirage sacrificiel (ceci marque l'utilisateur pour vérification)
-                self.cog.drawing_manager.record_sacrificial_draw(self.user.id)
+                try:
+                    await commit_task
+                except Exception:
+                    # Le tirage n'a pas abouti : libérer la réservation du jour
+                    self.cog.drawing_manager.release_sacrificial_draw(self.user.id)
+                    raise
 
                 # Traiter toutes les vérifications d'upgrade en attente
                 await self.cog.process_all_pending_upgrade_checks(interaction, 1361993326215172218)
@@ -621,6 +592,7 @@ class SacrificialDrawConfirmationView(discord.ui.View):
                 # Annonce publique et mur des cartes
                 await self.cog._handle_announce_and_wall(interaction, drawn_cards)
             else:
+                self.cog.drawing_manager.release_sacrificial_draw(self.user.id)
                 await interaction.followup.send(
                     "❌ Aucune carte rare disponible.",
                     ephemeral=True
@@ -0,0 +1,138 @@
+"""
+Compteur en mémoire des échanges hebdomadaires.
+Évite de relire toute la feuille « Échanges Hebdomadaires » à chaque
+vérification de limite.
+"""
+
+import re
+import threading
+import logging
+from datetime import datetime, timedelta
+import pytz
+from typing import Dict, Optional, Tuple
+
+import gspread
+
+
+class WeeklyExchangeCounter:
+    """
+    Table (user_id, semaine) -> nombre d'échanges pour une feuille (user_id, week, count).
+
+    La feuille est lue une seule fois ; seules les entrées de la semaine en
+    cours sont gardées en mémoire et les semaines passées sont purgées au
+    changement de semaine (heure de Paris). Chaque enregistrement écrit une
+    seule cellule, ou une ligne pour la première entrée de la semaine.
+    Une instance est partagée par feuille dans le processus (bot et site).
+    """
+
+    _shared: Dict[Tuple[str, int], "WeeklyExchangeCounter"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, sheet: gspread.Worksheet):
+        self.sheet = sheet
+        self.paris_tz = pytz.timezone("Europe/Paris")
+
+        self._counts: Dict[str, int] = {}
+        self._rows: Dict[str, int] = {}
+        self._week: Optional[str] = None
+        self._loaded = False
+
+        self._lock = threading.RLock()
+
+    @classmethod
+    def for_sheet(cls, sheet: gspread.Worksheet) -> "WeeklyExchangeCounter":
+        """Retourne le compteur partagé associé à une feuille."""
+        key = (sheet.spreadsheet.id, sheet.id)
+        with cls._shared_lock:
+            counter = cls._shared.get(key)
+            if counter is None:
+                counter = cls(sheet)
+                cls._shared[key] = counter
+            return counter
+
+    def current_week(self) -> str:
+        """Clé de la semaine en cours (lundi = début de semaine, timezone Paris)."""
+        now = datetime.now(self.paris_tz)
+        monday = now - timedelta(days=now.weekday())
+        return monday.strftime("%Y-W%U")
+
+    def reload(self):
+        """Recharge les compteurs de la semaine en cours depuis la feuille."""
+        with self._lock:
+            week = self.current_week()
+            all_rows = self.sheet.get_all_values()
+            counts: Dict[str, int] = {}
+            rows: Dict[str, int] = {}
+            for i, row in enumerate(all_rows, start=1):
+                if len(row) < 3 or row[1] != week or row[0] in rows:
+                    continue
+                try:
+                    counts[row[0]] = int(row[2])
+                except ValueError:
+                    continue
+                rows[row[0]] = i
+            self._counts = counts
+            self._rows = rows
+            self._week = week
+            self._loaded = True
+            logging.info(f"[TRADING] Échanges hebdomadaires chargés ({len(counts)} utilisateurs, semaine {week})")
+
+    def _ensure_current(self) -> str:
+        """Charge la feuille au premier usage et purge au changement de semaine ; retourne la semaine."""
+        week = self.current_week()
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.reload()
+        elif self._week != week:
+            with self._lock:
+                if self._week != week:
+                    # Nouvelle semaine : les compteurs repartent de zéro
+                    self._counts = {}
+                    self._rows = {}
+                    self._week = week
+        return week
+
+    def get_count(self, user_id: int) -> int:
+        """Retourne le nombre d'échanges de la semaine (aucun appel réseau hors chargement)."""
+        self._ensure_current()
+        return self._counts.get(str(user_id), 0)
+
+    def record(self, user_id: int) -> bool:
+        """
+        Incrémente atomiquement le compteur de la semaine.
+
+        Args:
+            user_id: ID de l'utilisateur
+
+        Returns:
+            bool: True si l'échange a été enregistré
+        """
+        user_id_str = str(user_id)
+        with self._lock:
+            week = self._ensure_current()
+            current = self._counts.get(user_id_str, 0)
+            row = self._rows.get(user_id_str)
+            try:
+                if row is not None:
+                    self.sheet.update_cell(row, 3, str(current + 1))
+                else:
+                    response = self.sheet.append_row([user_id_str, week, "1"])
+                    updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+                    match = re.search(r"![A-Z]+(\d+)", updated_range)
+                    if match:
+                        self._rows[user_id_str] = int(match.group(1))
+                    else:
+                        # Position inconnue : relire la feuille au prochain accès
+                        self._loaded = False
+            except Exception as e:
+                logging.error(f"[TRADING] Erreur lors de l'écriture des échanges hebdomadaires: {e}")
+                return False
+
+            self._counts[user_id_str] = current + 1
+            return True
+
+    def invalidate(self):
+        """Force le rechargement depuis la feuille au prochain accès."""
+        with self._lock:
+            self._loaded = False
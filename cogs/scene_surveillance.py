@@ -18,9 +18,14 @@ import json
 from typing import Dict, List, Optional, Set, Tuple, Union
 import re
 
+from utils.discord_scheduler import outbound, Priority
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Délai minimal (en secondes) entre deux écritures groupées de l'activité des scènes
+SCENE_ACTIVITY_FLUSH_INTERVAL = 10
+
 class SceneSurveillanceView(discord.ui.View):
     """Vue avec boutons interactifs pour la surveillance des scènes."""
     
@@ -117,6 +122,10 @@ class SceneSurveillance(commands.Cog):
         self.paris_tz = pytz.timezone('Europe/Paris')
         self.active_scenes: Dict[str, dict] = {}  # channel_id -> scene_data
         self.mj_role_id = 1018179623886000278  # ID du rôle MJ (à adapter)
+        # Activité à écrire dans Google Sheets : channel_id -> (last_activity, participants, last_author_id)
+        self._pending_activity: Dict[str, Tuple[str, List[int], int]] = {}
+        self._activity_flush_task: Optional[asyncio.Task] = None
+        self._last_activity_flush = 0.0
         
         # Configuration Google Sheets (optionnelle)
         try:
@@ -178,6 +187,8 @@ class SceneSurveillance(commands.Cog):
                 self.activity_monitor.cancel()
             if self.inactivity_checker.is_running():
                 self.inactivity_checker.cancel()
+            if self._activity_flush_task:
+                self._activity_flush_task.cancel()
         except Exception as e:
             logger.error(f"Erreur lors de l'arrêt des tâches: {e}")
 
@@ -319,33 +330,66 @@ class SceneSurveillance(commands.Cog):
 
     async def update_scene_activity(self, channel_id: str, last_activity: str, 
                                   participants: List[int], last_author_id: int):
-        """Met à jour l'activité d'une scène."""
+        """
+        Met à jour l'activité d'une scène.
+
+        Les écritures sont regroupées : toutes les scènes modifiées pendant une
+        fenêtre de SCENE_ACTIVITY_FLUSH_INTERVAL secondes sont écrites en une
+        seule requête, ce qui cadence les appels Google Sheets lors des scans.
+        """
         if not self.sheet:
             logger.debug("Impossible de mettre à jour l'activité: Google Sheets non disponible")
             return
-            
-        try:
-            cell = self.sheet.find(channel_id)
-            headers = self.sheet.row_values(1)
-            row = cell.row
-            
-            # Utiliser les index dynamiques basés sur les en-têtes
-            activity_col = headers.index('last_activity') + 1 if 'last_activity' in headers else 6
-            participants_col = headers.index('participants') + 1 if 'participants' in headers else 7
-            author_col = headers.index('last_author_id') + 1 if 'last_author_id' in headers else 8
-            
-            # Mise à jour en batch pour être plus efficace
-            updates = [
+
+        self._pending_activity[channel_id] = (last_activity, list(participants), last_author_id)
+        if self._activity_flush_task is None or self._activity_flush_task.done():
+            self._activity_flush_task = asyncio.create_task(self._flush_scene_activity())
+
+    async def _flush_scene_activity(self):
+        """Écrit l'activité en attente, une fenêtre après l'écriture précédente."""
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._last_activity_flush + SCENE_ACTIVITY_FLUSH_INTERVAL - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self._pending_activity:
+                return
+
+            pending, self._pending_activity = self._pending_activity, {}
+            self._last_activity_flush = loop.time()
+            try:
+                await asyncio.to_thread(self._write_scene_activity, pending)
+            except Exception as e:
+                logger.error(f"Erreur mise à jour activité: {e}")
+                # Réessayer à la fenêtre suivante, sans écraser une activité plus récente
+                for channel_id, values in pending.items():
+                    self._pending_activity.setdefault(channel_id, values)
+
+    def _write_scene_activity(self, pending: Dict[str, Tuple[str, List[int], int]]):
+        """Écrit l'activité de plusieurs scènes (deux lectures, une écriture groupée)."""
+        headers = self.sheet.row_values(1)
+        rows = {value: i for i, value in enumerate(self.sheet.col_values(1), start=1) if value}
+
+        # Utiliser les index dynamiques basés sur les en-têtes
+        activity_col = headers.index('last_activity') + 1 if 'last_activity' in headers else 6
+        participants_col = headers.index('participants') + 1 if 'participants' in headers else 7
+        author_col = headers.index('last_author_id') + 1 if 'last_author_id' in headers else 8
+
+        updates = []
+        for channel_id, (last_activity, participants, last_author_id) in pending.items():
+            row = rows.get(channel_id)
+            if row is None:
+                logger.warning(f"Scène {channel_id} introuvable dans Google Sheets, activité non enregistrée")
+                continue
+            updates += [
                 {'range': f'{chr(64+activity_col)}{row}', 'values': [[last_activity]]},
                 {'range': f'{chr(64+participants_col)}{row}', 'values': [[json.dumps(participants)]]},
                 {'range': f'{chr(64+author_col)}{row}', 'values': [[str(last_author_id)]]}
             ]
-            
+
+        if updates:
             self.sheet.batch_update(updates)
-            logger.debug(f"✅ Activité mise à jour pour {channel_id}")
-            
-        except Exception as e:
-            logger.error(f"Erreur mise à jour activité: {e}")
+            logger.debug(f"✅ Activité mise à jour pour {len(updates) // 3} scène(s)")
 
 
     async def create_scene_embed(self, channel_id: str) -> discord.Embed:
@@ -903,7 +947,7 @@ class SceneSurveillance(commands.Cog):
             if not status_channel:
                 return
                 
-            status_message = await status_channel.fetch_message(status_message_id)
+            status_message = status_channel.get_partial_message(status_message_id)
             embed = await self.create_scene_embed(channel_id)
             view = SceneSurveillanceView(self, scene_data)
             
@@ -911,7 +955,7 @@ class SceneSurveillance(commands.Cog):
             sort_timestamp = self.calculate_sort_timestamp(scene_data)
             embed.timestamp = sort_timestamp
             
-            await status_message.edit(embed=embed, view=view)
+            await outbound.edit(status_message, priority=Priority.STATUS, embed=embed, view=view)
             
         except Exception as e:
             logger.error(f"Erreur mise à jour message statut: {e}")
@@ -925,10 +969,8 @@ class SceneSurveillance(commands.Cog):
             try:
                 # Scanner l'historique réel du canal pour détecter les changements
                 await self.scan_channel_activity(channel_id)
-                # Mettre à jour le message de statut
+                # Mettre à jour le message de statut (cadencé par l'ordonnanceur partagé)
                 await self.update_status_message(channel_id)
-                # Petit délai pour éviter le rate limiting
-                await asyncio.sleep(1)
             except Exception as e:
                 logger.error(f"Erreur lors du scan de la scène {channel_id}: {e}")
                 
@@ -1153,7 +1195,6 @@ class SceneSurveillance(commands.Cog):
         for channel_id in list(self.active_scenes.keys()):
             try:
                 await self.scan_channel_activity(channel_id)
-                await asyncio.sleep(2)  # Délai plus long pour éviter le rate limiting au démarrage
             except Exception as e:
                 logger.error(f"Erreur scan initial {channel_id}: {e}")
         logger.info("✅ Scanner initial terminé")
@@ -1603,17 +1644,15 @@ class SceneSurveillance(commands.Cog):
                     
                     synced_count += 1
                     
-                    # Mettre à jour le message de progression toutes les 3 scènes
+                    # Mettre à jour le message de progression toutes les 3 scènes (éditions fusionnées)
                     if i % 3 == 0 or i == len(self.active_scenes):
                         try:
-                            await progress_msg.edit(content=f"🔄 Synchronisation en cours... {i}/{len(self.active_scenes)} scènes traitées")
+                            await outbound.edit(progress_msg, priority=Priority.BULK,
+                                                content=f"🔄 Synchronisation en cours... {i}/{len(self.active_scenes)} scènes traitées")
                         except discord.NotFound:
                             # Le message a été supprimé, continuer sans mise à jour
                             pass
-                    
-                    # Respecter les limites Discord - pause de 2 secondes entre chaque scène
-                    if i < len(self.active_scenes):  # Pas de pause après la dernière
-                        await asyncio.sleep(2)
+
                         
                 except Exception as e:
                     logger.error(f"Erreur lors de la sync de la scène {channel_id}: {e}")
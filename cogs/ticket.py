@@ -3,11 +3,12 @@ from discord.ext import commands
 import re
 import asyncio
 
+from utils.discord_scheduler import outbound
+
 class Ticket(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.target_category_id = 1020827427888435210
-        self.CHANNEL_EDIT_DELAY = 2
         self.MAX_TITLE_LENGTH = 95  # Discord limite à 100, on garde une marge
         self.alphabet_mapping = {
             "A": "𝙰", "B": "𝙱", "C": "𝙲", "D": "𝙳", "E": "𝙴", "F": "𝙵", "G": "𝙶",
@@ -69,8 +70,7 @@ class Ticket(commands.Cog):
             target_category = self.bot.get_channel(self.target_category_id)
             if target_category and channel.category != target_category:
                 try:
-                    await channel.edit(category=target_category)
-                    await asyncio.sleep(self.CHANNEL_EDIT_DELAY)
+                    await outbound.edit_channel(channel, category=target_category)
                 except Exception as e:
                     logging.error(f"Erreur lors du déplacement: {str(e)}")
 
@@ -79,7 +79,7 @@ class Ticket(commands.Cog):
                 first_letter = await self.get_first_letter(name_answer)
                 if first_letter:
                     new_name = f"【🎭】{first_letter}{name_answer[1:]}"
-                    await channel.edit(name=new_name)
+                    await outbound.edit_channel(channel, name=new_name)
                     return True
 
             sub_element = await self.find_tickettool_answer(channel, "Quel est le sous-élément ?")
@@ -87,7 +87,7 @@ class Ticket(commands.Cog):
                 first_letter = await self.get_first_letter(sub_element)
                 if first_letter:
                     new_name = f"【⭐】{first_letter}{sub_element[1:]}"
-                    await channel.edit(name=new_name)
+                    await outbound.edit_channel(channel, name=new_name)
                     return True
 
             magic_name = await self.find_tickettool_answer(channel, "Quel est le nom de la magie unique")
@@ -95,7 +95,7 @@ class Ticket(commands.Cog):
                 first_letter = await self.get_first_letter(magic_name)
                 if first_letter:
                     new_name = f"【🌟】{first_letter}{magic_name[1:]}"
-                    await channel.edit(name=new_name)
+                    await outbound.edit_channel(channel, name=new_name)
                     return True
 
             request = await self.find_tickettool_answer(channel, "Quelle est votre demande ?")
@@ -104,7 +104,7 @@ class Ticket(commands.Cog):
                 if first_letter:
                     truncated_request = await self.truncate_text(request)
                     new_name = f"【❔】{first_letter}{truncated_request[1:]}"
-                    await channel.edit(name=new_name)
+                    await outbound.edit_channel(channel, name=new_name)
                     return True
 
             return False
@@ -138,7 +138,6 @@ class Ticket(commands.Cog):
                         if await self.process_ticket(channel):
                             processed += 1
                         total_processed += 1
-                        await asyncio.sleep(self.CHANNEL_EDIT_DELAY)
                     except Exception as e:
                         print(f"Erreur lors du traitement du ticket {channel.name}: {e}")
 
@@ -0,0 +1,277 @@
+"""
+Simulateur Monte Carlo de l'économie des cartes (hors ligne).
+
+Simule des joueurs qui font leur tirage journalier (et éventuellement leur
+tirage sacrificiel et leurs échanges hebdomadaires) en réutilisant
+l'échantillonneur du DrawingManager et la recherche de cartes Full de
+l'UpgradeManager. Aucun service Google n'est contacté : le catalogue est lu
+depuis un instantané JSON.
+
+Format de l'instantané :
+    {"cards_by_category": {"Élèves": [{"id": "...", "name": "X.png"}, ...], ...},
+     "upgrade_cards_by_category": {"Élèves": [{"id": "...", "name": "X (Full).png"}, ...], ...}}
+
+Exemples :
+    python scripts/simulate_drop_rates.py --catalog card_catalog.json --players 10000 --days 365
+    python scripts/simulate_drop_rates.py --synthetic 40 --benchmark
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+import numpy as np
+
+# Setup path
+ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, ROOT_PATH)
+
+from cogs.cards.config import (
+    RARITY_WEIGHTS, ALL_CATEGORIES, DAILY_SACRIFICIAL_CARDS_COUNT,
+    WEEKLY_EXCHANGE_LIMIT, UPGRADE_THRESHOLD
+)
+from cogs.cards.drawing import DrawingManager
+from cogs.cards.upgrades import UpgradeManager
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger("DropRateSimulator")
+
+# Nombre de cartes par tirage (journalier, bonus ou sacrificiel)
+CARDS_PER_DRAW = 3
+
+
+def load_catalog(path: str) -> tuple[dict, dict]:
+    """Charge l'instantané du catalogue."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("cards_by_category", {}), data.get("upgrade_cards_by_category", {})
+
+
+def synthetic_catalog(cards_per_category: int) -> tuple[dict, dict]:
+    """Génère un catalogue fictif (une version Full par carte) pour les benchmarks."""
+    cards, upgrades = {}, {}
+    for cat in ALL_CATEGORIES:
+        cards[cat] = [{"id": f"{cat}-{i}", "name": f"{cat} {i}.png"} for i in range(cards_per_category)]
+        upgrades[cat] = [{"id": f"{cat}-{i}-full", "name": f"{cat} {i} (Full).png"} for i in range(cards_per_category)]
+    return cards, upgrades
+
+
+class EconomySimulator:
+    """Simulation vectorisée d'une population de joueurs."""
+
+    def __init__(self, drawing_manager: DrawingManager, upgrade_manager: UpgradeManager,
+                 players: int, threshold: int, sacrificial_rate: float,
+                 sacrificial_count: int, weekly_limit: int, seed: int | None):
+        self.drawing_manager = drawing_manager
+        self.sampler = drawing_manager.sampler
+        self.players = players
+        self.threshold = threshold
+        self.sacrificial_rate = sacrificial_rate
+        self.sacrificial_count = sacrificial_count
+        self.weekly_limit = weekly_limit
+        self.rng = np.random.default_rng(seed)
+        self.drawing_manager.set_seed(seed)
+
+        # Index global des cartes : offset de chaque catégorie dans le tableau à plat
+        names = self.sampler.compiled_names()
+        self.categories = self.sampler.categories
+        sizes = [len(n) for n in names]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        self.card_category = np.repeat(np.arange(len(sizes)), sizes)
+        self.category_sizes = np.asarray(sizes)
+        total_cards = int(sum(sizes))
+
+        self.has_full = np.array([
+            upgrade_manager.find_full_card(cat, name) is not None
+            for cat, cat_names in zip(self.categories, names) for name in cat_names
+        ], dtype=bool)
+
+        self.counts = np.zeros((players, total_cards), dtype=np.int32)
+        self.collected = np.zeros((players, total_cards), dtype=bool)
+        self.full_owned = np.zeros((players, total_cards), dtype=bool)
+        self.completion_day = np.full((players, len(sizes)), -1, dtype=np.int64)
+
+        self.cards_drawn = 0
+        self.duplicates_drawn = 0
+        self.upgrades = 0
+        self.cards_sacrificed = 0
+        self.trades = 0
+
+    def _give_cards(self, player_ids: np.ndarray, cards_per_player: int):
+        """Tire `cards_per_player` cartes pour chaque joueur de `player_ids`."""
+        if player_ids.size == 0:
+            return
+        cat_idx, card_idx = self.sampler.draw_indices(player_ids.size * cards_per_player)
+        owners = np.repeat(player_ids, cards_per_player)
+        valid = card_idx >= 0
+        owners = owners[valid]
+        flat = self.offsets[cat_idx[valid]] + card_idx[valid]
+
+        self.cards_drawn += flat.size
+        self.duplicates_drawn += int(self.collected[owners, flat].sum())
+        np.add.at(self.counts, (owners, flat), 1)
+        self.collected[owners, flat] = True
+
+    def _sacrifice(self, day: int):
+        """Tirage sacrificiel : pondération par exemplaires, sans remise (clés exponentielles)."""
+        participants = self.rng.random(self.players) < self.sacrificial_rate
+        eligible = self.counts.sum(axis=1) >= self.sacrificial_count
+        player_ids = np.flatnonzero(participants & eligible)
+        if player_ids.size == 0:
+            return
+
+        counts = self.counts[player_ids]
+        owned = counts > 0
+        u = self.rng.random(counts.shape)
+        keys = np.full(counts.shape, np.inf)
+        keys[owned] = -np.log(u[owned]) / counts[owned]
+        k = min(self.sacrificial_count, counts.shape[1])
+        chosen = np.argpartition(keys, k - 1, axis=1)[:, :k]
+        rows = np.repeat(np.arange(player_ids.size), k)
+        cols = chosen.ravel()
+        take = owned[rows, cols]
+        self.counts[player_ids[rows[take]], cols[take]] -= 1
+        self.cards_sacrificed += int(take.sum())
+
+        self._give_cards(player_ids, CARDS_PER_DRAW)
+
+    def _weekly_trades(self):
+        """Échanges idéalisés : un doublon contre une carte jamais obtenue, par joueur."""
+        for _ in range(self.weekly_limit):
+            duplicates = self.counts >= 2
+            missing = ~self.collected
+            can_trade = duplicates.any(axis=1) & missing.any(axis=1)
+            player_ids = np.flatnonzero(can_trade)
+            if player_ids.size == 0:
+                return
+            noise = self.rng.random((player_ids.size, self.counts.shape[1]))
+            give = np.argmax(np.where(duplicates[player_ids], noise, -1.0), axis=1)
+            receive = np.argmax(np.where(missing[player_ids], noise, -1.0), axis=1)
+            self.counts[player_ids, give] -= 1
+            self.counts[player_ids, receive] += 1
+            self.collected[player_ids, receive] = True
+            self.trades += player_ids.size
+
+    def _apply_upgrades(self):
+        """Conversions Full : seuil atteint, Full existante et pas encore possédée."""
+        eligible = (self.counts >= self.threshold) & self.has_full & ~self.full_owned
+        if eligible.any():
+            self.counts[eligible] -= self.threshold
+            self.full_owned |= eligible
+            self.upgrades += int(eligible.sum())
+
+    def _record_completion(self, day: int):
+        """Enregistre le premier jour où chaque joueur complète chaque catégorie."""
+        for c, (offset, size) in enumerate(zip(self.offsets, self.category_sizes)):
+            if size == 0:
+                continue
+            done = self.collected[:, offset:offset + size].all(axis=1)
+            newly = done & (self.completion_day[:, c] < 0)
+            self.completion_day[newly, c] = day
+
+    def run(self, days: int):
+        """Simule `days` jours pour toute la population."""
+        all_players = np.arange(self.players)
+        for day in range(1, days + 1):
+            self._give_cards(all_players, CARDS_PER_DRAW)
+            if self.sacrificial_rate > 0:
+                self._sacrifice(day)
+            if self.weekly_limit > 0 and day % 7 == 0:
+                self._weekly_trades()
+            self._apply_upgrades()
+            self._record_completion(day)
+
+    def report(self, days: int, elapsed: float):
+        """Affiche les statistiques de la simulation."""
+        player_days = self.players * days
+        logger.info(f"\n=== Simulation : {self.players} joueurs × {days} jours = {player_days:,} joueurs-jours ===")
+        logger.info(f"Durée : {elapsed:.2f} s ({player_days / elapsed:,.0f} joueurs-jours/s, "
+                    f"{self.cards_drawn / elapsed:,.0f} cartes/s)")
+        logger.info(f"Cartes tirées : {self.cards_drawn:,} (doublons : {self.duplicates_drawn / max(1, self.cards_drawn):.1%})")
+        logger.info(f"Conversions Full : {self.upgrades:,} ({self.upgrades / self.players:.2f} par joueur)")
+        logger.info(f"Cartes sacrifiées : {self.cards_sacrificed:,} — échanges : {self.trades:,}")
+
+        logger.info(f"\n{'Catégorie':<14}{'Cartes':>8}{'Complétée':>12}{'Médiane (j)':>14}{'P90 (j)':>10}")
+        for c, cat in enumerate(self.categories):
+            size = int(self.category_sizes[c])
+            if size == 0:
+                logger.info(f"{cat:<14}{0:>8}{'-':>12}{'-':>14}{'-':>10}")
+                continue
+            done = self.completion_day[:, c][self.completion_day[:, c] >= 0]
+            ratio = done.size / self.players
+            median = f"{np.median(done):.0f}" if done.size else "-"
+            p90 = f"{np.percentile(done, 90):.0f}" if done.size else "-"
+            logger.info(f"{cat:<14}{size:>8}{ratio:>12.1%}{median:>14}{p90:>10}")
+
+
+def benchmark(drawing_manager: DrawingManager, draws: int):
+    """Compare le tirage unitaire (draw_cards) et le tirage vectorisé (draw_many)."""
+    start = time.perf_counter()
+    for _ in range(draws // CARDS_PER_DRAW):
+        drawing_manager.draw_cards(CARDS_PER_DRAW)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    drawing_manager.draw_many(draws)
+    vectorized = time.perf_counter() - start
+
+    logger.info(f"\n=== Benchmark ({draws:,} cartes) ===")
+    logger.info(f"draw_cards({CARDS_PER_DRAW}) : {single:.3f} s ({draws / single:,.0f} cartes/s)")
+    logger.info(f"draw_many     : {vectorized:.3f} s ({draws / vectorized:,.0f} cartes/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulateur Monte Carlo des taux de drop")
+    parser.add_argument("--catalog", default=os.path.join(ROOT_PATH, "card_catalog.json"),
+                        help="Instantané JSON du catalogue")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Utiliser un catalogue fictif de N cartes par catégorie")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--threshold", type=int, default=UPGRADE_THRESHOLD)
+    parser.add_argument("--sacrificial-rate", type=float, default=0.5,
+                        help="Probabilité qu'un joueur fasse son tirage sacrificiel chaque jour")
+    parser.add_argument("--sacrificial-count", type=int, default=DAILY_SACRIFICIAL_CARDS_COUNT)
+    parser.add_argument("--weekly-limit", type=int, default=WEEKLY_EXCHANGE_LIMIT)
+    parser.add_argument("--weight", action="append", default=[], metavar="CATÉGORIE=POIDS",
+                        help="Surcharge d'un poids de rareté (répétable)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--benchmark", action="store_true", help="Mesurer aussi le débit des tirages")
+    parser.add_argument("--benchmark-draws", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        cards_by_category, upgrade_cards_by_category = synthetic_catalog(args.synthetic)
+    elif os.path.exists(args.catalog):
+        cards_by_category, upgrade_cards_by_category = load_catalog(args.catalog)
+    else:
+        logger.error(f"Catalogue introuvable : {args.catalog} (utilisez --synthetic N)")
+        return
+
+    drawing_manager = DrawingManager(None, cards_by_category, upgrade_cards_by_category)
+    if args.weight:
+        weights = dict(RARITY_WEIGHTS)
+        for item in args.weight:
+            cat, value = item.split("=", 1)
+            weights[cat] = float(value)
+        drawing_manager.sampler.weights = weights
+    upgrade_manager = UpgradeManager(None, upgrade_cards_by_category)
+    upgrade_manager.upgrade_thresholds = {cat: args.threshold for cat in ALL_CATEGORIES}
+
+    simulator = EconomySimulator(
+        drawing_manager, upgrade_manager, args.players, args.threshold,
+        args.sacrificial_rate, args.sacrificial_count, args.weekly_limit, args.seed
+    )
+    start = time.perf_counter()
+    simulator.run(args.days)
+    simulator.report(args.days, time.perf_counter() - start)
+
+    if args.benchmark:
+        benchmark(drawing_manager, args.benchmark_draws)
+
+
+if __name__ == "__main__":
+    main()
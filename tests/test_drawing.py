@@ -0,0 +1,124 @@
+"""
+Tests du tirage pondéré sans remise utilisé par le tirage sacrificiel.
+"""
+
+import random
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+from cogs.cards import drawing
+from cogs.cards.drawing import DrawingManager, weighted_sample_without_replacement
+from cogs.cards.sacrificial_memo import SacrificialSelectionMemo
+
+
+CARDS = {
+    ("Élèves", "Alice"): 4,
+    ("Élèves", "Bob"): 1,
+    ("Autre", "Chloé"): 2,
+    ("Professeurs", "David"): 7,
+    ("Architectes", "Emma"): 1,
+    ("Maître", "Félix"): 3,
+    ("Autre", "Gaspard"): 1,
+}
+
+
+class FixedDatetime(datetime):
+    """datetime.now() figé sur une date donnée."""
+
+    day = datetime(2026, 10, 19, 12, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return tz.localize(cls.day) if tz else cls.day
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(drawing, "datetime", FixedDatetime)
+    # La sélection journalière n'utilise ni le stockage ni les fichiers de cartes
+    return DrawingManager.__new__(DrawingManager)
+
+
+def test_same_user_and_day_give_same_selection(manager):
+    first = manager.select_daily_sacrificial_cards(1234, CARDS)
+    second = manager.select_daily_sacrificial_cards(1234, dict(CARDS))
+
+    assert first == second
+    assert len(first) == drawing.DAILY_SACRIFICIAL_CARDS_COUNT
+    assert len(set(first)) == len(first)
+
+
+def test_selection_from_list_matches_counts(manager):
+    as_list = [card for card, count in CARDS.items() for _ in range(count)]
+
+    assert manager.select_daily_sacrificial_cards(1234, as_list) == \
+        manager.select_daily_sacrificial_cards(1234, CARDS)
+
+
+def test_selection_changes_with_user_or_day(manager, monkeypatch):
+    selections = {tuple(manager.select_daily_sacrificial_cards(user_id, CARDS)) for user_id in range(20)}
+    assert len(selections) > 1
+
+    monkeypatch.setattr(FixedDatetime, "day", datetime(2026, 10, 20, 12, 0))
+    other_days = {tuple(manager.select_daily_sacrificial_cards(user_id, CARDS)) for user_id in range(20)}
+    assert other_days != selections
+
+
+def test_memo_recompute_asks_for_data_newer_than_invalidation(manager, monkeypatch):
+    monkeypatch.setattr(drawing, "sacrificial_memo", SacrificialSelectionMemo())
+    calls = []
+
+    def load_card_counts(fresh_after):
+        calls.append(fresh_after)
+        return CARDS
+
+    first = manager.get_daily_sacrificial_selection(1234, load_card_counts)
+    assert manager.get_daily_sacrificial_selection(1234, load_card_counts) is first
+    assert calls == [0.0]
+
+    drawing.sacrificial_memo.invalidate(1234)
+    manager.get_daily_sacrificial_selection(1234, load_card_counts)
+    assert calls[1] == drawing.sacrificial_memo.invalidated_at(1234) > 0
+
+
+def test_same_seed_gives_same_sample():
+    first = weighted_sample_without_replacement(CARDS, 3, random.Random(42))
+    second = weighted_sample_without_replacement(CARDS, 3, random.Random(42))
+
+    assert first == second
+
+
+def test_sample_has_no_duplicates_and_skips_zero_weights():
+    weights = {"a": 5, "b": 0, "c": 1, "d": -2}
+
+    for seed in range(200):
+        sample = weighted_sample_without_replacement(weights, 3, random.Random(seed))
+        assert sorted(sample) == ["a", "c"]
+
+
+def test_first_pick_is_proportional_to_weight():
+    weights = {"rare": 1, "common": 3, "frequent": 6}
+    trials = 20000
+
+    picks = Counter(
+        weighted_sample_without_replacement(weights, 1, random.Random(seed))[0]
+        for seed in range(trials)
+    )
+
+    total = sum(weights.values())
+    for item, weight in weights.items():
+        assert picks[item] / trials == pytest.approx(weight / total, abs=0.02)
+
+
+def test_heavier_items_are_included_more_often():
+    weights = {"x": 1, "y": 2, "z": 8, "w": 1}
+    trials = 5000
+
+    included = Counter()
+    for seed in range(trials):
+        included.update(weighted_sample_without_replacement(weights, 2, random.Random(seed)))
+
+    assert included["z"] > included["y"] > included["x"]
+    assert included["z"] / trials > 0.9
@@ -0,0 +1,203 @@
+"""
+Ordonnanceur partagé des envois et modifications de messages Discord.
+
+Chaque route (salon, message modifié, etc.) a sa propre file : les requêtes
+d'une même route partent l'une après l'autre, à la vitesse permise par les
+buckets de discord.py (qui suivent les en-têtes X-RateLimit et réessaient
+eux-mêmes après un 429), sans pause fixe. Les files sont servies par ordre de
+priorité et les modifications successives d'un même message encore en
+attente sont fusionnées.
+
+Le nombre de requêtes en vol est limité, sauf pour les routes dont la limite
+propre se compte en minutes (renommages de salons) : une requête qui attend
+son bucket occuperait sinon une place au détriment des réponses aux joueurs.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de requêtes en vol, toutes routes confondues
+MAX_IN_FLIGHT = 8
+
+
+class Priority(IntEnum):
+    """Priorité d'une requête sortante (plus petit = plus urgent)."""
+    INTERACTION = 0  # Réponses visibles par le joueur qui vient d'agir
+    STATUS = 1       # Messages et en-têtes de statut
+    BULK = 2         # Tâches d'administration en masse (reconstructions, synchronisations)
+
+
+class _Job:
+    """Requête en attente dans la file d'une route."""
+
+    def __init__(self, priority: int, seq: int, func: Callable[..., Awaitable[Any]],
+                 kwargs: Dict[str, Any], coalesce_key: Optional[Hashable], gated: bool):
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.kwargs = kwargs
+        self.coalesce_key = coalesce_key
+        self.gated = gated
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _PriorityGate:
+    """Limite le nombre de requêtes en vol ; les places libérées vont aux plus prioritaires."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._in_flight = 0
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int):
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # Place attribuée juste avant l'annulation
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)  # La place passe directement au suivant
+                return
+        self._in_flight -= 1
+
+
+class OutboundScheduler:
+    """Files par route, priorités et fusion des modifications pour les requêtes Discord sortantes."""
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self._gate: Optional[_PriorityGate] = None
+        self._queues: Dict[Hashable, List[_Job]] = {}
+        self._pending: Dict[Hashable, _Job] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self._seq = itertools.count()
+
+        self.coalesced = 0
+
+    def submit(self, route: Hashable, func: Callable[..., Awaitable[Any]],
+               priority: Priority = Priority.STATUS,
+               coalesce_key: Optional[Hashable] = None, gated: bool = True,
+               **kwargs) -> asyncio.Future:
+        """
+        Planifie une requête ``func(**kwargs)``.
+
+        Args:
+            route: Clé de la route (les requêtes d'une même route sont séquentielles)
+            func: Méthode discord.py à appeler (send, edit…)
+            priority: Priorité de la requête
+            coalesce_key: Si une requête non commencée a la même clé, ses arguments sont
+                complétés par ceux-ci (les plus récents l'emportent) et les deux
+                appelants reçoivent le même résultat
+            gated: Compter la requête dans la limite des requêtes en vol (False pour
+                les routes dont discord.py peut faire attendre le bucket plusieurs minutes)
+            **kwargs: Arguments de la requête
+
+        Returns:
+            asyncio.Future: Résultat de la requête
+        """
+        if self._gate is None:
+            self._gate = _PriorityGate(self.max_in_flight)
+
+        if coalesce_key is not None:
+            pending = self._pending.get(coalesce_key)
+            if pending is not None:
+                pending.func = func
+                pending.kwargs.update(kwargs)
+                # La priorité la plus urgente des deux est conservée
+                if priority < pending.priority:
+                    pending.priority = priority
+                    heapq.heapify(self._queues[route])
+                self.coalesced += 1
+                return pending.future
+
+        job = _Job(priority, next(self._seq), func, dict(kwargs), coalesce_key, gated)
+        heapq.heappush(self._queues.setdefault(route, []), job)
+        if coalesce_key is not None:
+            self._pending[coalesce_key] = job
+
+        worker = self._workers.get(route)
+        if worker is None or worker.done():
+            self._workers[route] = asyncio.create_task(self._run_route(route))
+        return job.future
+
+    async def _run_route(self, route: Hashable):
+        """Exécute les requêtes d'une route dans l'ordre de priorité, puis s'arrête quand la file est vide."""
+        queue = self._queues[route]
+        while queue:
+            job = heapq.heappop(queue)
+            if job.coalesce_key is not None:
+                self._pending.pop(job.coalesce_key, None)
+            if job.future.done():
+                continue
+
+            if job.gated:
+                await self._gate.acquire(job.priority)
+            try:
+                result = await job.func(**job.kwargs)
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                if job.gated:
+                    self._gate.release()
+
+        del self._queues[route]
+        self._workers.pop(route, None)
+
+    # ------------------------------------------------------------------
+    # Raccourcis
+    # ------------------------------------------------------------------
+
+    async def send(self, channel: discord.abc.Messageable, *, priority: Priority = Priority.STATUS,
+                   **kwargs) -> discord.Message:
+        """Envoie un message dans un salon (ou un webhook d'interaction) via sa file."""
+        route = ("send", getattr(channel, "id", id(channel)))
+        return await asyncio.shield(self.submit(route, channel.send, priority, **kwargs))
+
+    async def edit(self, message: discord.abc.Snowflake, *, priority: Priority = Priority.STATUS,
+                   **kwargs) -> Any:
+        """
+        Modifie un message (Message ou PartialMessage). Les modifications du même
+        message encore en attente sont fusionnées en une seule requête.
+        """
+        channel_id = getattr(getattr(message, "channel", None), "id", None)
+        return await asyncio.shield(self.submit(("edit", channel_id), message.edit, priority,
+                                                coalesce_key=("message", message.id), **kwargs))
+
+    async def edit_channel(self, channel: discord.abc.GuildChannel, *, priority: Priority = Priority.BULK,
+                           **kwargs) -> Any:
+        """
+        Modifie un salon (nom, catégorie…) ; les modifications en attente du même salon sont fusionnées.
+        Discord limite les renommages à deux par salon toutes les dix minutes : la requête
+        n'occupe pas de place parmi les requêtes en vol pendant que discord.py attend.
+        """
+        return await asyncio.shield(self.submit(("channel", channel.id), channel.edit, priority,
+                                                coalesce_key=("channel", channel.id), gated=False, **kwargs))
+
+
+# Instance partagée par tous les cogs
+outbound = OutboundScheduler()